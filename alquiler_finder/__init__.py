@@ -0,0 +1 @@
+"""Alquiler-Finder: scraping y análisis de alquileres en CABA (CLI en alquiler_finder.cli)."""
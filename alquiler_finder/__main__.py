@@ -0,0 +1,3 @@
+from alquiler_finder.cli import main
+
+main()
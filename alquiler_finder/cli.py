@@ -0,0 +1,204 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+import importlib.abc
+import importlib.util
+
+# ================= CONFIGURACIÓN =================
+# CLI única sobre los scripts de scripts/. Este módulo solo importa la
+# biblioteca estándar: cada subcomando importa lo suyo al ejecutarse, así
+# 'urls' o 'parse' no cargan selenium, geopandas ni folium.
+# Los scripts usan rutas relativas a la raíz del repo (data/, shapes/) y no
+# se empaquetan: solo sirve la instalación editable (pip install -e .) o
+# python -m alquiler_finder desde el repo. Las rutas que pasa el usuario se
+# hacen absolutas al parsear, antes del chdir a scripts/.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, 'scripts')
+MAPA_PATH = os.path.join(ROOT_DIR, 'data', 'mapa.html')
+
+# Los módulos se importan entre sí por nombre; estos dos tienen prefijo numérico en disco
+ALIAS = {
+    'url_builder': '1.url_builder.py',
+    'parsers': '2.parsers.py',
+}
+
+# Etapa -> script (los mismos nombres que las etapas de pipeline.py)
+ETAPAS = {
+    'scrape': '3.main.py',
+    'flatten': '4.flat_guide.py',
+    'geocode': '5.geocode.py',
+    'geocode-gyms': '5.geocode_gyms.py',
+    'metrics': '6.metrics_new.py',
+}
+
+# Comandos livianos y su presupuesto de arranque (segundos, import + ejecución)
+LIVIANOS = {'urls': 1.0, 'parse': 1.0}
+
+# ================= IMPORTS =================
+
+class _AliasFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, nombre, path=None, target=None):
+        if nombre in ALIAS:
+            return importlib.util.spec_from_file_location(nombre, os.path.join(SCRIPTS_DIR, ALIAS[nombre]))
+        return None
+
+def bootstrap():
+    """Hace importables los módulos de scripts/ (con sus alias) y usa scripts/ como cwd."""
+    if not os.path.isdir(SCRIPTS_DIR):
+        sys.exit(f"❌ No está {SCRIPTS_DIR}: alquiler necesita el repo (instalar con pip install -e .)")
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    if not any(isinstance(f, _AliasFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _AliasFinder())
+    os.chdir(SCRIPTS_DIR)
+
+def run_script(script, argv=()):
+    """Corre un script de scripts/ como __main__ en este proceso. Retorna sus globales."""
+    import runpy
+    path = os.path.join(SCRIPTS_DIR, script)
+    sys.argv = [path, *argv]
+    return runpy.run_path(path, run_name='__main__')
+
+# ================= COMANDOS =================
+
+def cmd_etapa(args):
+    run_script(ETAPAS[args.cmd], args.resto)
+
+def cmd_map(args):
+    # El mapa es la última celda de metrics: se corre la etapa y se guarda el folium.Map
+    ns = run_script(ETAPAS['metrics'])
+    os.makedirs(os.path.dirname(args.salida), exist_ok=True)
+    ns['m'].save(args.salida)
+    print(f"🗺️ {args.salida}")
+
+def _sin_resumen():
+    # Los comandos livianos imprimen datos por stdout y no dejan un logs/telemetry_* por llamada
+    if 'telemetry' in sys.modules:
+        sys.modules['telemetry'].disable_summary()
+
+def cmd_urls(args):
+    import url_builder
+    _sin_resumen()
+    if args.portal:
+        for c in url_builder.consultas_fijas(args.portal):
+            print(c['url'])
+    else:
+        print(json.dumps(url_builder.generar_todas_urls(), ensure_ascii=False, indent=1))
+
+def cmd_parse(args):
+    """Re-parsea HTML guardado: una card JSON por línea (sin navegador ni pandas)."""
+    import parsers
+    _sin_resumen()
+    parser_func = getattr(parsers, f"parse_{args.portal}")
+    for path in args.html:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        clase = parsers.classify_page(html, args.portal)
+        items = parser_func(html) if clase == parsers.PAGINA_RESULTADOS else []
+        print(f"{path}: {clase}, {len(items)} cards", file=sys.stderr)
+        for item in items:
+            print(json.dumps(item, ensure_ascii=False, default=str))
+
+def cmd_buscar(args):
+    import text_index
+    indice = text_index.TextIndex()
+    if args.indexar:
+        print(f"📚 {indice.ingest()} archivos nuevos")
+    if args.consulta:
+        resultados = indice.search(" ".join(args.consulta), args.desde, args.hasta, args.limite)
+        for r in resultados:
+            print(f"   {r['ultima']} {r['portal']:<10} {r['barrio'] or '':<14} {(r['titulo'] or '')[:60]:<60} {r['url']}")
+        print(f"🔎 {len(resultados)} avisos")
+    indice.close()
+
+def cmd_pipeline(args):
+    sys.argv = ['pipeline.py', *args.resto]
+    import pipeline
+    pipeline.main()
+
+def _medir_arranque(argv):
+    """Segundos de pared y los imports más pesados (python -X importtime) de un comando."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'alquiler_finder', *argv],
+                          cwd=ROOT_DIR, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get('PYTHONPATH')]))))
+    segundos = time.perf_counter() - t0
+    imports = []
+    for linea in proc.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)', linea)
+        # Solo los de primer nivel: el acumulado ya incluye a sus dependencias
+        if m and not m.group(3):
+            imports.append((int(m.group(2)) / 1e6, m.group(4)))
+    return proc.returncode, segundos, sorted(imports, reverse=True)
+
+def cmd_arranque(args):
+    """Mide el arranque de los comandos livianos; sale con error si alguno pasa su presupuesto."""
+    import tempfile
+    fuera = []
+    with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False) as f:
+        f.write('<html><body>No se encontraron resultados</body></html>')
+        muestra = f.name
+    comandos = {'urls': ['urls', '--portal', 'zonaprop'], 'parse': ['parse', 'zonaprop', muestra]}
+    for nombre, argv in comandos.items():
+        rc, segundos, imports = _medir_arranque(argv)
+        ok = rc == 0 and segundos <= LIVIANOS[nombre]
+        if not ok: fuera.append(nombre)
+        print(f"{'✅' if ok else '❌'} {nombre:<8} {segundos:6.2f} s (presupuesto {LIVIANOS[nombre]:.1f} s, rc={rc})")
+        for s, modulo in imports[:args.top]:
+            print(f"      {s:6.3f} s  {modulo}")
+    os.remove(muestra)
+    sys.exit(1 if fuera else 0)
+
+# ================= CLI =================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='alquiler', description="Scraping y análisis de alquileres en CABA.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    for etapa, script in ETAPAS.items():
+        p = sub.add_parser(etapa, help=f"Corre {script}")
+        p.add_argument('resto', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+        p.set_defaults(func=cmd_etapa)
+
+    p = sub.add_parser('map', help="Corre metrics y guarda el mapa HTML")
+    p.add_argument('--salida', default=MAPA_PATH, type=os.path.abspath)
+    p.set_defaults(func=cmd_map)
+
+    p = sub.add_parser('urls', help="URLs de búsqueda (todas, o las consultas fijas de un portal)")
+    p.add_argument('--portal', choices=['zonaprop', 'argenprop', 'cabaprop'])
+    p.set_defaults(func=cmd_urls)
+
+    p = sub.add_parser('parse', help="Re-parsea páginas HTML guardadas (JSON por línea)")
+    p.add_argument('portal', choices=['zonaprop', 'argenprop', 'cabaprop'])
+    p.add_argument('html', nargs='+', type=os.path.abspath)
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser('buscar', help='Busca en títulos y descripciones: palabras, "frases" y -exclusiones')
+    p.add_argument('consulta', nargs='*')
+    p.add_argument('--desde', help="YYYY-MM-DD")
+    p.add_argument('--hasta', help="YYYY-MM-DD")
+    p.add_argument('--limite', type=int, default=100)
+    p.add_argument('--indexar', action='store_true', help="Indexa antes los CSV pendientes")
+    p.set_defaults(func=cmd_buscar)
+
+    p = sub.add_parser('pipeline', help="Corre el pipeline incremental (mismos argumentos que pipeline.py)")
+    p.add_argument('resto', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser('arranque', help="Mide el tiempo de arranque de los comandos livianos")
+    p.add_argument('--top', type=int, default=5, help="Imports más pesados a mostrar")
+    p.set_defaults(func=cmd_arranque)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    bootstrap()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import re
+import copy
 
 # ================= 1. CONFIGURACIÓN =================
 
@@ -63,6 +64,24 @@ TYPE_SLUGS = {
     }
 }
 
+# Avisos por página de resultados (aprox.) y tope de páginas que recorre el scraper
+PAGE_SIZE = {
+    "zonaprop": 30,
+    "argenprop": 20,
+    "cabaprop": 12
+}
+MAX_PAGINAS = 3
+
+# Separador para pedir varios barrios en una sola URL. Solo argenprop lo
+# acepta ("palermo-o-belgrano"); en los demás cada barrio va por separado.
+MULTI_BARRIO = {
+    "argenprop": "-o-"
+}
+
+# Cortes del planificador de rangos de precio
+PRECIO_PASO = 10000      # Los cortes se redondean a este múltiplo
+MAX_DIVISIONES = 6       # Profundidad máxima de bisección por consulta
+
 # ================= 2. GENERADORES =================
 
 def get_zonaprop_url(barrio, tipo_std, p):
@@ -134,6 +153,25 @@ def get_cabaprop_url(barrio, tipo_std, p):
 
 # ================= 3. FUNCIÓN MAESTRA =================
 
+def get_url(portal, barrio, tipo_std, p):
+    return {
+        "zonaprop": get_zonaprop_url,
+        "argenprop": get_argenprop_url,
+        "cabaprop": get_cabaprop_url
+    }[portal](barrio, tipo_std, p)
+
+def url_pagina(portal, url, n):
+    """URL directa de la página n de una consulta (para tareas sin click en "siguiente")."""
+    if n <= 1:
+        return url
+    if portal == "zonaprop":
+        return re.sub(r'\.html$', f"-pagina-{n}.html", url)
+    if portal == "argenprop":
+        return f"{url}&pagina-{n}" if '?' in url else f"{url}?pagina-{n}"
+    if portal == "cabaprop":
+        return re.sub(r'pagina=\d+', f"pagina={n}", url) if 'pagina=' in url else f"{url}{'&' if '?' in url else '?'}pagina={n}"
+    raise ValueError(f"Portal desconocido: {portal}")
+
 def generar_todas_urls():
     """
     Retorna estructura: { barrio: { tipo: { portal: url } } }
@@ -149,3 +187,99 @@ def generar_todas_urls():
             }
     return resultados
 
+def consultas_fijas(portal, urls_data=None):
+    """
+    Producto fijo barrio x tipo como lista de consultas
+    [{barrio, tipo, url}], el formato que recorre scrape_portal.
+    """
+    urls_data = urls_data or generar_todas_urls()
+    return [
+        {"barrio": barrio, "tipo": tipo, "url": sitios[portal]}
+        for barrio, tipos_dict in urls_data.items()
+        for tipo, sitios in tipos_dict.items()
+    ]
+
+# ================= 4. PLANIFICADOR =================
+
+def _params_rango(p, pmin, pmax):
+    q = copy.deepcopy(p)
+    q['precio']['min'], q['precio']['max'] = pmin, pmax
+    return q
+
+def _partir_por_precio(portal, slug, tipo, pmin, pmax, total, contar, capacidad, p, profundidad=0):
+    """
+    Bisección del rango de precio hasta que cada consulta reporta a lo sumo
+    'capacidad' resultados. Los sub-rangos sin resultados se descartan.
+    """
+    url = get_url(portal, slug, tipo, _params_rango(p, pmin, pmax))
+    if total <= capacidad or profundidad >= MAX_DIVISIONES or pmax - pmin <= 2 * PRECIO_PASO:
+        if total > capacidad:
+            print(f"   ⚠️ {portal} {slug} {tipo} {pmin}-{pmax}: {total} avisos superan el tope de páginas.")
+        return [{"url": url, "total": total}]
+
+    medio = (pmin + pmax) // 2 // PRECIO_PASO * PRECIO_PASO
+    partes = []
+    for a, b in ((pmin, medio), (medio + 1, pmax)):
+        sub_url = get_url(portal, slug, tipo, _params_rango(p, a, b))
+        sub_total = contar(sub_url)
+        if sub_total == 0:
+            continue
+        if sub_total is None:
+            # Sin conteo no hay información para seguir partiendo
+            partes.append({"url": sub_url, "total": None})
+            continue
+        partes.extend(_partir_por_precio(portal, slug, tipo, a, b, sub_total, contar, capacidad, p, profundidad + 1))
+    return partes
+
+def _agrupar_barrios(chicos, capacidad):
+    """First-fit decreasing: arma grupos de barrios cuya suma entra en 'capacidad'."""
+    grupos = []
+    for barrio, total in sorted(chicos, key=lambda x: -x[1]):
+        for g in grupos:
+            if g['total'] + total <= capacidad:
+                g['barrios'].append(barrio)
+                g['total'] += total
+                break
+        else:
+            grupos.append({'barrios': [barrio], 'total': total})
+    return grupos
+
+def planificar_consultas(portal, contar, barrios=None, p=PARAMS, max_paginas=MAX_PAGINAS):
+    """
+    Arma las consultas de un portal para cubrir todo el inventario sin pasar
+    el tope de páginas:
+      1. Cuenta cada barrio x tipo con el rango de precio completo
+      2. Los barrios que no entran se parten por rango de precio
+      3. Los que sobran capacidad se juntan en URLs multi-barrio (si el portal lo admite)
+
+    contar(url) -> cantidad de resultados reportada por el portal (o None).
+    Retorna [{barrio, tipo, url, total}] con barrio = "palermo|belgrano" en grupos.
+    """
+    barrios = barrios or LISTA_BARRIOS
+    capacidad = max_paginas * PAGE_SIZE[portal]
+    sep = MULTI_BARRIO.get(portal)
+    pmin, pmax = p['precio']['min'], p['precio']['max']
+
+    consultas = []
+    for tipo in p['tipos']:
+        chicos = []
+        for barrio in barrios:
+            url = get_url(portal, barrio, tipo, p)
+            total = contar(url)
+            if total == 0:
+                continue
+            if total is not None and total > capacidad:
+                partes = _partir_por_precio(portal, barrio, tipo, pmin, pmax, total, contar, capacidad, p)
+                consultas.extend({"barrio": barrio, "tipo": tipo, "url": c['url'], "total": c['total']} for c in partes)
+            elif sep and total is not None:
+                chicos.append((barrio, total))
+            else:
+                consultas.append({"barrio": barrio, "tipo": tipo, "url": url, "total": total})
+
+        for g in _agrupar_barrios(chicos, capacidad):
+            url = get_url(portal, sep.join(g['barrios']), tipo, p)
+            consultas.append({"barrio": "|".join(g['barrios']), "tipo": tipo, "url": url, "total": g['total']})
+
+    paginas = sum(-(-(c['total'] or capacidad) // PAGE_SIZE[portal]) for c in consultas)
+    print(f"🧭 {portal}: {len(consultas)} consultas, ~{paginas} páginas.")
+    return consultas
@@ -1,5 +1,15 @@
 from bs4 import BeautifulSoup
 import re
+import telemetry
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSONError = orjson.JSONDecodeError
+except ImportError:
+    import json
+    _json_loads = json.loads
+    _JSONError = json.JSONDecodeError
 
 # ================= HERRAMIENTAS =================
 
@@ -7,45 +17,199 @@ def clean_text(text):
     if not text: return ""
     return " ".join(text.replace('\n', ' ').replace('\r', '').split())
 
-def force_int(text):
-    if not text: return ""
-    text_lower = text.lower()
-    if "estrenar" in text_lower: return "0"
-    
-    clean = text.replace('.', '').replace(',', '')
-    digits = re.sub(r'[^\d]', '', clean)
-    return digits
+# La conversión a números (force_int, USD, imputación de ambientes) vive en
+# normalize.py: acá solo se guarda el texto crudo de cada campo como '<Campo>_raw'
+RAW = '_raw'
+
+def _raw_amount(d):
+    """Texto crudo de un monto del JSON ('ARS 450000'); 450000.0 no debe sumar un dígito."""
+    monto = d.get('amount')
+    if isinstance(monto, float) and monto.is_integer(): monto = int(monto)
+    return f"{d.get('currency') or ''} {monto if monto is not None else ''}".strip()
+
+# ================= JSON EMBEBIDO =================
 
-def is_usd(text):
-    if not text: return False
-    t = text.upper()
-    return 'USD' in t or 'U$S' in t or 'DOLARES' in t or 'US$' in t
+# Zonaprop serializa el estado del listado en un <script>; probamos ambos formatos
+ZONAPROP_STATE_MARKERS = [
+    re.compile(r'window\.__PRELOADED_STATE__\s*=\s*'),
+    re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>'),
+]
+ZONAPROP_BASE = "https://www.zonaprop.com.ar"
 
-def extract_ambientes_regex(text):
+def extract_embedded_json(html, markers):
     """
-    Busca patrones como:
-    - '2 amb', '3 ambientes'
-    - 'dos ambientes', 'tres ambientes'
+    Devuelve el primer blob JSON que sigue a alguno de los marcadores,
+    cortando en el </script> siguiente (sin armar el árbol DOM).
     """
-    if not text: return ""
-    
-    # 1. Busqueda numérica directa (Ej: "2 amb", "3amb")
-    # El regex busca un número seguido opcionalmente de espacio y luego 'amb'
-    match_num = re.search(r'(\d+)\s*amb', text, re.IGNORECASE)
-    if match_num:
-        return match_num.group(1)
-        
-    # 2. Búsqueda por palabras (Ej: "dos ambientes", "tres ambientes")
-    text_lower = text.lower()
-    if 'dos amb' in text_lower: return "2"
-    if 'tres amb' in text_lower: return "3"
-    if 'cuatro amb' in text_lower: return "4"
-    
-    return ""
+    for marker in markers:
+        m = marker.search(html)
+        if not m: continue
+        fin = html.find('</script>', m.end())
+        if fin < 0: continue
+        blob = html[m.end():fin].strip().rstrip(';').strip()
+        try:
+            return _json_loads(blob)
+        except _JSONError:
+            continue
+    return None
+
+def find_dict_list(node, key, max_depth=8):
+    """Busca (DFS acotado) la primera lista de dicts que tengan la clave 'key'."""
+    if max_depth < 0: return None
+    if isinstance(node, list):
+        if node and isinstance(node[0], dict) and key in node[0]:
+            return node
+        items = node
+    elif isinstance(node, dict):
+        items = node.values()
+    else:
+        return None
+    for child in items:
+        found = find_dict_list(child, key, max_depth - 1)
+        if found is not None: return found
+    return None
+
+def strip_tags(text):
+    return clean_text(re.sub(r'<[^>]+>', ' ', text)) if text else ""
+
+def _parse_zonaprop_json(html):
+    """
+    Extrae los avisos del estado embebido. Retorna None si no hay blob o no
+    contiene avisos (el caller cae al parser DOM).
+    """
+    state = extract_embedded_json(html, ZONAPROP_STATE_MARKERS)
+    if state is None: return None
+    postings = find_dict_list(state, 'postingId')
+    if not postings: return None
+
+    listings = []
+    for post in postings:
+        data = { 'Bajo_Precio': False, 'Porcentaje_Rebaja': '' }
+        try:
+            # Precio (primer tipo de operación / primer precio)
+            ops = post.get('priceOperationTypes') or []
+            precio = (ops[0].get('prices') or [{}])[0] if ops else {}
+            data['Precio' + RAW] = _raw_amount(precio)
+            descuento = precio.get('discount') or precio.get('formattedDiscount')
+            if descuento:
+                data['Bajo_Precio'] = True
+                data['Porcentaje_Rebaja'] = clean_text(str(descuento))
+
+            data['Titulo'] = strip_tags(post.get('descriptionNormalized') or post.get('description') or post.get('title'))
+
+            location = post.get('postingLocation') or {}
+            address = location.get('address') or {}
+            data['Direccion'] = clean_text(address.get('name') or '')
+
+            expensas = post.get('expenses') or {}
+            if isinstance(expensas, dict) and expensas.get('amount'):
+                data['Expensas' + RAW] = _raw_amount(expensas)
+
+            # Mismas reglas por texto que el parser DOM, aplicadas a la etiqueta
+            for feature in (post.get('mainFeatures') or {}).values():
+                low = str(feature.get('label', '')).lower()
+                val = str(feature.get('value') or '')
+                if 'tot' in low: data['Metros_Totales' + RAW] = val
+                elif 'cub' in low: data['Metros_Cubiertos' + RAW] = val
+                elif 'amb' in low: data['Ambientes' + RAW] = val
+                elif 'dorm' in low: data['Dormitorios' + RAW] = val
+                elif 'baño' in low: data['Baños' + RAW] = val
+                elif 'coch' in low: data['Cocheras' + RAW] = val
+
+            href = post.get('url')
+            if href: data['URL'] = ZONAPROP_BASE + href if href.startswith('/') else href
+
+            highlight = post.get('highlightLabel')
+            if highlight: data['Etiqueta_Destacado'] = clean_text(str(highlight))
+
+            listings.append(data)
+        except Exception:
+            telemetry.incr('cards_descartadas', portal='zonaprop')
+            continue
+    return listings
+
+# ================= CONTEO DE RESULTADOS =================
+
+# "1.234 Departamentos en alquiler en Palermo", "57 resultados", "12 propiedades encontradas"
+RESULT_COUNT_RE = re.compile(r'(\d[\d\.]*)\s+(?:resultados|propiedades|inmuebles|avisos|departamentos|ph)\b', re.IGNORECASE)
+RESULT_HEADERS = [
+    re.compile(r'<h1[^>]*>(.*?)</h1>', re.S | re.I),
+    re.compile(r'<title[^>]*>(.*?)</title>', re.S | re.I),
+]
+
+def extract_result_count(html):
+    """Total de resultados que informa la página (encabezado o título), o None."""
+    for header in RESULT_HEADERS:
+        m = header.search(html)
+        if not m: continue
+        n = RESULT_COUNT_RE.search(strip_tags(m.group(1)))
+        if n: return int(n.group(1).replace('.', ''))
+    return None
+
+# ================= CLASIFICACIÓN DE PÁGINA =================
+# Antes de parsear: ¿la página trae avisos, es un listado vacío, un desafío
+# anti-bot o un error? Solo búsquedas de texto sobre el HTML, sin DOM.
+
+PAGINA_RESULTADOS, PAGINA_VACIA, PAGINA_DESAFIO, PAGINA_ERROR = 'resultados', 'vacia', 'desafio', 'error'
+PAGINA_DESCONOCIDA = 'desconocida'   # Página completa sin cards ni aviso de vacío: ¿cambió el selector?
+# Clases que no dan por terminada la consulta: se recargan y, si siguen, quedan pendientes
+PAGINAS_REINTENTABLES = (PAGINA_DESAFIO, PAGINA_ERROR, PAGINA_DESCONOCIDA)
+
+CARD_MARKERS = {
+    'zonaprop': re.compile(r'postingCardLayout-module__posting-card-layout|"postingId"'),
+    'argenprop': re.compile(r'class="listing__item'),
+    'cabaprop': re.compile(r'class="cards[ "]'),
+}
+CHALLENGE_RE = re.compile(
+    r'cf-browser-verification|challenge-platform|cf-chl-|<title>\s*(?:just a moment|attention required)'
+    r'|px-captcha|captcha-delivery|datadome|/_Incapsula_Resource|verify you are (?:a )?human'
+    r'|g-recaptcha|h-captcha|hcaptcha\.com',
+    re.IGNORECASE
+)
+EMPTY_RE = re.compile(
+    r'no (?:se )?(?:encontr\w+|hay|existen) (?:\w+ ){0,3}(?:resultados|propiedades|avisos|inmuebles)'
+    r'|(?<![\d.,])0 (?:resultados|propiedades|inmuebles)\b',
+    re.IGNORECASE
+)
+ERROR_RE = re.compile(
+    r'<title>[^<]*(?:404|500|502|503|504|no encontrada|not found|error)[^<]*</title>|chrome-error://|ERR_[A-Z_]+',
+    re.IGNORECASE
+)
+MIN_HTML_BYTES = 5000   # Una página de listado real pesa bastante más
+
+def classify_page(html, portal):
+    """
+    'resultados' si hay cards del portal; si no, 'desafio' (captcha / anti-bot),
+    'vacia' (el portal informa 0 resultados), 'error' (página de error o
+    demasiado chica para ser un listado) y, por descarte, 'desconocida': una
+    página completa sin cards ni texto de vacío no se da por vacía, porque
+    suele ser un selector que dejó de coincidir.
+    """
+    if not html:
+        return PAGINA_ERROR
+    if CARD_MARKERS[portal].search(html):
+        return PAGINA_RESULTADOS
+    if CHALLENGE_RE.search(html):
+        return PAGINA_DESAFIO
+    if EMPTY_RE.search(html) or extract_result_count(html) == 0:
+        return PAGINA_VACIA
+    if len(html) < MIN_HTML_BYTES or ERROR_RE.search(html):
+        return PAGINA_ERROR
+    telemetry.event('pagina_desconocida', portal=portal, html_bytes=len(html))
+    return PAGINA_DESCONOCIDA
 
 # ================= PARSERS =================
 
 def parse_zonaprop(html):
+    """JSON embebido si está disponible; el DOM queda como respaldo."""
+    listings = _parse_zonaprop_json(html)
+    if listings is not None:
+        telemetry.incr('zonaprop_modo', modo='json')
+        return listings
+    telemetry.incr('zonaprop_modo', modo='dom')
+    return _parse_zonaprop_dom(html)
+
+def _parse_zonaprop_dom(html):
     soup = BeautifulSoup(html, 'html.parser')
     listings = []
     cards = soup.select('div[class*="postingCardLayout-module__posting-card-layout"]')
@@ -56,16 +220,12 @@ def parse_zonaprop(html):
             # Precio
             price_container = card.select_one('[class*="postingPrices-module__price"]')
             if price_container:
-                raw = price_container.get_text()
-                if is_usd(raw): continue
                 discount = price_container.select_one('[class*="discount"]')
                 if discount:
                     data['Bajo_Precio'] = True
                     data['Porcentaje_Rebaja'] = clean_text(discount.text)
                     discount.decompose()
-                data['Precio'] = force_int(price_container.text)
-            else:
-                data['Precio'] = ""
+                data['Precio' + RAW] = clean_text(price_container.text)
 
             # Titulo y Dirección
             link_tag = card.select_one('[class*="postingCard-module__posting-description"] a')
@@ -84,19 +244,18 @@ def parse_zonaprop(html):
                 data['Direccion'] = raw_addr
 
             exp = card.select_one('[class*="postingPrices-module__expenses"]')
-            data['Expensas'] = force_int(exp.text) if exp else ""
+            if exp: data['Expensas' + RAW] = clean_text(exp.text)
 
             features = card.select('[class*="postingMainFeatures-module__posting-main-features-span"]')
             for f in features:
                 txt = clean_text(f.text)
                 low = txt.lower()
-                val = force_int(txt)
-                if 'tot' in low: data['Metros_Totales'] = val
-                elif 'cub' in low or 'm²' in low: data['Metros_Cubiertos'] = val
-                elif 'amb' in low: data['Ambientes'] = val
-                elif 'dorm' in low: data['Dormitorios'] = val
-                elif 'baño' in low: data['Baños'] = val
-                elif 'coch' in low: data['Cocheras'] = val
+                if 'tot' in low: data['Metros_Totales' + RAW] = txt
+                elif 'cub' in low or 'm²' in low: data['Metros_Cubiertos' + RAW] = txt
+                elif 'amb' in low: data['Ambientes' + RAW] = txt
+                elif 'dorm' in low: data['Dormitorios' + RAW] = txt
+                elif 'baño' in low: data['Baños' + RAW] = txt
+                elif 'coch' in low: data['Cocheras' + RAW] = txt
 
             if link_tag:
                 href = link_tag.get('href')
@@ -106,7 +265,10 @@ def parse_zonaprop(html):
             if highlight: data['Etiqueta_Destacado'] = clean_text(highlight.text)
 
             listings.append(data)
-        except: continue
+        except Exception:
+            # Card con estructura inesperada: la contamos para detectar selectores rotos
+            telemetry.incr('cards_descartadas', portal='zonaprop')
+            continue
     return listings
 
 def parse_argenprop(html):
@@ -119,13 +281,10 @@ def parse_argenprop(html):
         try:
             price = card.find('p', class_='card__price')
             if price:
-                full = price.get_text().strip()
-                if is_usd(full): continue
-                val = full.split('+')[0] if '+' in full else full
-                data['Precio'] = force_int(val)
+                data['Precio' + RAW] = clean_text(price.get_text())
 
             exp = card.find('span', class_='card__expenses')
-            if exp: data['Expensas'] = force_int(exp.text)
+            if exp: data['Expensas' + RAW] = clean_text(exp.text)
 
             addr = card.find('p', class_='card__address')
             if addr: data['Direccion'] = clean_text(addr.text)
@@ -140,22 +299,14 @@ def parse_argenprop(html):
             for d in details:
                 txt = clean_text(d.text)
                 low = txt.lower()
-                val = force_int(txt)
-                if 'm²' in low: data['Metros_Cubiertos'] = val
-                elif 'baño' in low: data['Baños'] = val
-                elif 'dorm' in low: data['Dormitorios'] = val
-                elif 'amb' in low: data['Ambientes'] = val
+                if 'm²' in low: data['Metros_Cubiertos' + RAW] = txt
+                elif 'baño' in low: data['Baños' + RAW] = txt
+                elif 'dorm' in low: data['Dormitorios' + RAW] = txt
+                elif 'amb' in low: data['Ambientes' + RAW] = txt
                 elif 'años' in low or 'estrenar' in low: 
-                    data['Antiguedad'] = force_int(txt)
+                    data['Antiguedad' + RAW] = txt
 
-            # --- IMPUTACIÓN DE AMBIENTES (Corrección Solicitada) ---
-            # Si el campo Ambientes está vacío, buscamos en el texto
-            if not data.get('Ambientes'):
-                # Combinamos Título y Descripción para buscar
-                text_to_search = f"{data.get('Titulo', '')} {data.get('Descripcion_Breve', '')}"
-                found = extract_ambientes_regex(text_to_search)
-                if found: 
-                    data['Ambientes'] = found
+            # La imputación de Ambientes desde Título/Descripción se hace en normalize.py
 
             link = card.find('a', href=True)
             if link: data['URL'] = "https://www.argenprop.com" + link['href']
@@ -164,10 +315,12 @@ def parse_argenprop(html):
             if visited: data['Visto_Estado'] = clean_text(visited.text)
             
             points = card.find('p', class_='card__points')
-            if points: data['Visitas_Count'] = force_int(points.text)
+            if points: data['Visitas_Count' + RAW] = clean_text(points.text)
 
             listings.append(data)
-        except: continue
+        except Exception:
+            telemetry.incr('cards_descartadas', portal='argenprop')
+            continue
     return listings
 
 def parse_cabaprop(html):
@@ -179,12 +332,10 @@ def parse_cabaprop(html):
         data = {}
         try:
             pr = card.find('span', class_='lc-price-normal')
-            if pr:
-                if is_usd(pr.text): continue
-                data['Precio'] = force_int(pr.text)
+            if pr: data['Precio' + RAW] = clean_text(pr.text)
             
             ex = card.find('span', class_='lc-price-small')
-            if ex: data['Expensas'] = force_int(ex.text)
+            if ex: data['Expensas' + RAW] = clean_text(ex.text)
 
             content = card.find('div', class_='tc_content')
             if content:
@@ -214,17 +365,11 @@ def parse_cabaprop(html):
             for li in lis:
                 txt = clean_text(li.text)
                 low = txt.lower()
-                val = force_int(txt)
-                if 'amb' in low: data['Ambientes'] = val
-                elif 'dorm' in low: data['Dormitorios'] = val
-                elif 'baño' in low: data['Baños'] = val
-                elif 'total' in low: data['Metros_Totales'] = val
-                elif 'cubierto' in low: data['Metros_Cubiertos'] = val
-
-            # --- IMPUTACIÓN DE AMBIENTES CABAPROP ---
-            if not data.get('Ambientes'):
-                found = extract_ambientes_regex(data.get('Titulo', ''))
-                if found: data['Ambientes'] = found
+                if 'amb' in low: data['Ambientes' + RAW] = txt
+                elif 'dorm' in low: data['Dormitorios' + RAW] = txt
+                elif 'baño' in low: data['Baños' + RAW] = txt
+                elif 'total' in low: data['Metros_Totales' + RAW] = txt
+                elif 'cubierto' in low: data['Metros_Cubiertos' + RAW] = txt
 
             l = card.find('a', href=True)
             if l:
@@ -236,5 +381,7 @@ def parse_cabaprop(html):
                 data['Fecha_Publicacion'] = clean_text(footer_span.text).replace('Publicado el', '').strip()
 
             listings.append(data)
-        except: continue
+        except Exception:
+            telemetry.incr('cards_descartadas', portal='cabaprop')
+            continue
     return listings
\ No newline at end of file
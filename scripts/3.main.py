@@ -1,201 +1,279 @@
 import time
 import os
 import re
+import queue
 import pandas as pd
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 
-# Asegúrate de que url_builder.py tenga FILTROS_EXCLUSION definido
-from url_builder import generar_todas_urls, FILTROS_EXCLUSION
-from parsers import parse_zonaprop, parse_argenprop, parse_cabaprop
+from url_builder import generar_todas_urls, consultas_fijas, planificar_consultas, url_pagina, MAX_PAGINAS
+from parsers import (parse_zonaprop, parse_argenprop, parse_cabaprop, extract_result_count,
+                     classify_page, PAGINA_VACIA, PAGINAS_REINTENTABLES)
+from browser import setup_driver, close_driver, kill_stale_browser, MODO_NAVEGADOR
+from scrape_store import ScrapeStore, load_records, save_data
+from scheduler import PortalScheduler
+import telemetry
 
 # ================= CONFIGURACIÓN =================
-HOME_DIR = os.path.expanduser("~")
-USER_DATA = os.path.join(HOME_DIR, r"AppData\Local\BraveSoftware\Brave-Browser\User Data")
-BRAVE_PATH = r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe"
-if not os.path.exists(BRAVE_PATH):
-    BRAVE_PATH = r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe"
-
+# El navegador (Brave en Windows / Chromium headless en Linux) se configura en browser.py
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
 TODAY_STR = datetime.now().strftime("%Y-%m-%d")
 
-# ================= FILTROS LÓGICOS =================
-
-def is_excluded(row):
-    """Filtro semántico."""
-    text_check = (str(row.get('Titulo', '')) + " " + 
-                  str(row.get('Descripcion_Breve', '')) + " " + 
-                  str(row.get('Ambientes', ''))).lower()
-    
-    # Normalización simple para detectar palabras pegadas
-    text_norm = text_check.replace(' ', '')
-    
-    for term in FILTROS_EXCLUSION:
-        term_clean = term.lower()
-        if term_clean in text_check: return True
-        if term_clean.replace(' ', '') in text_norm: return True
-        
-    if str(row.get('Ambientes')) == '1': return True
-    return False
+# Planificador adaptativo: parte por precio / agrupa barrios según el conteo de cada portal.
+# Con False se usa el producto fijo barrio x tipo.
+PLANIFICAR = True
 
-def is_valid_price(row):
-    try:
-        p = str(row.get('Precio', ''))
-        if not p.isdigit(): return False
-        val = int(p)
-        if 10000 <= val <= 999999: return True
-        return False
-    except: return False
-
-# ================= SETUP =================
-def setup_driver():
-    options = Options()
-    options.binary_location = BRAVE_PATH
-    options.add_argument(f"--user-data-dir={USER_DATA}")
-    options.add_argument("--profile-directory=Default")
-    options.add_argument("--disable-notifications")
-    options.add_argument("--disable-blink-features=AutomationControlled") 
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(options=options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-    return driver
+# Portal -> (parser, xpath del botón "siguiente")
+PORTALES = {
+    "zonaprop":  (parse_zonaprop,  "//a[@data-qa='PAGING_NEXT']"),
+    "argenprop": (parse_argenprop, "//li[contains(@class, 'pagination__page-next')]/a"),
+    "cabaprop":  (parse_cabaprop,  "//li[contains(@class, 'next')]/a"),
+}
+
+# Los portales corren en paralelo (un navegador por hilo) y la cortesía de
+# cada sitio la impone scheduler.py. Con Brave no: el perfil del usuario no
+# admite dos instancias a la vez.
+PARALELO = MODO_NAVEGADOR != "brave"
+
+# Recargas de una página con desafío / error antes de dejar la consulta pendiente,
+# y pasadas extra de cada portal sobre sus consultas pendientes
+REINTENTOS_PAGINA = 3
+RONDAS = 2
 
 # ================= MOTOR DE SCRAPING =================
-def scrape_portal(driver, portal_name, urls_data, parser_func, next_xpath, max_pages=3):
+def _cargar(driver, url, turno, portal_name):
+    with turno(), telemetry.timer('page_load_ms', portal=portal_name):
+        driver.get(url)
+    with telemetry.timer('page_wait_ms', portal=portal_name):
+        time.sleep(3)
+
+def scrape_portal(driver, portal_name, consultas, parser_func, next_xpath, max_pages=MAX_PAGINAS, scheduler=None):
+    """
+    consultas: [{barrio, tipo, url}] (ver consultas_fijas / planificar_consultas).
+    Cada página se escribe a disco apenas se parsea (ScrapeStore). Si la corrida
+    del día se cortó, las consultas cerradas se saltean y las demás retoman
+    desde la página siguiente a la última guardada.
+    scheduler: cada navegación (carga o click en "siguiente") pide turno al
+    PortalScheduler; sin él se navega sin espera extra.
+    Antes de parsear, cada página se clasifica (classify_page): un desafío,
+    error o página desconocida aplica backoff y se recarga hasta
+    REINTENTOS_PAGINA veces; solo un listado vacío cierra la consulta.
+    Retorna las consultas que quedaron a medias (para reencolar).
+    """
+    turno = (lambda: scheduler.request(portal_name)) if scheduler else nullcontext
     print(f"\n--- 🚀 INICIANDO {portal_name.upper()} ---")
-    portal_data = []
-    seen_urls = set()
+    store = ScrapeStore(portal_name)
+    seen_urls = store.seen_urls()
+    if seen_urls:
+        print(f"  ♻️ Retomando: {len(seen_urls)} avisos ya guardados hoy.")
+    pendientes = []
 
-    for barrio, tipos_dict in urls_data.items():
-        for tipo_inmueble, sitios in tipos_dict.items():
-            
-            url_inicial = sitios[portal_name]
-            tipo_label = "PH" if tipo_inmueble == 'ph' else "Departamento"
-            
-            print(f"  📍 {barrio.upper()} | {tipo_label.upper()}")
+    for consulta in consultas:
+        barrio = consulta['barrio']
+        url_inicial = consulta['url']
+        tipo_label = "PH" if consulta['tipo'] == 'ph' else "Departamento"
+        
+        if store.is_done(url_inicial):
+            print(f"  ⏭️ {barrio.upper()} | {tipo_label.upper()} (completo)")
+            continue
+        # Las páginas ya guardadas no se vuelven a recorrer: se entra directo a la siguiente
+        current_page = store.last_page(url_inicial) + 1
+        if current_page > max_pages:
+            store.mark_done(url_inicial)
+            continue
+        
+        print(f"  📍 {barrio.upper()} | {tipo_label.upper()}" + (f" (desde pág {current_page})" if current_page > 1 else ""))
+        
+        try:
+            _cargar(driver, url_pagina(portal_name, url_inicial, current_page), turno, portal_name)
+        except Exception as e:
+            # El scheduler ya aplicó el backoff; la consulta queda abierta para reintentar
+            telemetry.event('carga_error', portal=portal_name, barrio=barrio, error=repr(e))
+            print(f"     ❌ Error cargando: {e}")
+            pendientes.append(consulta)
+            continue
+        
+        completa = True
+        while current_page <= max_pages:
+            print(f"     📄 Pág {current_page}...")
+            html = driver.page_source
+            clase = classify_page(html, portal_name)
+            intento = 0
+            while clase in PAGINAS_REINTENTABLES and intento < REINTENTOS_PAGINA:
+                intento += 1
+                telemetry.event('pagina_rechazada', portal=portal_name, barrio=barrio, pagina=current_page, clase=clase, intento=intento, html_bytes=len(html))
+                print(f"        🚧 {clase} (reintento {intento}/{REINTENTOS_PAGINA})")
+                if scheduler: scheduler.penalize(portal_name, motivo=clase)
+                try:
+                    _cargar(driver, url_pagina(portal_name, url_inicial, current_page), turno, portal_name)
+                    html = driver.page_source
+                    clase = classify_page(html, portal_name)
+                except Exception as e:
+                    telemetry.event('carga_error', portal=portal_name, barrio=barrio, pagina=current_page, error=repr(e))
+            telemetry.incr('pagina_clase', portal=portal_name, clase=clase)
             
-            driver.get(url_inicial)
-            time.sleep(3)
+            if clase in PAGINAS_REINTENTABLES:
+                print(f"        ❌ Sigue en {clase}: la consulta queda pendiente.")
+                completa = False
+                break
+            if scheduler: scheduler.reward(portal_name)
+            if clase == PAGINA_VACIA:
+                store.write_page(url_inicial, barrio, tipo_label, current_page, [])
+                print("        🛑 Sin resultados.")
+                break
             
-            current_page = 1
-            while current_page <= max_pages:
-                print(f"     📄 Pág {current_page}...")
-                html = driver.page_source
+            with telemetry.timer('parse_ms', portal=portal_name):
                 items = parser_func(html)
+            telemetry.observe('cards_por_pagina', len(items), portal=portal_name)
+            telemetry.incr('paginas', portal=portal_name)
+            
+            page_items = []
+            for item in items:
+                url_prop = item.get('URL')
+                if url_prop and url_prop in seen_urls: continue
+                if url_prop: seen_urls.add(url_prop)
                 
-                new_items_count = 0
-                if items:
-                    for item in items:
-                        url_prop = item.get('URL')
-                        if url_prop and url_prop in seen_urls: continue
-                        if url_prop: seen_urls.add(url_prop)
-                        
-                        item['Portal'] = portal_name
-                        item['Barrio'] = barrio
-                        item['Tipo'] = tipo_label
-                        if 'Ubicacion' in item: del item['Ubicacion']
-                        
-                        portal_data.append(item)
-                        new_items_count += 1
-                    
-                    print(f"        ✅ {new_items_count} nuevas.")
-                    if new_items_count == 0:
-                        print("        🛑 Sin novedades. Cortando sub-bucle.")
-                        break
-                else:
-                    print("        ⚠️ 0 props.")
+                item['Portal'] = portal_name
+                item['Barrio'] = barrio
+                item['Tipo'] = tipo_label
+                if 'Ubicacion' in item: del item['Ubicacion']
                 
-                try:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1)
-                    next_btns = driver.find_elements(By.XPATH, next_xpath)
-                    if not next_btns or not next_btns[0].is_enabled(): break
+                page_items.append(item)
+            
+            store.write_page(url_inicial, barrio, tipo_label, current_page, page_items)
+            
+            if items:
+                # Todas ya vistas no cierra la consulta: puede ser la página repetida
+                # tras un corte o avisos que ya trajo otra consulta; cierran el
+                # listado vacío, la falta de "siguiente" o MAX_PAGINAS
+                telemetry.incr('cards_nuevas', len(page_items), portal=portal_name)
+                print(f"        ✅ {len(page_items)} nuevas.")
+            else:
+                # Hay marcadores de cards pero el parser no saca nada: un selector que dejó de matchear
+                telemetry.incr('paginas_vacias', portal=portal_name)
+                telemetry.event('pagina_vacia', portal=portal_name, barrio=barrio, tipo=tipo_label, pagina=current_page, html_bytes=len(html))
+                print("        ⚠️ 0 props.")
+            
+            try:
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(1)
+                next_btns = driver.find_elements(By.XPATH, next_xpath)
+                if not next_btns or not next_btns[0].is_enabled(): break
+                with turno(), telemetry.timer('page_load_ms', portal=portal_name):
                     driver.execute_script("arguments[0].click();", next_btns[0])
+                with telemetry.timer('page_wait_ms', portal=portal_name):
                     time.sleep(4)
-                    current_page += 1
-                except: break
-    
-    return portal_data
-
-# ================= GUARDADO =================
-def save_data(data_list, portal_name):
-    if not data_list:
-        print(f"❌ {portal_name}: Vacío.")
-        return
-
-    df = pd.DataFrame(data_list)
-    initial_len = len(df)
-    
-    # 1. Filtros
-    df['excluded'] = df.apply(is_excluded, axis=1)
-    df = df[~df['excluded']].copy()
-    
-    df['valid_price'] = df.apply(is_valid_price, axis=1)
-    df = df[df['valid_price']].copy()
-    
-    if 'URL' in df.columns:
-        df.drop_duplicates(subset=['URL'], keep='first', inplace=True)
-    
-    clean_len = len(df)
-    if initial_len - clean_len > 0:
-        print(f"   🧹 Eliminados: {initial_len - clean_len} registros.")
-
-    # Ordenamiento
-    core_columns = [
-        'Portal', 'Barrio', 'Tipo', 'Titulo', 'Precio', 'Expensas', 
-        'Direccion', 
-        'Metros_Totales', 'Metros_Cubiertos', 
-        'Ambientes', 'Dormitorios', 'Baños', 
-        'URL'
-    ]
-    
-    existing = df.columns.tolist()
-    for col in ['excluded', 'valid_price']:
-        if col in existing: existing.remove(col)
+                current_page += 1
+            except Exception as e:
+                telemetry.event('paginacion_error', portal=portal_name, barrio=barrio, pagina=current_page, error=repr(e))
+                completa = False
+                break
         
-    extras = [c for c in existing if c not in core_columns and c != 'Ubicacion']
-    final_order = [c for c in core_columns if c in existing] + sorted(extras)
-    
-    df = df[final_order]
-    
-    target_folder = os.path.join(BASE_DATA_DIR, portal_name)
-    if not os.path.exists(target_folder): os.makedirs(target_folder)
-    
-    filename = f"{portal_name}_{TODAY_STR}.csv"
-    path = os.path.join(target_folder, filename)
-    df.to_csv(path, index=False, sep=';', encoding='utf-8-sig')
-    print(f"💾 GUARDADO: {path} ({len(df)} regs)")
+        if completa:
+            store.mark_done(url_inicial)
+        else:
+            pendientes.append(consulta)
+    return pendientes
 
 # ================= RUN =================
+def make_counter(driver, portal_name, scheduler=None):
+    """contar(url) para el planificador: carga la primera página y lee el total informado."""
+    turno = (lambda: scheduler.request(portal_name)) if scheduler else nullcontext
+    def contar(url):
+        with turno(), telemetry.timer('page_load_ms', portal=portal_name):
+            driver.get(url)
+        time.sleep(3)
+        total = extract_result_count(driver.page_source)
+        telemetry.incr('conteos', portal=portal_name)
+        if scheduler and total is not None: scheduler.reward(portal_name)
+        return total
+    return contar
+
+def get_consultas(driver, portal_name, urls_dict, scheduler=None):
+    if not PLANIFICAR:
+        return consultas_fijas(portal_name, urls_dict)
+    store = ScrapeStore(portal_name)
+    consultas = store.load_plan()
+    if consultas is None:
+        consultas = planificar_consultas(portal_name, make_counter(driver, portal_name, scheduler))
+        store.save_plan(consultas)
+    return consultas
+
+def _drenar(cola):
+    """Itera una cola compartida: cada worker de un portal toma la próxima consulta libre."""
+    while True:
+        try: yield cola.get_nowait()
+        except queue.Empty: return
+
+def run_portal(portal_name, urls_dict, scheduler, driver=None):
+    """
+    Scraping completo de un portal: plan, páginas y CSV. Abre tantos
+    navegadores como cupo de concurrencia tenga el portal (el primero también
+    planifica); si recibe un driver lo usa y no lo cierra.
+    """
+    parser_func, next_xpath = PORTALES[portal_name]
+    propio = driver is None
+    abiertos = []
+    try:
+        if propio:
+            driver = setup_driver()
+            abiertos.append(driver)
+        cola = queue.Queue()
+        for consulta in get_consultas(driver, portal_name, urls_dict, scheduler):
+            cola.put(consulta)
+
+        extra = min(scheduler.slots(portal_name), cola.qsize()) - 1 if propio else 0
+        workers = [driver] + [setup_driver() for _ in range(max(extra, 0))]
+        abiertos.extend(workers[1:])
+        for ronda in range(RONDAS + 1):
+            with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+                futuros = [pool.submit(scrape_portal, d, portal_name, _drenar(cola), parser_func, next_xpath, MAX_PAGINAS, scheduler)
+                           for d in workers]
+                pendientes = [c for f in futuros for c in f.result()]
+            if not pendientes: break
+            if ronda < RONDAS:
+                # Al reencolar, el backoff del portal ya corrió su próximo turno
+                print(f"  🔁 {portal_name}: {len(pendientes)} consultas pendientes, ronda {ronda + 2}")
+                for consulta in pendientes: cola.put(consulta)
+        if pendientes:
+            telemetry.event('consultas_pendientes', portal=portal_name, n=len(pendientes))
+            print(f"  ⚠️ {portal_name}: {len(pendientes)} consultas quedan abiertas para la próxima corrida.")
+
+        save_data(load_records(portal_name), portal_name)
+    finally:
+        for d in abiertos:
+            close_driver(d)
+
 def main():
+    driver = None
     try:
-        os.system("taskkill /F /IM brave.exe >nul 2>&1")
+        kill_stale_browser()
         urls_dict = generar_todas_urls()
-        driver = setup_driver()
-        
-        # Zonaprop
-        data = scrape_portal(driver, "zonaprop", urls_dict, parse_zonaprop, "//a[@data-qa='PAGING_NEXT']")
-        save_data(data, "zonaprop")
-
-        # Argenprop
-        data = scrape_portal(driver, "argenprop", urls_dict, parse_argenprop, "//li[contains(@class, 'pagination__page-next')]/a")
-        save_data(data, "argenprop")
+        scheduler = PortalScheduler()
 
-        # Cabaprop
-        data = scrape_portal(driver, "cabaprop", urls_dict, parse_cabaprop, "//li[contains(@class, 'next')]/a")
-        save_data(data, "cabaprop")
+        if PARALELO:
+            # Un hilo por portal: mientras uno espera su turno los otros navegan
+            with ThreadPoolExecutor(max_workers=len(PORTALES)) as pool:
+                futuros = {pool.submit(run_portal, p, urls_dict, scheduler): p for p in PORTALES}
+                for f, portal in futuros.items():
+                    try: f.result()
+                    except Exception as e:
+                        telemetry.event('portal_error', portal=portal, error=repr(e))
+                        print(f"ERROR {portal}: {e}")
+        else:
+            driver = setup_driver()
+            for portal in PORTALES:
+                run_portal(portal, urls_dict, scheduler, driver)
 
         print("\n🎉 LISTO.")
     except Exception as e:
         print(f"ERROR: {e}")
     finally:
-        try: driver.quit()
-        except: pass
+        if driver is not None:
+            close_driver(driver)
 
 if __name__ == "__main__":
-    main()|
\ No newline at end of file
+    main()
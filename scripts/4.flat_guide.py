@@ -2,6 +2,8 @@
 import pandas as pd
 import pathlib
 import re
+import schema
+import market_stats
 
 def get_latest_file(folder_path, extension=".csv"):
     """
@@ -24,18 +26,19 @@ def get_latest_file(folder_path, extension=".csv"):
 base_path = pathlib.Path.cwd() /".."/ "data"
 
 # Cargamos los DataFrames usando la función
-# Nota: Ajusta el delimitador si es necesario (tu ejemplo usa ';')
+# Los tipos (categorías, enteros angostos, fechas) los aplica schema.read_csv
 path_cabaprop = get_latest_file(base_path / "cabaprop")
-cabaprop = pd.read_csv(path_cabaprop, sep=';') if path_cabaprop else None
+cabaprop = schema.read_csv(path_cabaprop) if path_cabaprop else None
 
 path_zonaprop = get_latest_file(base_path / "zonaprop")
-zonaprop = pd.read_csv(path_zonaprop, sep=';') if path_zonaprop else None
+zonaprop = schema.read_csv(path_zonaprop) if path_zonaprop else None
 
 path_argenprop = get_latest_file(base_path / "argenprop")
-argenprop = pd.read_csv(path_argenprop, sep=';') if path_argenprop else None
+argenprop = schema.read_csv(path_argenprop) if path_argenprop else None
 # %%
 # 1. Unimos los dataframes (esto pone uno abajo del otro y alinea columnas por nombre)
-departamentos = pd.concat([cabaprop, zonaprop, argenprop], ignore_index=True)
+# schema.concat une las categorías de Barrio para que no vuelva a object
+departamentos = schema.concat([cabaprop, zonaprop, argenprop])
 
 # 2. Reordenamos: Columnas comunes primero, luego el resto
 columnas_comunes = [c for c in departamentos.columns if all(c in df.columns for df in [cabaprop, zonaprop, argenprop])]
@@ -47,18 +50,14 @@ departamentos
 departamentos.dtypes
 departamentos.isna().sum()
 # %%
-# 1. Lista de columnas numéricas
-cols_num = ['Expensas', 'Ambientes', 'Dormitorios', 'Baños', 'Cocheras', 'Metros_Cubiertos', 'Metros_Totales', 'Visitas_Count']
-
-for col in cols_num:
-    if col in departamentos.columns:
-        # Convertimos a numérico y usamos 'Int64' (con I mayúscula) 
-        # Este tipo de dato de Pandas sí permite números enteros con valores nulos (NaN)
-        departamentos[col] = pd.to_numeric(departamentos[col], errors='coerce').astype('Int64')
-
-# 2. Conversión de fecha
-# Usamos dayfirst=True porque tu archivo viene con formato DD/MM/YYYY
-departamentos['Fecha_Publicacion'] = pd.to_datetime(departamentos['Fecha_Publicacion'], dayfirst=True, errors='coerce')
+# Los enteros con nulos y Fecha_Publicacion ya vienen tipados desde schema.read_csv
+print(f"Memoria: {schema.memory_mb(departamentos):.1f} MB")
+# %%
+schema.write_excel(departamentos, base_path / ".." / "data" / "departamentos.xlsx")
 # %%
-departamentos.to_excel(base_path / ".." / "data" / "departamentos.xlsx", index=False)
+# Estadísticas de mercado: solo se suman los CSV que todavía no se ingirieron
+mercado = market_stats.MarketStats.load()
+if mercado.ingest(base_path):
+    mercado.save()
+mercado.summary(('Barrio', 'Tipo'), 'costo_total')
 # %%
@@ -0,0 +1,57 @@
+#%%
+import pandas as pd
+import geopandas as gpd
+import pathlib
+from geocoder import geocode_google, save_cache
+
+# 1. Rutas y carga de datos
+base_path = pathlib.Path.cwd()
+
+sportclub = gpd.read_file(base_path / ".." / "data" / "gimnasios" / "sportclub" / "sportclub.geojson")
+megatlon = pd.read_excel(base_path / ".." / "data" / "gimnasios" / "megatlon" / "megatlon.xlsx")
+smartfit = pd.read_excel(base_path / ".." / "data" / "gimnasios" / "smartfit" / "smartfit.xlsx")
+#%%
+# 2. Geocodificación de sedes con Google Maps
+def process_gym_df(df, nombre_cadena):
+    print(f"🚀 Geocodificando {nombre_cadena} con Google API...")
+    
+    # Aplicar geocodificación
+    coords = df['Dirección'].apply(geocode_google)
+    df[['lat', 'lon']] = pd.DataFrame(coords.tolist(), index=df.index)
+    
+    # Convertir a GeoDataFrame
+    gdf = gpd.GeoDataFrame(
+        df, 
+        geometry=gpd.points_from_xy(df.lon, df.lat), 
+        crs="EPSG:4326"
+    )
+    
+    # Filtrar registros fallidos (sin geometría)
+    gdf = gdf[~gdf.geometry.is_empty & gdf.geometry.notna()].copy()
+    gdf['cadena'] = nombre_cadena
+    return gdf
+#%%
+# [3 y 4] Procesamiento y Consolidación Inline
+gyms_total = pd.concat([
+    sportclub.assign(cadena="SportClub").rename(columns={'tipo_plan': 'plan', 'direccion': 'direccion_std'}),
+    process_gym_df(megatlon, "Megatlon").rename(columns={'Nombre': 'nombre', 'Dirección': 'direccion_std', 'Plan': 'plan'}),
+    process_gym_df(smartfit, "Smartfit").rename(columns={'sede': 'nombre', 'Dirección': 'direccion_std', 'smart-ui-text 8': 'plan'})
+], ignore_index=True)[['nombre', 'direccion_std', 'plan', 'precio', 'cadena', 'geometry']]
+
+# Convertir a GeoDataFrame final para asegurar métodos espaciales
+gyms_total = gpd.GeoDataFrame(gyms_total, geometry='geometry', crs="EPSG:4326")
+save_cache()
+
+#%%
+# 5. Mapeo Manual de colores (Gimnasios)
+color_gyms_map = {
+    'SportClub': '#003366', 
+    'Megatlon': '#ff6600', 
+    'Smartfit': '#cc0000'
+}
+
+# Creamos la columna de color física para evitar el error de índice
+gyms_total['color_map'] = gyms_total['cadena'].map(color_gyms_map)
+# %%
+gyms_total.to_file(base_path / ".." / "shapes" / "gimnasios.geojson", driver="GeoJSON")
+# %%
@@ -4,12 +4,19 @@ import geopandas as gpd
 import pathlib
 import numpy as np
 import momepy
-import networkx as nx
-from shapely.ops import nearest_points
-from scipy.spatial import KDTree
 import folium
-from folium import plugins
 import branca.colormap as cm
+from isochrones import build_isochrones, classify_listings, dissolve_isochrones
+from snapping import snap_points_to_edges, snap_layer
+from routing import poi_distances
+from contraction import contract_degree2
+from multimodal import build_multimodal, door_to_door, solo_a_pie, DESTINO_LONLAT
+from map_builder import PayloadBudget, new_map, circle_layer
+from ranking import Ranker, PESOS, RESTRICCIONES
+import hexgrid
+import deals
+import telemetry
+import schema
 #%%
 
 
@@ -21,7 +28,7 @@ lineas_subte = gpd.read_file(base_path / ".." / "shapes" / "subte_lineas.geojson
 estaciones_subte = gpd.read_file(base_path / ".." / "shapes" / "estaciones_de_subte.geojson")
 gyms_total= gpd.read_file(base_path / ".." / "shapes" / "gimnasios.geojson", driver="GeoJSON")
 callejero= gpd.read_file(base_path / ".." / "shapes" / "callejero.geojson")
-departamentos = gpd.read_file(base_path / ".." / "shapes" / "departamentos_geocoded.geojson")
+departamentos = schema.read_file(base_path / ".." / "shapes" / "departamentos_geocoded.geojson")
 #%% preparo capas de transporte y gimnasios
 
 # 1. Definir los mapas de colores
@@ -60,8 +67,8 @@ departamentos['Barrio'] = departamentos['Barrio'].str.replace('-', ' ').str.titl
 departamentos['Barrio'] = departamentos['Barrio'].replace('Barrio Norte', 'Recoleta')
 
 # 2. Filtrar el GeoDataFrame de barrios por los que nos interesan
-# Usamos .unique() para quedarnos solo con los polígonos necesarios
-barrios_interes = departamentos['Barrio'].unique()
+# Las consultas multi-barrio del planificador vienen como 'Palermo|Belgrano'
+barrios_interes = departamentos['Barrio'].str.split('|').explode().replace('Barrio Norte', 'Recoleta').unique()
 barrios_filtrados = barrios[barrios['nombre'].isin(barrios_interes)]
 
 # 3. Join Espacial (Recorte)
@@ -78,8 +85,8 @@ departamentos_final = gpd.sjoin(
 if 'index_right' in departamentos_final.columns:
     departamentos_final = departamentos_final.drop(columns=['index_right'])
 
-# (Opcional) Renombrar la columna del join si quieres mantenerla limpia
-departamentos_final = departamentos_final.rename(columns={'nombre': 'Barrio'})
+# El barrio real es el del polígono (la etiqueta de la consulta puede agrupar varios)
+departamentos_final = departamentos_final.drop(columns=['Barrio']).rename(columns={'nombre': 'Barrio'})
 
 
 print(f"Barrios procesados: {barrios_interes}")
@@ -87,16 +94,13 @@ print(f"Registros finales: {len(departamentos_final)}")
 #%%
 proyeccion = 22185
 G = momepy.gdf_to_nx(callejero.to_crs(epsg=proyeccion), approach='primal')
-nodos_coords = np.array(list(G.nodes))
-tree = KDTree(nodos_coords)
 
 # Categorizar EV: Botánico y Parque -> parque, Plaza -> plaza
 EV['cat'] = EV['clasificac'].replace({'JARDÍN BOTANICO': 'parque', 'PARQUE': 'parque', 'PLAZA': 'plaza'})
 
-# Pre-calcular nodos de origen (departamentos)
+# Pre-calcular nodos de origen (departamentos): proyección sobre la calle más cercana
 depts_m = departamentos_final.to_crs(epsg=proyeccion)
-_, idx_org = tree.query(np.column_stack([depts_m.geometry.x, depts_m.geometry.y]))
-nodos_org = [tuple(nodos_coords[i]) for i in idx_org]
+nodos_org, dist_snap_org = snap_points_to_edges(G, depts_m.geometry)
 
 # 2. Configurar capas a procesar
 capas_objetivo = {
@@ -106,57 +110,85 @@ capas_objetivo = {
     'plaza': EV[EV.cat == 'plaza']
 }
 
-# 2. Bucle de cálculo (solo guardamos la información cruda)
-for etiqueta, gdf_poi in capas_objetivo.items():
+# Nodos de acceso por POI: puntos proyectados sobre la calle, polígonos por sus bordes
+nodos_por_capa = {
+    etiqueta: snap_layer(G, gdf_poi.to_crs(epsg=proyeccion).geometry)
+    for etiqueta, gdf_poi in capas_objetivo.items()
+}
+
+# Destino puerta a puerta: también se proyecta antes de contraer
+destino = gpd.GeoSeries(gpd.points_from_xy([DESTINO_LONLAT[0]], [DESTINO_LONLAT[1]]), crs="EPSG:4326").to_crs(epsg=proyeccion)
+nodo_destino, dist_snap_destino = snap_points_to_edges(G, destino.values)
+
+# Contracción: las cadenas de grado 2 pasan a ser una arista. Se conservan las
+# fuentes de los Dijkstra (accesos de POIs, estaciones incluidas, y destino);
+# los deptos se resuelven por los extremos de su cadena, con la distancia exacta
+fuentes = {n for accesos in nodos_por_capa.values() for nodos in accesos for n in nodos} | set(nodo_destino)
+nodos_antes = G.number_of_nodes()
+G, cadenas = contract_degree2(G, keep=fuentes)
+print(f"Grafo contraído: {nodos_antes} -> {G.number_of_nodes()} nodos")
+
+# 2. Ruteo por red a cada capa (routing.py elige expandir desde los deptos o desde los POIs)
+for etiqueta in capas_objetivo:
     print(f"Calculando ruteo real a {etiqueta}...")
-    poi_m = gdf_poi.to_crs(epsg=proyeccion)
-    _, idx_dest = tree.query(np.column_stack([poi_m.geometry.centroid.x, poi_m.geometry.centroid.y]))
-    nodos_dst = set(tuple(nodos_coords[i]) for i in idx_dest)
-    
-    res_dist, res_cant = [], []
-    for n_start in nodos_org:
-        dists_dict = nx.single_source_dijkstra_path_length(G, n_start, cutoff=1000, weight='mm_len')
-        d_en_red = [d for nodo, d in dists_dict.items() if nodo in nodos_dst]
-        
-        res_dist.append(min(d_en_red) if d_en_red else np.nan)
-        res_cant.append(len(d_en_red))
-    
-    # Guardamos como lista simple (esto crea columnas tipo float/object)
-    departamentos_final[f'distancia_m_{etiqueta}'] = res_dist
+    res_dist, res_cant = poi_distances(G, nodos_org, nodos_por_capa[etiqueta], capa=etiqueta, cadenas=cadenas)
+    departamentos_final[f'distancia_m_{etiqueta}'] = np.floor(res_dist)
     departamentos_final[f'cant_{etiqueta}'] = res_cant
 
-# 3. CAMBIO DE TIPO DE DATO GLOBAL (Fuera del bucle)
-for etiqueta in capas_objetivo.keys():
-    d_col = f'distancia_m_{etiqueta}'
-    c_col = f'cant_{etiqueta}'
-    
-    # Distancia: Forzamos a numérico -> truncamos decimales -> entero con nulos
-    departamentos_final[d_col] = pd.to_numeric(departamentos_final[d_col], errors='coerce').apply(np.floor).astype('Int64')
-    
-    # Cantidad: Forzamos a numérico -> llenamos nulos con 0 -> entero
-    departamentos_final[c_col] = pd.to_numeric(departamentos_final[c_col], errors='coerce').fillna(0).astype(int)
-#%%
-def clean_for_map(gdf):
-    # Eliminar duplicados de columnas (ej. 'Barrio')
-    df = gdf.loc[:, ~gdf.columns.duplicated()].copy()
-    
-    for col in df.columns:
-        if pd.api.types.is_datetime64_any_dtype(df[col]):
-            df[col] = df[col].dt.strftime('%Y-%m-%d')
-        elif str(df[col].dtype) in ['Int64', 'float64', 'int64', 'int32']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
-    
-    return df.to_crs(epsg=4326)
-
-# Asegurar costo_total y limpiar
+# Distancias a UInt16 con nulos (sin POI al alcance), según el esquema compartido
+departamentos_final = schema.apply_schema(departamentos_final)
+#%% isócronas a pie (5/10/15 min) alrededor de cada POI
+# Se calculan una vez por POI; clasificar listados es un punto-en-polígono sobre el índice espacial
+capas_iso = {etiqueta: gdf_poi.to_crs(epsg=proyeccion) for etiqueta, gdf_poi in capas_objetivo.items()}
+isocronas = build_isochrones(G, capas_iso, nodos_por_capa, crs=f"EPSG:{proyeccion}")
+
+departamentos_final = departamentos_final.join(classify_listings(departamentos_final, isocronas))
+#%% tiempo puerta a puerta al destino (a pie + subte)
+# Un Dijkstra desde el destino sobre el grafo invertido (el destino ya se proyectó antes de contraer).
+# Las estaciones ya son nodos del grafo (capa 'subte'): build_multimodal no parte aristas contraídas
+M = build_multimodal(G, lineas_subte.to_crs(epsg=proyeccion), estaciones_subte.to_crs(epsg=proyeccion))
+
+departamentos_final['min_destino'] = door_to_door(M, nodos_org, dist_snap_org, nodo_destino[0], dist_snap_destino[0], cadenas=cadenas)
+departamentos_final['min_destino_a_pie'] = door_to_door(solo_a_pie(M), nodos_org, dist_snap_org, nodo_destino[0], dist_snap_destino[0], cadenas=cadenas)
+print(f"Mediana puerta a puerta: {departamentos_final['min_destino'].median():.0f} min (a pie {departamentos_final['min_destino_a_pie'].median():.0f})")
+#%% guardo la tabla de métricas (la consulta query_server.py sin re-correr este script)
+# Asegurar costo_total
 departamentos_final['costo_total'] = departamentos_final['Precio'] + departamentos_final['Expensas'].fillna(0)
 
-barrios_map = clean_for_map(barrios_filtrados)
-ev_map = clean_for_map(EV)
-subte_lin_map = clean_for_map(lineas_subte)
-subte_est_map = clean_for_map(estaciones_subte)
-gyms_map = clean_for_map(gyms_total)
-deptos_map = clean_for_map(departamentos_final)
+# Oportunidades: costo contra sus 10 comparables más cercanos (ubicación, m², ambientes, mismo Tipo)
+with telemetry.timer('oportunidades_ms'):
+    departamentos_final = departamentos_final.join(deals.score(departamentos_final))
+print(f"Oportunidades: {int(departamentos_final['Oportunidad'].sum())} de {len(departamentos_final)}")
+
+# apply_schema también descarta columnas duplicadas (ej. 'Barrio')
+departamentos_final = schema.apply_schema(departamentos_final)
+schema.write_file(departamentos_final, base_path / ".." / "shapes" / "departamentos_metrics.geojson")
+#%% grilla hexagonal: celda de cada aviso en todas las resoluciones y agregados por celda
+# Preguntas por zona sin sjoin: filtrar por hex_<tamaño> es un isin sobre enteros
+hex_ids = hexgrid.assign(depts_m)
+hexagonos = hexgrid.aggregate_all(departamentos_final.join(hex_ids)).to_crs(epsg=4326)
+schema.write_file(hexagonos, base_path / ".." / "shapes" / "departamentos_hex.geojson")
+
+# Nodos de la calle a sus celdas: minutos al destino también donde no hay avisos
+nodos_calle = list(G.nodes)
+acceso = pd.DataFrame({'min_destino': door_to_door(M, nodos_calle, np.zeros(len(nodos_calle)), nodo_destino[0], dist_snap_destino[0], cadenas=cadenas)})
+acceso = acceso.assign(**{f'hex_{t}': hexgrid.node_cells(G, t) for t in hexgrid.TAMANOS_M})
+hex_acceso = hexgrid.aggregate_all(acceso, agregados=hexgrid.AGREGADOS_NODOS).to_crs(epsg=4326)
+schema.write_file(hex_acceso, base_path / ".." / "shapes" / "calles_hex.geojson")
+hexagonos.groupby('tamano_m')['avisos'].describe()
+#%% ranking ponderado: ajustar PESOS / RESTRICCIONES y re-correr solo esta celda
+ranker = Ranker(departamentos_final)
+pesos = dict(PESOS)
+restricciones = dict(RESTRICCIONES)
+
+with telemetry.timer('ranking_ms'):
+    top = ranker.rank(30, pesos, restricciones, columnas=[
+        'Portal', 'Barrio', 'Direccion', 'costo_total', 'precio_m2', 'Ambientes',
+        'distancia_m_subte', 'distancia_m_parque', 'distancia_m_gym', 'URL'
+    ])
+departamentos_final['score'] = np.round(ranker.scores(pesos), 3)
+top
+#%%
 
 # 2. ESCALA DE COLORES (Departamentos)
 bins = [0, 300000, 400000, 500000, 600000, 700000, 800000, 10000000]
@@ -170,18 +202,49 @@ def get_color_depto(valor):
             return colors[i]
     return colors[-1]
 
+departamentos_final['color_map'] = departamentos_final['costo_total'].map(get_color_depto)
+
+# Campos del tooltip: es también la lista blanca de propiedades que viajan al HTML
+tooltip_list = [
+    'Portal', 'Barrio', 'Tipo', 'Precio', 'Expensas', 'costo_total', 
+    'Direccion', 'Ambientes', 'Dormitorios', 'Baños', 'Metros_Totales', 
+    'Metros_Cubiertos', 'Inmobiliaria', 'distancia_m_gym', 'cant_gym', 
+    'distancia_m_subte', 'cant_subte', 'distancia_m_parque', 'cant_parque', 
+    'distancia_m_plaza', 'cant_plaza', 'min_destino', 'ratio_vecinos', 'Oportunidad', 'score'
+]
+tooltip_list = [c for c in tooltip_list if c in departamentos_final.columns]
+
+hex_mapa = hexagonos[(hexagonos.tamano_m == 500) & (hexagonos.avisos >= 2)].copy()
+hex_mapa['color_map'] = hex_mapa['costo_total_mediana'].map(get_color_depto)
+colormap_acceso = cm.LinearColormap(['#1a9850', '#fee08b', '#d73027'], vmin=0, vmax=60, caption='Minutos al destino')
+acceso_mapa = hex_acceso[hex_acceso.tamano_m == 500].copy()
+acceso_mapa['color_map'] = acceso_mapa['min_destino_mediana'].map(lambda v: '#808080' if pd.isna(v) else colormap_acceso(min(v, 60)))
+
+# GeoJSON compactos: simplificados, con precisión reducida y solo los campos que se usan
+presupuesto = PayloadBudget()
+barrios_js = presupuesto.fit('Barrios', barrios_filtrados, [], cuota=0.10)
+ev_js = presupuesto.fit('Espacios Verdes', EV, ['nombre', 'cat'], cuota=0.20)
+subte_lin_js = presupuesto.fit('Líneas Subte', lineas_subte, ['color_map'], cuota=0.05)
+iso_js = presupuesto.fit('Isócronas 10 min', dissolve_isochrones(isocronas).query('minutos == 10'), ['capa', 'minutos'], cuota=0.15)
+subte_est_js = presupuesto.fit('Estaciones de Subte', estaciones_subte, ['estacion', 'linea', 'color_map'], cuota=0.02)
+gyms_js = presupuesto.fit('Gimnasios', gyms_total, ['cadena', 'nombre', 'color_map'], cuota=0.03)
+hex_js = presupuesto.fit('Hexágonos 500 m', hex_mapa, ['avisos', 'costo_total_mediana', 'distancia_m_subte_media', 'color_map'], cuota=0.03)
+acceso_js = presupuesto.fit('Accesibilidad 500 m', acceso_mapa, ['min_destino_mediana', 'color_map'], cuota=0.02)
+deptos_js = presupuesto.fit('Departamentos', departamentos_final, tooltip_list + ['color_map'], cuota=0.40)
+presupuesto.report()
+
 # 3. CREACIÓN DEL MAPA
-m = folium.Map(location=[-34.6037, -58.3816], zoom_start=12, tiles='OpenStreetMap')
+m = new_map()
 
 # CAPA 1: Barrios (Líneas negras intensas)
 folium.GeoJson(
-    barrios_map, name='Barrios',
+    barrios_js, name='Barrios',
     style_function=lambda x: {'fillColor': 'transparent', 'color': 'black', 'weight': 2.5, 'opacity': 1}
 ).add_to(m)
 
 # CAPA 2: Espacios Verdes
 folium.GeoJson(
-    ev_map, name='Espacios Verdes',
+    ev_js, name='Espacios Verdes',
     style_function=lambda x: {
         'fillColor': '#2ca25f' if x['properties']['cat'] == 'parque' else '#99d8c9',
         'color': '#00441b', 'weight': 1, 'fillOpacity': 0.6
@@ -191,45 +254,52 @@ folium.GeoJson(
 
 # CAPA 3: Líneas de Subte
 folium.GeoJson(
-    subte_lin_map, name='Líneas Subte',
+    subte_lin_js, name='Líneas Subte',
     style_function=lambda x: {'color': x['properties'].get('color_map', 'black'), 'weight': 3.5, 'opacity': 0.8}
 ).add_to(m)
 
+# CAPA 3b: Isócronas de 10 minutos a pie (apagada por defecto)
+color_iso_map = {'subte': '#0054A6', 'gym': '#ff6600', 'parque': '#2ca25f', 'plaza': '#99d8c9'}
+folium.GeoJson(
+    iso_js, name='Isócronas 10 min', show=False,
+    style_function=lambda x: {
+        'fillColor': color_iso_map.get(x['properties']['capa'], 'gray'),
+        'color': color_iso_map.get(x['properties']['capa'], 'gray'), 'weight': 0.5, 'fillOpacity': 0.2
+    },
+    tooltip=folium.GeoJsonTooltip(fields=['capa', 'minutos'], aliases=['Capa:', 'Minutos:'])
+).add_to(m)
+
+# CAPA 3c: Mapa de calor por hexágono (mediana de costo total, apagada por defecto)
+folium.GeoJson(
+    hex_js, name='Hexágonos 500 m', show=False,
+    style_function=lambda x: {'fillColor': x['properties'].get('color_map') or 'gray', 'color': 'white', 'weight': 0.5, 'fillOpacity': 0.5},
+    tooltip=folium.GeoJsonTooltip(fields=['avisos', 'costo_total_mediana', 'distancia_m_subte_media'],
+                                  aliases=['Avisos:', 'Costo total (mediana):', 'Subte (media, m):'])
+).add_to(m)
+
+# CAPA 3d: Minutos al destino por hexágono, desde los nodos de la calle (apagada por defecto)
+folium.GeoJson(
+    acceso_js, name='Accesibilidad 500 m', show=False,
+    style_function=lambda x: {'fillColor': x['properties'].get('color_map') or 'gray', 'color': 'white', 'weight': 0.5, 'fillOpacity': 0.5},
+    tooltip=folium.GeoJsonTooltip(fields=['min_destino_mediana'], aliases=['Minutos al destino (mediana):'])
+).add_to(m)
+
 # CAPA 4: Estaciones de Subte
-estaciones_layer = folium.FeatureGroup(name="Estaciones de Subte")
-for _, row in subte_est_map.iterrows():
-    folium.CircleMarker(
-        location=[row.geometry.y, row.geometry.x], radius=4, color='white', weight=0.5,
-        fill=True, fill_color=row['color_map'], fill_opacity=1
-    ).add_to(estaciones_layer)
-estaciones_layer.add_to(m)
+circle_layer(
+    subte_est_js, "Estaciones de Subte", 'color_map', radio=4,
+    tooltip_campos=['estacion', 'linea'], aliases=['Estación:', 'Línea:'], fill_opacity=1
+).add_to(m)
 
 # CAPA 5: Gimnasios (Círculos más grandes y capa independiente)
-gyms_layer = folium.FeatureGroup(name="Gimnasios")
-for _, row in gyms_map.iterrows():
-    folium.CircleMarker(
-        location=[row.geometry.y, row.geometry.x], radius=6, # Más grande para diferenciar
-        color='black', weight=1, fill=True, 
-        fill_color=row['color_map'], fill_opacity=0.9,
-        popup=f"{row['cadena']}: {row['nombre']}"
-    ).add_to(gyms_layer)
-gyms_layer.add_to(m)
+circle_layer(
+    gyms_js, "Gimnasios", 'color_map', radio=6,
+    tooltip_campos=['cadena', 'nombre'], aliases=['Cadena:', 'Sede:'], color='black', weight=1, fill_opacity=0.9
+).add_to(m)
 
 # CAPA 6: Departamentos (Incluye costo_total en tooltip)
-tooltip_list = [
-    'Portal', 'Barrio', 'Tipo', 'Precio', 'Expensas', 'costo_total', 
-    'Direccion', 'Ambientes', 'Dormitorios', 'Baños', 'Metros_Totales', 
-    'Metros_Cubiertos', 'Inmobiliaria', 'distancia_m_gym', 'cant_gym', 
-    'distancia_m_subte', 'cant_subte', 'distancia_m_parque', 'cant_parque', 
-    'distancia_m_plaza', 'cant_plaza'
-]
-
-folium.GeoJson(
-    deptos_map.to_json(),
-    name='Departamentos',
-    marker=folium.CircleMarker(radius=5, fill=True, fill_opacity=0.8, color='white', weight=0.5),
-    style_function=lambda x: {'fillColor': get_color_depto(x['properties']['costo_total'])},
-    tooltip=folium.GeoJsonTooltip(fields=tooltip_list, aliases=[c.replace('_', ' ').capitalize() + ":" for c in tooltip_list])
+circle_layer(
+    deptos_js, 'Departamentos', 'color_map', radio=5,
+    tooltip_campos=tooltip_list, aliases=[c.replace('_', ' ').capitalize() + ":" for c in tooltip_list]
 ).add_to(m)
 
 # 4. CONTROLES
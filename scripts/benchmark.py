@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+import numpy as np
+import geopandas as gpd
+import shapely
+import momepy
+
+from snapping import snap_points_to_edges, snap_layer
+from routing import poi_distances, BACKENDS
+from contraction import contract_degree2
+from isochrones import build_isochrones, classify_listings
+from ranking import Ranker
+import telemetry
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ================= CONFIGURACIÓN =================
+# Ciudad sintética: grilla de cuadras con calles faltantes y vértices
+# intermedios (como el callejero real), POIs puntuales y poligonales, y
+# avisos al azar. Cada escala x backend corre en un proceso aparte para que
+# el pico de memoria sea de esa corrida.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGS_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'logs')
+
+PROYECCION = 22185
+ORIGEN = (5_630_000.0, 6_160_000.0)   # ~CABA en EPSG:22185
+CUADRA_M = 100
+ESCALAS = [1_000, 10_000]
+SEMILLA = 0
+
+# POIs por cada 1000 cuadras de la grilla
+DENSIDAD_POIS = {'gym': 4, 'subte': 6, 'parque': 1, 'plaza': 5}
+FRACCION_SIN_CALLE = 0.05   # tramos eliminados (manzanas irregulares)
+FRACCION_VERTICES = 0.3     # tramos cortados en dos a mitad de cuadra (nodos de grado 2)
+
+# ================= CIUDAD SINTÉTICA =================
+
+def synthetic_streets(lado, rng, cuadra=CUADRA_M):
+    """Grilla de lado x lado cuadras en metros, con ruido en las esquinas."""
+    x0, y0 = ORIGEN
+    esquinas = np.stack(np.meshgrid(np.arange(lado + 1), np.arange(lado + 1), indexing='ij'), -1).astype(float)
+    esquinas = esquinas * cuadra + rng.normal(0, cuadra * 0.05, esquinas.shape) + (x0, y0)
+
+    tramos = []
+    for dx, dy in ((1, 0), (0, 1)):
+        a = esquinas[:lado + 1 - dx, :lado + 1 - dy].reshape(-1, 2)
+        b = esquinas[dx:, dy:].reshape(-1, 2)
+        tramos.append(np.stack([a, b], 1))
+    tramos = np.concatenate(tramos)
+    tramos = tramos[rng.random(len(tramos)) >= FRACCION_SIN_CALLE]
+
+    medio = (tramos[:, 0] + tramos[:, 1]) / 2 + rng.normal(0, cuadra * 0.03, (len(tramos), 2))
+    con_vertice = rng.random(len(tramos)) < FRACCION_VERTICES
+    lineas = []
+    for (a, b), m, v in zip(tramos, medio, con_vertice):
+        # Como el callejero: el tramo viene en dos segmentos que comparten el punto medio
+        lineas.extend([shapely.LineString([a, m]), shapely.LineString([m, b])] if v else [shapely.LineString([a, b])])
+    return gpd.GeoDataFrame(geometry=lineas, crs=f"EPSG:{PROYECCION}")
+
+def synthetic_pois(lado, rng, cuadra=CUADRA_M):
+    x0, y0 = ORIGEN
+    ancho = lado * cuadra
+    capas = {}
+    for capa, densidad in DENSIDAD_POIS.items():
+        n = max(1, int(densidad * lado * lado / 1000))
+        centros = rng.uniform(0, ancho, (n, 2)) + (x0, y0)
+        if capa in ('parque', 'plaza'):
+            # Manzanas verdes: cuadrados de 1 (plaza) o 2-4 (parque) cuadras
+            lados = cuadra * (rng.integers(2, 5, n) if capa == 'parque' else np.ones(n)) * 0.8
+            geoms = shapely.box(centros[:, 0], centros[:, 1], centros[:, 0] + lados, centros[:, 1] + lados)
+        else:
+            geoms = shapely.points(centros)
+        capas[capa] = gpd.GeoDataFrame(geometry=geoms, crs=f"EPSG:{PROYECCION}")
+    return capas
+
+def synthetic_listings(n, lado, rng, cuadra=CUADRA_M):
+    x0, y0 = ORIGEN
+    xy = rng.uniform(0, lado * cuadra, (n, 2)) + (x0, y0)
+    precio = rng.integers(300_000, 900_000, n)
+    expensas = rng.integers(0, 150_000, n)
+    return gpd.GeoDataFrame({
+        'Precio': precio, 'Expensas': expensas, 'costo_total': precio + expensas,
+        'Metros_Cubiertos': rng.integers(25, 120, n), 'Ambientes': rng.integers(1, 5, n),
+    }, geometry=shapely.points(xy), crs=f"EPSG:{PROYECCION}")
+
+# ================= MEDICIÓN =================
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return maxrss / 1024 if sys.platform != 'darwin' else maxrss / 1e6
+
+class Etapas:
+    def __init__(self):
+        self.registros = []
+
+    def medir(self, nombre, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        res = fn(*args, **kwargs)
+        self.registros.append({'etapa': nombre, 'segundos': round(time.perf_counter() - t0, 4), 'rss_pico_mb': peak_rss_mb()})
+        return res
+
+def run_one(n_avisos, lado, backend, isocronas=False, semilla=SEMILLA, contraer=True):
+    """Corre snapping + ruteo + agregación sobre una ciudad sintética. Retorna el registro."""
+    rng = np.random.default_rng(semilla)
+    et = Etapas()
+    t0 = time.perf_counter()
+
+    calles = et.medir('generar_calles', synthetic_streets, lado, rng)
+    capas = et.medir('generar_pois', synthetic_pois, lado, rng)
+    avisos = et.medir('generar_avisos', synthetic_listings, n_avisos, lado, rng)
+
+    G = et.medir('grafo', momepy.gdf_to_nx, calles, approach='primal')
+    nodos_org, _ = et.medir('snap_avisos', snap_points_to_edges, G, avisos.geometry)
+    nodos_por_capa = et.medir('snap_pois', lambda: {c: snap_layer(G, g.geometry) for c, g in capas.items()})
+    nodos_grafo = G.number_of_nodes()
+    cadenas = None
+    if contraer:
+        fuentes = {n for accesos in nodos_por_capa.values() for nodos in accesos for n in nodos}
+        G, cadenas = et.medir('contraccion', contract_degree2, G, fuentes)
+
+    for capa in capas:
+        dist, cant = et.medir(f'ruteo_{capa}', poi_distances, G, nodos_org, nodos_por_capa[capa], backend=backend, capa=capa, cadenas=cadenas)
+        avisos[f'distancia_m_{capa}'] = np.floor(dist)
+        avisos[f'cant_{capa}'] = cant
+
+    if isocronas:
+        iso = et.medir('isocronas', build_isochrones, G, capas, nodos_por_capa, crs=f"EPSG:{PROYECCION}")
+        et.medir('clasificar', classify_listings, avisos, iso)
+
+    ranker = et.medir('ranking_init', Ranker, avisos)
+    et.medir('ranking_top', ranker.rank, 50)
+
+    return {
+        'avisos': n_avisos, 'lado': lado, 'backend': backend, 'isocronas': isocronas, 'contraido': contraer,
+        'nodos': nodos_grafo, 'nodos_ruteo': G.number_of_nodes(), 'aristas': G.number_of_edges(),
+        'pois': {c: len(g) for c, g in capas.items()},
+        'segundos': round(time.perf_counter() - t0, 3),
+        'rss_pico_mb': peak_rss_mb(),
+        'etapas': et.registros,
+    }
+
+# ================= SUITE =================
+
+def print_result(r):
+    print(f"\n🏙️ {r['avisos']} avisos | grilla {r['lado']}x{r['lado']} ({r['nodos']} nodos, {r['nodos_ruteo']} al rutear, {r['aristas']} aristas) | {r['backend']}")
+    for e in r['etapas']:
+        print(f"   {e['etapa']:<18} {e['segundos']:9.3f} s   rss {e['rss_pico_mb'] or 0:8.1f} MB")
+    print(f"   {'TOTAL':<18} {r['segundos']:9.3f} s   rss {r['rss_pico_mb'] or 0:8.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de snapping/ruteo/agregación sobre ciudades sintéticas.")
+    parser.add_argument('--escalas', type=int, nargs='+', default=ESCALAS, help="Cantidades de avisos")
+    parser.add_argument('--lado', type=int, default=None, help="Cuadras por lado (por defecto crece con la escala)")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--isocronas', action='store_true', help="Incluye isócronas y clasificación")
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--sin_contraccion', action='store_true', help="Rutea sobre el grafo sin contraer")
+    parser.add_argument('--una', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.una:
+        # Proceso hijo: una sola corrida, resultado en stdout
+        r = run_one(args.escalas[0], args.lado, args.backends[0], args.isocronas, args.semilla, not args.sin_contraccion)
+        # El resumen de telemetría va al JSONL sin imprimir: stdout es solo el resultado
+        telemetry.summary(imprimir=False)
+        print(json.dumps(r))
+        return
+
+    resultados = []
+    for n in args.escalas:
+        # Densidad aproximada de CABA: ~1 aviso cada 2-3 cuadras
+        lado = args.lado or max(20, int(np.sqrt(n * 2.5)))
+        for backend in args.backends:
+            cmd = [sys.executable, os.path.abspath(__file__), '--una', '--escalas', str(n), '--lado', str(lado),
+                   '--backends', backend, '--semilla', str(args.semilla)] + (['--isocronas'] if args.isocronas else []) + (['--sin_contraccion'] if args.sin_contraccion else [])
+            proc = subprocess.run(cmd, cwd=SCRIPT_DIR, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"❌ {n} avisos / {backend}:\n{proc.stderr[-2000:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print_result(r)
+            resultados.append(r)
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    path = os.path.join(LOGS_DIR, f"benchmark_{datetime.now():%Y-%m-%dT%H%M%S}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=1)
+    print(f"\n💾 {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+# ================= CONFIGURACIÓN =================
+# Modos:
+#   - "brave": Brave en Windows con el perfil del usuario (comportamiento original)
+#   - "headless": Chromium headless en Linux con un perfil descartable y
+#     bloqueo de recursos que el parser no usa
+MODO_NAVEGADOR = os.environ.get("ALQUILER_BROWSER", "brave" if os.name == "nt" else "headless")
+
+HOME_DIR = os.path.expanduser("~")
+USER_DATA = os.path.join(HOME_DIR, r"AppData\Local\BraveSoftware\Brave-Browser\User Data")
+BRAVE_PATH = r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe"
+if not os.path.exists(BRAVE_PATH):
+    BRAVE_PATH = r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe"
+
+CHROMIUM_CANDIDATOS = ["chromium", "chromium-browser", "google-chrome", "google-chrome-stable"]
+
+# User agent de escritorio: el de headless incluye "HeadlessChrome" y algunos portales lo bloquean
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+# Patrones bloqueados vía CDP (Network.setBlockedURLs): imágenes, media,
+# fuentes y analítica de terceros. El HTML y el JS propio del portal pasan.
+BLOCKED_URLS = [
+    # Imágenes
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # Media
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # Fuentes
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Analítica / publicidad
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+    "*hotjar.com*", "*clarity.ms*", "*criteo.*", "*taboola.com*",
+    "*newrelic.com*", "*nr-data.net*", "*tiktok.com*", "*segment.io*",
+]
+
+# ================= SETUP =================
+
+def _stealth(options):
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+def _brave_options():
+    options = Options()
+    options.binary_location = BRAVE_PATH
+    options.add_argument(f"--user-data-dir={USER_DATA}")
+    options.add_argument("--profile-directory=Default")
+    _stealth(options)
+    return options, None
+
+def _headless_options():
+    options = Options()
+    binario = next((shutil.which(b) for b in CHROMIUM_CANDIDATOS if shutil.which(b)), None)
+    if binario:
+        options.binary_location = binario
+
+    # Perfil descartable: se borra en close_driver
+    perfil = tempfile.mkdtemp(prefix="alquiler_profile_")
+    options.add_argument(f"--user-data-dir={perfil}")
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1366,900")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+    _stealth(options)
+    return options, perfil
+
+def setup_driver(modo=MODO_NAVEGADOR):
+    if modo == "brave":
+        options, perfil = _brave_options()
+    elif modo == "headless":
+        options, perfil = _headless_options()
+    else:
+        raise ValueError(f"Modo de navegador desconocido: {modo}")
+
+    driver = webdriver.Chrome(options=options)
+    driver._perfil_temporal = perfil
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    if modo == "headless":
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+def kill_stale_browser(modo=MODO_NAVEGADOR):
+    """Brave no abre el perfil si quedó una instancia colgada (solo aplica en Windows)."""
+    if modo == "brave" and os.name == "nt":
+        os.system("taskkill /F /IM brave.exe >nul 2>&1")
+
+def close_driver(driver):
+    try: driver.quit()
+    except: pass
+    perfil = getattr(driver, '_perfil_temporal', None)
+    if perfil:
+        shutil.rmtree(perfil, ignore_errors=True)
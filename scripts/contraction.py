@@ -0,0 +1,126 @@
+import numpy as np
+import networkx as nx
+import shapely
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Contracción del grafo de calles: cada cadena de nodos de grado 2 (vértices
+# del callejero, cortes de tramo, avisos proyectados) pasa a ser una sola
+# arista con el largo sumado y la geometría unida. Dijkstra deja de pagar un
+# heap por cada nodo intermedio.
+# Los nodos contraídos quedan en 'cadenas': nodo -> (a, off_a, b, off_b), los
+# dos extremos de su cadena y la distancia a cada uno. Mientras las fuentes
+# de los Dijkstra sean nodos conservados (keep), la distancia a un nodo
+# contraído es exacta: min(d[a] + off_a, d[b] + off_b).
+# Todo lo que se proyecte sobre el grafo (snap_points_to_edges) se proyecta
+# antes de contraer: partir una arista contraída deja 'cadenas' desactualizado.
+
+PESO = 'mm_len'
+
+# ================= CONTRACCIÓN =================
+
+def _aristas(G, n=None):
+    """Aristas como (u, v, key, data), de un nodo o de todo el grafo."""
+    if G.is_multigraph():
+        return list(G.edges(n, keys=True, data=True))
+    return [(u, v, None, d) for u, v, d in G.edges(n, data=True)]
+
+def _id(u, v, key):
+    return (min(u, v), max(u, v), key)
+
+def _orientada(geom, desde):
+    """Coordenadas de la geometría empezando por el extremo más cercano a 'desde'."""
+    xy = shapely.get_coordinates(geom)
+    if np.hypot(*(xy[-1] - desde[:2])) < np.hypot(*(xy[0] - desde[:2])):
+        xy = xy[::-1]
+    return xy
+
+def contract_degree2(G, keep=(), weight=PESO):
+    """
+    G: grafo primal de calles (momepy, nodos (x, y)). No se modifica.
+    keep: nodos que no se contraen (fuentes de los Dijkstra: accesos de POIs,
+    destino, estaciones).
+    Retorna (H, cadenas): el MultiGraph contraído y el mapa de los nodos
+    contraídos a los extremos de su cadena.
+    """
+    keep = set(keep)
+
+    def contraible(n):
+        return n not in keep and G.degree(n) == 2 and not G.has_edge(n, n)
+
+    H = nx.MultiGraph(**G.graph)
+    H.add_nodes_from((n, d) for n, d in G.nodes(data=True) if not contraible(n))
+    cadenas = {}
+    vistas = set()
+
+    def recorrer(s, arista):
+        """Camina desde el nodo conservado s hasta el próximo y agrega la arista contraída."""
+        _, n, key, d = arista
+        vistas.add(_id(s, n, key))
+        if n in H:
+            # Tramo sin nodos intermedios: se copia tal cual
+            H.add_edge(s, n, **d)
+            return
+        partes, largo, internos, previa = [_orientada(d['geometry'], s)], d[weight], [], _id(s, n, key)
+        while n not in H:
+            internos.append((n, largo))
+            _, sig, key, d = next(a for a in _aristas(G, n) if _id(*a[:3]) != previa)
+            previa = _id(n, sig, key)
+            vistas.add(previa)
+            partes.append(_orientada(d['geometry'], n)[1:])
+            largo += d[weight]
+            n = sig
+        H.add_edge(s, n, **{'geometry': shapely.LineString(np.concatenate(partes)), weight: largo, 'tramos': len(internos) + 1})
+        for nodo, off in internos:
+            cadenas[nodo] = (s, off, n, largo - off)
+        telemetry.incr('contraccion_nodos', len(internos))
+
+    with telemetry.timer('contraccion_ms'):
+        for s in list(H.nodes):
+            for arista in _aristas(G, s):
+                if _id(*arista[:3]) not in vistas:
+                    recorrer(s, arista)
+        # Ciclos sin ningún nodo conservado (rotondas sueltas): se conserva uno cualquiera
+        for u, v, key, _ in _aristas(G):
+            if _id(u, v, key) in vistas: continue
+            cadenas.pop(u, None)
+            H.add_node(u, **G.nodes[u])
+            for arista in _aristas(G, u):
+                if _id(*arista[:3]) not in vistas:
+                    recorrer(u, arista)
+
+    telemetry.event('grafo_contraido', nodos=G.number_of_nodes(), nodos_contraido=H.number_of_nodes(),
+                    aristas=G.number_of_edges(), aristas_contraido=H.number_of_edges())
+    return H, cadenas
+
+# ================= DISTANCIAS =================
+
+def extremos(cadenas, nodo):
+    """(a, off_a, b, off_b) del nodo; un nodo conservado es su propio extremo."""
+    return cadenas.get(nodo) or (nodo, 0.0, nodo, 0.0)
+
+def resolve(dists, cadenas, nodos, escala=1.0):
+    """
+    Distancia exacta a cada nodo del grafo original a partir de un Dijkstra
+    sobre el grafo contraído (fuentes conservadas). 'escala' pasa los offsets
+    (en metros) a la unidad del Dijkstra. NaN si no se llega.
+    """
+    res = np.full(len(nodos), np.nan)
+    for i, n in enumerate(nodos):
+        a, off_a, b, off_b = extremos(cadenas, n)
+        d = min(dists.get(a, np.inf) + off_a * escala, dists.get(b, np.inf) + off_b * escala)
+        if np.isfinite(d): res[i] = d
+    return res
+
+def add_source(H, cadenas, nodo, weight=PESO):
+    """
+    Vuelve a conectar un nodo contraído a los extremos de su cadena, para usarlo
+    de fuente (in place). Retorna True si hubo que agregarlo: sacarlo después
+    con H.remove_node(nodo).
+    """
+    if nodo in H:
+        return False
+    a, off_a, b, off_b = cadenas[nodo]
+    H.add_edge(nodo, a, **{weight: off_a})
+    H.add_edge(nodo, b, **{weight: off_b})
+    return True
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import KDTree
+
+# ================= CONFIGURACIÓN =================
+# Detector de avisos baratos para su zona: cada aviso se compara con sus K
+# comparables más cercanos (mismo Tipo) en un espacio que combina ubicación,
+# superficie y ambientes. Un KD-tree por Tipo y una consulta en lote por árbol.
+
+K = 10
+PROYECCION = 22185
+
+# Escala de cada eje: una unidad de distancia equivale a...
+ESCALA_UBICACION_M = 1000    # ... 1 km
+ESCALA_METROS_LOG = 0.25     # ... ~28% más de superficie (log)
+ESCALA_AMBIENTES = 1.0       # ... un ambiente de diferencia
+
+# Comparables más lejos que esto (unidades combinadas, k-ésimo vecino) no dan un puntaje confiable
+MAX_DIST = 3.0
+
+# Oportunidad: bastante más barato que la mediana de sus vecinos y atípico entre ellos
+RATIO_UMBRAL = 0.8
+Z_UMBRAL = -2.0
+
+# ================= DETECTOR =================
+
+def _num(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan, copy=True)
+
+def features(df, proyeccion=PROYECCION):
+    """
+    Matriz (n, 4) del espacio combinado: x, y, log(m²), ambientes, ya escalados.
+    Los m² faltantes se imputan con la mediana de su cantidad de ambientes
+    (y viceversa); las filas sin ubicación quedan con NaN.
+    """
+    g = df.geometry
+    if g.crs is not None and g.crs.to_epsg() != proyeccion:
+        g = g.to_crs(epsg=proyeccion)
+    x, y = g.x.to_numpy(dtype=float), g.y.to_numpy(dtype=float)
+
+    metros = _num(df, 'Metros_Cubiertos')
+    metros[metros <= 0] = np.nan
+    amb = _num(df, 'Ambientes')
+    aux = pd.DataFrame({'m': metros, 'a': amb})
+    aux['m'] = aux['m'].fillna(aux.groupby('a')['m'].transform('median')).fillna(aux['m'].median())
+    aux['a'] = aux['a'].fillna(aux.groupby(aux['m'].round(-1))['a'].transform('median')).fillna(aux['a'].median())
+
+    return np.column_stack([
+        x / ESCALA_UBICACION_M, y / ESCALA_UBICACION_M,
+        np.log(aux['m'].to_numpy(dtype=float)) / ESCALA_METROS_LOG,
+        aux['a'].to_numpy(dtype=float) / ESCALA_AMBIENTES,
+    ])
+
+def score(df, k=K, max_dist=MAX_DIST, precio='costo_total'):
+    """
+    DataFrame alineado con df: mediana de costo de los k comparables,
+    ratio (costo / mediana), z robusto en log (MAD) y Oportunidad.
+    """
+    X = features(df)
+    costo = _num(df, precio)
+    tipos = df['Tipo'].astype('string').fillna('?').to_numpy() if 'Tipo' in df.columns else np.full(len(df), '?')
+    validos = np.isfinite(X).all(axis=1) & (costo > 0)
+
+    mediana = np.full(len(df), np.nan)
+    z = np.full(len(df), np.nan)
+    for tipo in np.unique(tipos[validos]):
+        idx = np.flatnonzero(validos & (tipos == tipo))
+        if len(idx) <= k: continue
+        tree = KDTree(X[idx])
+        # k+1 y se descarta el propio aviso (con duplicados exactos no siempre es el primero)
+        dist, vec = tree.query(X[idx], k=k + 1, workers=-1)
+        otros = np.argsort(vec == np.arange(len(idx))[:, None], axis=1, kind='stable')[:, :k]
+        dist, vec = np.take_along_axis(dist, otros, 1), np.take_along_axis(vec, otros, 1)
+        log_vec = np.log(costo[idx][vec])
+        med = np.median(log_vec, axis=1)
+        mad = np.median(np.abs(log_vec - med[:, None]), axis=1) * 1.4826
+        confiable = dist[:, -1] <= max_dist
+        mediana[idx] = np.where(confiable, np.exp(med), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z[idx] = np.where(confiable & (mad > 0), (np.log(costo[idx]) - med) / mad, np.nan)
+
+    with np.errstate(invalid='ignore'):
+        ratio = costo / mediana
+    return pd.DataFrame({
+        'costo_vecinos': np.round(mediana),
+        'ratio_vecinos': np.round(ratio, 3),
+        'z_vecinos': np.round(z, 2),
+        'Oportunidad': (ratio <= RATIO_UMBRAL) & (z <= Z_UMBRAL),
+    }, index=df.index)
@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import getpass
+import tempfile
+import pandas as pd
+import googlemaps
+import telemetry
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock, la escritura sigue siendo atómica
+    fcntl = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'data', 'geocode_cache.json')
+
+# ================= CLIENTE =================
+# La API Key se toma de GOOGLE_MAPS_API_KEY (la usa el runner del pipeline);
+# si no está definida se pide por consola como antes.
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            print("🔑 Configuración de Google Maps API")
+            api_key = getpass.getpass("Ingrese su Google API Key: ")
+        _client = googlemaps.Client(key=api_key)
+    return _client
+
+# ================= CACHÉ =================
+# Dirección normalizada -> [lat, lon]. Evita pagar dos veces la misma consulta
+# entre corridas (los mismos avisos reaparecen día a día).
+_cache = None
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = _read_cache_file()
+    return _cache
+
+def _read_cache_file():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    with open(CACHE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_cache():
+    """
+    geocode y geocode_gyms corren en paralelo sobre el mismo caché: bajo un
+    lock se re-lee el archivo, se le suman las entradas nuevas y se reemplaza
+    atómicamente (un lector nunca ve un JSON a medio escribir).
+    """
+    if _cache is None: return
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH + '.lock', 'w') as lock:
+        if fcntl: fcntl.flock(lock, fcntl.LOCK_EX)
+        en_disco = _read_cache_file()
+        en_disco.update(_cache)
+        _cache.update(en_disco)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(CACHE_PATH), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(en_disco, f, ensure_ascii=False)
+        os.replace(tmp, CACHE_PATH)
+
+# ================= GEOCODIFICACIÓN =================
+
+def geocode_google(address):
+    if pd.isna(address) or str(address).strip() == "":
+        return None, None
+    
+    # Limpieza simple de la dirección
+    address_clean = re.sub(r'C\.A\.B\.A|CABA| - ', ' ', str(address), flags=re.I)
+    full_address = f"{address_clean}, Ciudad Autónoma de Buenos Aires, Argentina"
+    clave = " ".join(full_address.lower().split())
+    
+    cache = _get_cache()
+    if clave in cache:
+        telemetry.incr('geocode_cache', resultado='hit')
+        lat, lon = cache[clave]
+        return lat, lon
+    telemetry.incr('geocode_cache', resultado='miss')
+    
+    try:
+        # Llamada a la API de Google
+        with telemetry.timer('geocode_ms'):
+            result = get_client().geocode(full_address)
+        if result:
+            location = result[0]['geometry']['location']
+            cache[clave] = [location['lat'], location['lng']]
+            return location['lat'], location['lng']
+        telemetry.incr('geocode_sin_resultado')
+    except Exception as e:
+        telemetry.incr('geocode_error')
+        print(f"⚠️ Error geocodificando {address}: {e}")
+    
+    return None, None
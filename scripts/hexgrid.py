@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+# ================= CONFIGURACIÓN =================
+# Grilla hexagonal (coordenadas axiales, hexágonos con punta arriba) sobre la
+# proyección métrica. Cada celda tiene un id entero que codifica tamaño y
+# coordenadas: asignar avisos o nodos es aritmética vectorizada, filtrar por
+# zona es un np.isin, y no hace falta ningún join contra polígonos.
+
+PROYECCION = 22185
+TAMANOS_M = (100, 250, 500, 1000)   # Radio del hexágono (centro a vértice)
+
+# Agregados por celda: columna de salida -> (columna, función)
+AGREGADOS = {
+    'avisos': ('costo_total', 'size'),
+    'costo_total_mediana': ('costo_total', 'median'),
+    'distancia_m_subte_media': ('distancia_m_subte', 'mean'),
+}
+
+# Agregados por celda de los nodos de la calle (cubren también las zonas sin avisos)
+AGREGADOS_NODOS = {
+    'nodos': ('min_destino', 'size'),
+    'min_destino_mediana': ('min_destino', 'median'),
+}
+
+# id = tamaño << 40 | (q + OFFSET) << 20 | (r + OFFSET): entra en 53 bits (entero exacto en JSON)
+_BITS = 20
+_OFFSET = 1 << (_BITS - 1)
+_MASCARA = (1 << _BITS) - 1
+_SQRT3 = np.sqrt(3)
+
+# ================= GRILLA =================
+
+def axial(x, y, tamano):
+    """Celda (q, r) de cada punto: conversión a coordenadas cúbicas y redondeo."""
+    x = np.asarray(x, dtype=float) / tamano
+    y = np.asarray(y, dtype=float) / tamano
+    qf = _SQRT3 / 3 * x - y / 3
+    rf = 2 / 3 * y
+    sf = -qf - rf
+    q, r, s = np.round(qf), np.round(rf), np.round(sf)
+    # El componente con mayor error de redondeo se recalcula con los otros dos
+    dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+    ajustar_q = (dq > dr) & (dq > ds)
+    ajustar_r = ~ajustar_q & (dr > ds)
+    q = np.where(ajustar_q, -r - s, q)
+    r = np.where(ajustar_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+def pack(q, r, tamano):
+    return (np.int64(tamano) << 40) | ((np.asarray(q, dtype=np.int64) + _OFFSET) << _BITS) | (np.asarray(r, dtype=np.int64) + _OFFSET)
+
+def unpack(ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    return ids >> 40, ((ids >> _BITS) & _MASCARA) - _OFFSET, (ids & _MASCARA) - _OFFSET
+
+def cell_ids(x, y, tamano):
+    return pack(*axial(x, y, tamano), tamano)
+
+def centers(ids):
+    tamano, q, r = unpack(ids)
+    return tamano * _SQRT3 * (q + r / 2), tamano * 1.5 * r
+
+def polygons(ids):
+    """Hexágono de cada id (en la proyección métrica)."""
+    tamano, _, _ = unpack(ids)
+    cx, cy = centers(ids)
+    ang = np.deg2rad(30 + 60 * np.arange(7))
+    xs = cx[:, None] + tamano[:, None] * np.cos(ang)
+    ys = cy[:, None] + tamano[:, None] * np.sin(ang)
+    return shapely.polygons(np.stack([xs, ys], axis=-1))
+
+def disk(x, y, radio_m, tamano):
+    """Ids de las celdas que tocan el círculo (x, y, radio_m): anillos axiales alrededor del centro."""
+    q0, r0 = axial([x], [y], tamano)
+    k = int(np.ceil(radio_m / (tamano * 1.5))) + 1
+    dq, dr = np.meshgrid(np.arange(-k, k + 1), np.arange(-k, k + 1), indexing='ij')
+    dentro = np.abs(-dq - dr) <= k
+    ids = pack(q0[0] + dq[dentro], r0[0] + dr[dentro], tamano)
+    cx, cy = centers(ids)
+    # Una celda toca el círculo si su centro está a menos de radio + radio de la celda
+    return ids[np.hypot(cx - x, cy - y) <= radio_m + tamano]
+
+# ================= ÍNDICE =================
+
+def _xy(geoms, proyeccion=PROYECCION):
+    g = gpd.GeoSeries(geoms)
+    if g.crs is not None and g.crs.to_epsg() != proyeccion:
+        g = g.to_crs(epsg=proyeccion)
+    return shapely.get_coordinates(g.centroid.values).T
+
+def assign(gdf, tamanos=TAMANOS_M, proyeccion=PROYECCION):
+    """Columnas hex_<tamaño> con el id de celda de cada fila, para todas las resoluciones."""
+    x, y = _xy(gdf.geometry, proyeccion)
+    return pd.DataFrame({f'hex_{t}': cell_ids(x, y, t) for t in tamanos}, index=gdf.index)
+
+def node_cells(G, tamano):
+    """Id de celda de cada nodo de un grafo primal (nodos (x, y)), alineado con list(G.nodes)."""
+    xy = np.array([n[:2] for n in G.nodes], dtype=float)
+    return cell_ids(xy[:, 0], xy[:, 1], tamano)
+
+def aggregate(df, tamano, agregados=AGREGADOS, crs=f"EPSG:{PROYECCION}"):
+    """
+    Agregados por celda (df debe traer hex_<tamaño>). Retorna un GeoDataFrame
+    con un hexágono por celda ocupada.
+    """
+    col = f'hex_{tamano}'
+    aggs = {salida: (c, f) for salida, (c, f) in agregados.items() if c in df.columns}
+    datos = {c: pd.to_numeric(df[c], errors='coerce').astype(float) for c in {c for c, _ in aggs.values()}}
+    res = pd.DataFrame(datos).assign(**{col: df[col].to_numpy()}).groupby(col).agg(**aggs)
+    res = res.reset_index().rename(columns={col: 'hex'})
+    res['tamano_m'] = tamano
+    return gpd.GeoDataFrame(res, geometry=polygons(res['hex'].to_numpy()), crs=crs)
+
+def aggregate_all(df, tamanos=TAMANOS_M, agregados=AGREGADOS, crs=f"EPSG:{PROYECCION}"):
+    return pd.concat([aggregate(df, t, agregados, crs) for t in tamanos], ignore_index=True)
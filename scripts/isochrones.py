@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import networkx as nx
+import shapely
+from shapely.ops import substring
+from scipy.spatial import KDTree
+
+# ================= CONFIGURACIÓN =================
+
+VELOCIDAD_M_MIN = 80        # ~4.8 km/h caminando
+MINUTOS = [5, 10, 15]       # Umbrales de las isócronas
+BUFFER_M = 40               # Ancho del corredor alrededor de las calles alcanzadas
+
+# ================= HERRAMIENTAS =================
+
+def snap_poi_nodes(G, gdf_poi):
+    """
+    Asigna a cada POI el nodo más cercano del grafo (por centroide).
+    Retorna una lista de listas de nodos (un POI puede tener varios accesos).
+    """
+    nodos_coords = np.array(list(G.nodes))
+    tree = KDTree(nodos_coords)
+    centroides = gdf_poi.geometry.centroid
+    _, idx = tree.query(np.column_stack([centroides.x, centroides.y]))
+    return [[tuple(nodos_coords[i])] for i in idx]
+
+def _edge_arrays(G):
+    """
+    Arrays alineados con las aristas del grafo: extremos, coordenadas, largo y
+    geometría. 'fila' lleva cada nodo a su posición y 'i_u'/'i_v' son las
+    posiciones de los extremos, para leer distancias sin recorrer aristas en Python.
+    """
+    fila = {n: i for i, n in enumerate(G.nodes)}
+    us, vs, largos, geoms = [], [], [], []
+    for u, v, data in G.edges(data=True):
+        us.append(u)
+        vs.append(v)
+        largos.append(data['mm_len'])
+        geoms.append(data['geometry'])
+    return {
+        'u': us, 'v': vs, 'fila': fila,
+        'i_u': np.fromiter((fila[u] for u in us), dtype=np.int64, count=len(us)),
+        'i_v': np.fromiter((fila[v] for v in vs), dtype=np.int64, count=len(vs)),
+        'xy_u': np.array(us, dtype=float), 'xy_v': np.array(vs, dtype=float),
+        'largo': np.array(largos, dtype=float),
+        'geom': np.array(geoms, dtype=object),
+    }
+
+def _node_distances(dists, aristas):
+    """Distancia de cada nodo (por posición) desde el Dijkstra; inf si no se llegó."""
+    d = np.full(len(aristas['fila']), np.inf)
+    d[[aristas['fila'][n] for n in dists]] = list(dists.values())
+    return d
+
+def _reached_geometry(d_nodos, aristas, limite_m):
+    """
+    Polígono de las calles caminables dentro de 'limite_m'.
+    Aristas completas si su punto más lejano (donde se encuentran los caminos
+    desde cada extremo) está dentro del límite; las parciales se cortan en el
+    punto donde se agota la distancia restante. Así una arista larga (o una
+    cadena contraída) da la misma geometría que sus tramos por separado.
+    d_nodos: salida de _node_distances.
+    """
+    d_u = d_nodos[aristas['i_u']]
+    d_v = d_nodos[aristas['i_v']]
+
+    completas = (d_u + d_v + aristas['largo']) / 2 <= limite_m
+    partes = list(aristas['geom'][completas])
+
+    # Aristas parciales: avanzamos desde el extremo alcanzado
+    for d_ini, xy_ini in ((d_u, aristas['xy_u']), (d_v, aristas['xy_v'])):
+        mask = (d_ini <= limite_m) & ~completas
+        if not mask.any():
+            continue
+        g = aristas['geom'][mask]
+        origen = xy_ini[mask]
+        resto = np.clip((limite_m - d_ini[mask]) / aristas['largo'][mask], 0, 1)
+        # Si la geometría arranca en el otro extremo, invertimos la fracción
+        inicio = shapely.get_coordinates(shapely.get_point(g, 0))
+        invertida = ~np.isclose(inicio, origen).all(axis=1)
+        frac = np.where(invertida, 1 - resto, resto)
+        corte = shapely.get_coordinates(shapely.line_interpolate_point(g, frac, normalized=True))
+        # Tramos rectos: alcanza la cuerda; con vértices (cadenas contraídas) se sigue la geometría
+        curvas = shapely.get_num_coordinates(g) > 2
+        partes.extend(shapely.linestrings(np.stack([origen[~curvas], corte[~curvas]], axis=1)))
+        partes.extend(substring(gi, f, 1, normalized=True) if inv else substring(gi, 0, f, normalized=True)
+                      for gi, f, inv in zip(g[curvas], frac[curvas], invertida[curvas]))
+
+    if not partes:
+        return None
+    return shapely.union_all(shapely.buffer(np.array(partes, dtype=object), BUFFER_M))
+
+# ================= GENERADOR =================
+
+def build_isochrones(G, capas, nodos_por_capa=None, minutos=MINUTOS, crs=None):
+    """
+    Calcula isócronas a pie alrededor de cada POI.
+
+    capas: { etiqueta: GeoDataFrame } en la misma proyección métrica que G.
+    nodos_por_capa: { etiqueta: [[nodo, ...], ...] } opcional; si falta se
+        usa el nodo más cercano al centroide de cada POI.
+
+    Retorna un GeoDataFrame con columnas capa, poi_idx, minutos, geometry.
+    """
+    aristas = _edge_arrays(G)
+    limites = {m: m * VELOCIDAD_M_MIN for m in minutos}
+    cutoff = max(limites.values())
+
+    registros = []
+    for etiqueta, gdf_poi in capas.items():
+        print(f"⏱️ Isócronas para {etiqueta} ({len(gdf_poi)} POIs)...")
+        if nodos_por_capa and etiqueta in nodos_por_capa:
+            nodos_poi = nodos_por_capa[etiqueta]
+        else:
+            nodos_poi = snap_poi_nodes(G, gdf_poi)
+
+        for poi_idx, fuentes in zip(gdf_poi.index, nodos_poi):
+            dists = nx.multi_source_dijkstra_path_length(G, set(fuentes), cutoff=cutoff, weight='mm_len')
+            # Solo se recorren los nodos alcanzados, una vez por POI (no por umbral)
+            d_nodos = _node_distances(dists, aristas)
+            for m, limite in limites.items():
+                geom = _reached_geometry(d_nodos, aristas, limite)
+                if geom is not None:
+                    registros.append({'capa': etiqueta, 'poi_idx': poi_idx, 'minutos': m, 'geometry': geom})
+
+    isocronas = gpd.GeoDataFrame(registros, geometry='geometry', crs=crs)
+    # Forzamos la construcción del índice espacial (STRtree) una sola vez
+    isocronas.sindex
+    return isocronas
+
+# ================= CONSULTAS =================
+
+def classify_listings(puntos, isocronas, minutos_conteo=10):
+    """
+    Clasificación vectorizada punto-en-polígono.
+    Para cada capa devuelve:
+      - min_a_pie_{capa}: menor umbral (minutos) que contiene al listado
+      - cant_{minutos_conteo}min_{capa}: POIs distintos dentro de ese umbral
+    """
+    puntos = puntos.to_crs(isocronas.crs)
+    idx_pts, idx_iso = isocronas.sindex.query(puntos.geometry, predicate='within')
+
+    pares = pd.DataFrame({
+        'fila': idx_pts,
+        'capa': isocronas['capa'].values[idx_iso],
+        'poi_idx': isocronas['poi_idx'].values[idx_iso],
+        'minutos': isocronas['minutos'].values[idx_iso],
+    })
+
+    resultado = pd.DataFrame(index=pd.RangeIndex(len(puntos)))
+    for capa in isocronas['capa'].unique():
+        sub = pares[pares['capa'] == capa]
+        resultado[f'min_a_pie_{capa}'] = sub.groupby('fila')['minutos'].min().astype('Int64')
+        cerca = sub[sub['minutos'] <= minutos_conteo].groupby('fila')['poi_idx'].nunique()
+        resultado[f'cant_{minutos_conteo}min_{capa}'] = cerca.reindex(resultado.index, fill_value=0).astype(int)
+
+    resultado.index = puntos.index
+    return resultado
+
+def dissolve_isochrones(isocronas):
+    """Une las isócronas por (capa, minutos) para dibujarlas como capa del mapa."""
+    return isocronas.dissolve(by=['capa', 'minutos'], as_index=False)[['capa', 'minutos', 'geometry']]
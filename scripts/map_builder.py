@@ -0,0 +1,114 @@
+import json
+import pandas as pd
+import shapely
+import folium
+from folium import plugins
+
+# ================= CONFIGURACIÓN =================
+
+PRESUPUESTO_BYTES = 4_000_000   # GeoJSON total embebido en el HTML
+PROYECCION_M = 22185            # Para simplificar en metros
+UMBRAL_CLUSTER = 3000           # Capas de puntos más grandes se agrupan en el cliente
+
+# Niveles de compactación, del más fiel al más agresivo: (tolerancia_m, decimales)
+# 5 decimales ~ 1 m, 4 decimales ~ 11 m en Buenos Aires
+NIVELES = [(0, 6), (2, 5), (5, 5), (10, 4), (25, 4), (50, 3)]
+
+# ================= COMPACTACIÓN =================
+
+def compact_geojson(gdf, campos, tolerancia_m=0, decimales=5):
+    """
+    GeoJSON reducido de una capa: solo las columnas de 'campos', geometría
+    simplificada (en metros) y coordenadas redondeadas a 'decimales'.
+    """
+    campos = [c for c in dict.fromkeys(campos) if c in gdf.columns]
+    df = gdf.loc[:, ~gdf.columns.duplicated()][campos + [gdf.geometry.name]].copy()
+
+    if tolerancia_m:
+        df = df.to_crs(epsg=PROYECCION_M)
+        df.geometry = df.geometry.simplify(tolerancia_m, preserve_topology=True)
+    df = df.to_crs(epsg=4326)
+    df.geometry = shapely.set_precision(df.geometry.values, 10 ** -decimales)
+
+    for col in campos:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+        elif pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            # Los enteros con nulos (Int64) no se serializan: pasamos a float
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+
+    return df.to_json(drop_id=True, separators=(',', ':'))
+
+class PayloadBudget:
+    """
+    Reparte el presupuesto de bytes entre capas: cada capa se compacta con
+    el primer nivel de NIVELES que entra en su cuota.
+    """
+    def __init__(self, total=PRESUPUESTO_BYTES):
+        self.total = total
+        self.usado = {}
+
+    def fit(self, nombre, gdf, campos, cuota):
+        limite = int(self.total * cuota)
+        for tolerancia_m, decimales in NIVELES:
+            geojson = compact_geojson(gdf, campos, tolerancia_m, decimales)
+            if len(geojson) <= limite:
+                break
+        self.usado[nombre] = len(geojson)
+        return geojson
+
+    def report(self):
+        total_usado = sum(self.usado.values())
+        for nombre, n in sorted(self.usado.items(), key=lambda kv: -kv[1]):
+            print(f"   🗺️ {nombre}: {n / 1e6:.2f} MB")
+        print(f"   📦 Total: {total_usado / 1e6:.2f} MB de {self.total / 1e6:.2f} MB")
+        if total_usado > self.total:
+            print("   ⚠️ Presupuesto excedido: reducir campos o cuotas.")
+        return total_usado
+
+# ================= CAPAS =================
+
+def new_map(location=(-34.6037, -58.3816), zoom_start=12):
+    """Mapa base con renderer canvas: miles de círculos sin un nodo SVG por punto."""
+    return folium.Map(location=list(location), zoom_start=zoom_start, tiles='OpenStreetMap', prefer_canvas=True)
+
+def circle_layer(geojson, nombre, color_campo, radio=5, tooltip_campos=None, aliases=None, **estilo):
+    """
+    Capa de puntos a partir de un GeoJSON compacto. Hasta UMBRAL_CLUSTER
+    puntos usa un único GeoJson con CircleMarker (sin bucles en Python);
+    por encima, FastMarkerCluster agrupa en el navegador.
+    """
+    features = json.loads(geojson)['features']
+
+    if len(features) > UMBRAL_CLUSTER:
+        campos = tooltip_campos or []
+        data = [
+            [f['geometry']['coordinates'][1], f['geometry']['coordinates'][0],
+             f['properties'].get(color_campo) or 'gray'] +
+            [f['properties'].get(c) for c in campos]
+            for f in features
+        ]
+        etiquetas = json.dumps(aliases or campos)
+        callback = f"""
+        function (row) {{
+            var labels = {etiquetas};
+            var html = labels.map(function (l, i) {{ return '<b>' + l + '</b> ' + row[i + 3]; }}).join('<br>');
+            var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {{
+                radius: {radio}, fillColor: row[2], fill: true, fillOpacity: 0.8, color: 'white', weight: 0.5
+            }});
+            if (labels.length) marker.bindTooltip(html);
+            return marker;
+        }};"""
+        return plugins.FastMarkerCluster(data, callback=callback, name=nombre)
+
+    marker_estilo = {'fill': True, 'fill_opacity': 0.8, 'color': 'white', 'weight': 0.5}
+    marker_estilo.update(estilo)
+    tooltip = None
+    if tooltip_campos:
+        tooltip = folium.GeoJsonTooltip(fields=tooltip_campos, aliases=aliases or tooltip_campos)
+    return folium.GeoJson(
+        geojson, name=nombre,
+        marker=folium.CircleMarker(radius=radio, **marker_estilo),
+        style_function=lambda x: {'fillColor': x['properties'].get(color_campo) or 'gray'},
+        tooltip=tooltip
+    )
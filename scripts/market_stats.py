@@ -0,0 +1,251 @@
+import os
+import re
+import sys
+import json
+import glob
+import math
+import hashlib
+import numpy as np
+import pandas as pd
+
+import schema
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Estadísticas del mercado por Barrio / Tipo / Ambientes / mes sin releer el
+# historial: cada grupo guarda un sketch de cuantiles (buckets logarítmicos,
+# estilo DDSketch) que se actualiza con los CSV nuevos y se persiste en JSON.
+# La memoria queda acotada por grupos x buckets, no por días de historia.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+STATS_PATH = os.path.join(BASE_DATA_DIR, 'market_stats.json')
+PORTALES = ('zonaprop', 'argenprop', 'cabaprop')
+
+ALPHA = 0.01          # Error relativo de los cuantiles (1%)
+MAX_BUCKETS = 512     # Tope por sketch: se colapsan los buckets más bajos
+METRICAS = ('costo_total', 'precio_m2', 'Precio')
+AMBIENTES_MAX = 4     # 4 o más ambientes van juntos ('4+')
+MESES_VISTOS = 2      # Meses con registro de avisos ya contados (el resto está cerrado)
+
+# ================= SKETCH =================
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles con error relativo ALPHA para valores positivos: cada
+    valor cae en el bucket ceil(log_gamma(x)). Dos sketches con el mismo
+    ALPHA se combinan sumando buckets (agregar barrios o meses es exacto).
+    """
+    def __init__(self, alpha=ALPHA, max_buckets=MAX_BUCKETS):
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.ceros = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, valores):
+        x = np.asarray(valores, dtype=float)
+        x = x[~np.isnan(x) & (x >= 0)]
+        if not len(x): return
+        self.count += len(x)
+        self.total += float(x.sum())
+        positivos = x[x > 0]
+        self.ceros += len(x) - len(positivos)
+        idx, n = np.unique(np.ceil(np.log(positivos) / self._log_gamma).astype(np.int64), return_counts=True)
+        for i, c in zip(idx.tolist(), n.tolist()):
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self._colapsar()
+
+    def merge(self, otro):
+        if otro.alpha != self.alpha:
+            raise ValueError("Solo se combinan sketches con el mismo alpha")
+        for i, c in otro.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self.ceros += otro.ceros
+        self.count += otro.count
+        self.total += otro.total
+        self._colapsar()
+        return self
+
+    def _colapsar(self):
+        # Los precios bajos pierden resolución primero: la cola alta es la que interesa
+        if len(self.buckets) <= self.max_buckets: return
+        orden = sorted(self.buckets)
+        sobran = orden[:len(orden) - self.max_buckets + 1]
+        destino = orden[len(sobran)]
+        self.buckets[destino] += sum(self.buckets.pop(i) for i in sobran)
+
+    def quantile(self, q):
+        if not self.count: return np.nan
+        rango = q * (self.count - 1)
+        if rango < self.ceros: return 0.0
+        acumulado = self.ceros
+        for i in sorted(self.buckets):
+            acumulado += self.buckets[i]
+            if acumulado > rango:
+                # Punto medio del bucket (gamma^(i-1), gamma^i]: error relativo <= alpha
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def to_dict(self):
+        return {'b': {str(i): c for i, c in self.buckets.items()}, 'z': self.ceros, 'n': self.count, 't': self.total}
+
+    @classmethod
+    def from_dict(cls, d, alpha=ALPHA, max_buckets=MAX_BUCKETS):
+        s = cls(alpha, max_buckets)
+        s.buckets = {int(i): c for i, c in d['b'].items()}
+        s.ceros, s.count, s.total = d['z'], d['n'], d['t']
+        return s
+
+# ================= AGREGADOS =================
+
+def _ambientes(serie):
+    amb = pd.to_numeric(serie, errors='coerce')
+    return amb.clip(upper=AMBIENTES_MAX).astype('Int64').astype('string').replace(str(AMBIENTES_MAX), f"{AMBIENTES_MAX}+").fillna('?')
+
+def _url_hash(urls):
+    return [hashlib.sha1(u.encode('utf-8')).hexdigest()[:16] for u in urls]
+
+def market_frame(df):
+    """Columnas de agrupación y métricas a partir de un CSV diario normalizado."""
+    precio = pd.to_numeric(df['Precio'], errors='coerce').astype(float)
+    expensas = pd.to_numeric(df['Expensas'], errors='coerce').astype(float) if 'Expensas' in df.columns else 0.0
+    metros = pd.to_numeric(df['Metros_Cubiertos'], errors='coerce').astype(float) if 'Metros_Cubiertos' in df.columns else np.nan
+    costo = precio + (expensas.fillna(0) if isinstance(expensas, pd.Series) else expensas)
+    return pd.DataFrame({
+        # Etiquetas combinadas del planificador ("palermo|belgrano") no son un barrio:
+        # el aviso cuenta en los totales pero no inventa un barrio en los agrupados
+        'Barrio': df['Barrio'].astype('string').str.lower().mask(lambda b: b.str.contains('|', regex=False)).fillna('?'),
+        'Tipo': df['Tipo'].astype('string').fillna('?'),
+        'Ambientes': _ambientes(df['Ambientes']) if 'Ambientes' in df.columns else '?',
+        'URL': df['URL'].astype('string') if 'URL' in df.columns else pd.NA,
+        'costo_total': costo,
+        'precio_m2': np.where(metros > 0, precio / metros, np.nan),
+        'Precio': precio,
+    })
+
+class MarketStats:
+    """
+    Sketches por (Barrio, Tipo, Ambientes, mes) y métrica. Un aviso se cuenta
+    una vez por mes aunque aparezca en todos los CSV diarios; cada archivo se
+    ingiere una sola vez.
+    """
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.grupos = {}       # (barrio, tipo, ambientes, mes) -> {métrica: QuantileSketch}
+        self.ingeridos = set()  # nombres de CSV ya sumados
+        self.vistos = {}       # mes -> set(hash de URL)
+
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        stats = cls(path)
+        if not os.path.exists(path):
+            return stats
+        with open(path, encoding='utf-8') as f:
+            estado = json.load(f)
+        for g in estado['grupos']:
+            clave = tuple(g['clave'])
+            if '|' in clave[0]:
+                # Guardado antes de descartar las etiquetas combinadas: pasa a '?'
+                clave = ('?', *clave[1:])
+            # Siempre se suma al grupo existente: el legado y el '?' real pueden venir en cualquier orden
+            grupo = stats.grupos.setdefault(clave, {})
+            for m, d in g['sketches'].items():
+                sk = QuantileSketch.from_dict(d)
+                grupo.setdefault(m, QuantileSketch(sk.alpha, sk.max_buckets)).merge(sk)
+        stats.ingeridos = set(estado['ingeridos'])
+        stats.vistos = {mes: set(h) for mes, h in estado['vistos'].items()}
+        return stats
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        estado = {
+            'alpha': ALPHA,
+            'grupos': [{'clave': list(k), 'sketches': {m: s.to_dict() for m, s in sk.items()}} for k, sk in self.grupos.items()],
+            'ingeridos': sorted(self.ingeridos),
+            'vistos': {mes: sorted(h) for mes, h in self.vistos.items()},
+        }
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    def update(self, df, fecha):
+        """Suma los avisos de un CSV del día 'fecha' (YYYY-MM-DD) no contados en su mes. Retorna cuántos."""
+        mes = fecha[:7]
+        mf = market_frame(df)
+        if mf['URL'].notna().any():
+            mf = mf.drop_duplicates('URL')
+            vistos = self.vistos.setdefault(mes, set())
+            hashes = pd.Series(_url_hash(mf['URL'].fillna('')), index=mf.index)
+            nuevos = ~hashes.isin(vistos) | mf['URL'].isna()
+            vistos.update(hashes[nuevos & mf['URL'].notna()])
+            mf = mf[nuevos]
+        for clave, g in mf.groupby(['Barrio', 'Tipo', 'Ambientes'], sort=False):
+            sketches = self.grupos.setdefault((*clave, mes), {m: QuantileSketch() for m in METRICAS})
+            for m in METRICAS:
+                sketches[m].add(g[m].to_numpy(dtype=float))
+        # Los meses viejos ya no reciben archivos: su registro de URLs se descarta
+        for viejo in sorted(self.vistos)[:-MESES_VISTOS]:
+            del self.vistos[viejo]
+        telemetry.incr('mercado_avisos', len(mf))
+        return len(mf)
+
+    def ingest(self, base_dir=BASE_DATA_DIR, portales=PORTALES):
+        """Ingiere los CSV diarios todavía no sumados, en orden de fecha. Retorna la cantidad."""
+        pendientes = []
+        for portal in portales:
+            for path in glob.glob(os.path.join(base_dir, portal, f"{portal}_*.csv")):
+                nombre = os.path.basename(path)
+                m = re.search(r'(\d{4}-\d{2}-\d{2})', nombre)
+                if m and nombre not in self.ingeridos:
+                    pendientes.append((m.group(1), nombre, path))
+        for fecha, nombre, path in sorted(pendientes):
+            with telemetry.timer('mercado_ingesta_ms'):
+                n = self.update(schema.read_csv(path), fecha)
+            self.ingeridos.add(nombre)
+            print(f"   📈 {nombre}: {n} avisos nuevos en {fecha[:7]}")
+        return len(pendientes)
+
+    def summary(self, por=('Barrio', 'Tipo'), metrica='costo_total', desde=None, hasta=None, cuantiles=(0.25, 0.5, 0.75), **filtros):
+        """
+        Tabla de cuantiles de 'metrica' agrupada por 'por' (subconjunto de
+        Barrio, Tipo, Ambientes, mes). desde/hasta filtran meses 'YYYY-MM';
+        filtros fijan valores, ej. Tipo='PH', Ambientes='2'.
+        """
+        campos = ('Barrio', 'Tipo', 'Ambientes', 'mes')
+        por = [por] if isinstance(por, str) else list(por)
+        fusion = {}
+        for clave, sketches in self.grupos.items():
+            fila = dict(zip(campos, clave))
+            if desde and fila['mes'] < desde: continue
+            if hasta and fila['mes'] > hasta: continue
+            if any(fila[c] != str(v) for c, v in filtros.items()): continue
+            k = tuple(fila[c] for c in por)
+            if k in fusion:
+                fusion[k].merge(sketches[metrica])
+            else:
+                fusion[k] = QuantileSketch().merge(sketches[metrica])
+        filas = [
+            {**dict(zip(por, k)), 'avisos': s.count, 'media': s.mean(),
+             **{f"p{int(q * 100)}": s.quantile(q) for q in cuantiles}}
+            for k, s in fusion.items()
+        ]
+        res = pd.DataFrame(filas, columns=[*por, 'avisos', 'media', *[f"p{int(q * 100)}" for q in cuantiles]])
+        return res.sort_values(por).reset_index(drop=True)
+
+if __name__ == "__main__":
+    # Uso: python market_stats.py [métrica] [agrupación...]  ej. market_stats.py precio_m2 Barrio mes
+    metrica = sys.argv[1] if len(sys.argv) > 1 else 'costo_total'
+    por = sys.argv[2:] or ['Barrio', 'Tipo']
+    stats = MarketStats.load()
+    if stats.ingest():
+        stats.save()
+    with pd.option_context('display.max_rows', 200, 'display.width', 200, 'display.float_format', '{:,.0f}'.format):
+        print(stats.summary(por, metrica))
@@ -0,0 +1,146 @@
+import numpy as np
+import geopandas as gpd
+import networkx as nx
+import shapely
+import momepy
+from scipy.spatial import KDTree
+
+from snapping import snap_points_to_edges
+from isochrones import VELOCIDAD_M_MIN
+from contraction import resolve
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Grafo combinado a pie + subte, con peso 'minutos'. Es dirigido: la espera
+# del tren se paga al subir (calle -> andén), no al bajar. Un solo Dijkstra
+# sobre el grafo invertido desde el destino da el tiempo puerta a puerta de
+# todos los avisos.
+
+# Destino por defecto (lon, lat): el Obelisco; reemplazar por la oficina
+DESTINO_LONLAT = (-58.3816, -34.6037)
+
+# Velocidad comercial por línea (km/h, con paradas) y espera media al subir (min, ~media frecuencia)
+VELOCIDAD_LINEA_KMH = {'A': 24, 'B': 30, 'C': 26, 'D': 28, 'E': 24, 'H': 28}
+ESPERA_MIN = {'A': 2.0, 'B': 1.5, 'C': 1.5, 'D': 1.5, 'E': 2.5, 'H': 2.5}
+VELOCIDAD_DEFECTO_KMH = 25
+ESPERA_DEFECTO_MIN = 3.0
+
+ACCESO_MIN = 1.0            # Escaleras / molinetes, al entrar y al salir
+TRANSBORDO_MIN = 2.0        # Pasillos de combinación, además de la caminata y la espera
+TRANSBORDO_RADIO_M = 250    # Estaciones de distinta línea a menos de esto combinan
+MAX_DIST_ESTACION_M = 150   # Estaciones más lejos de su línea se descartan
+GAP_LINEA_M = 60            # Cortes del trazado más chicos que esto se unen
+
+PESO = 'minutos'
+
+# ================= GRAFO =================
+
+def _linea(valor):
+    return str(valor).replace('LINEA ', '').strip()
+
+def _anden(linea, nodo):
+    # Los nodos de la calle son (x, y); los de vía llevan la línea adelante
+    return (linea, *nodo)
+
+def _red_linea(geoms):
+    """Red de vía de una línea (ramales incluidos), con los cortes chicos del trazado unidos."""
+    partes = shapely.get_parts(shapely.line_merge(shapely.union_all(np.asarray(geoms, dtype=object))))
+    R = momepy.gdf_to_nx(gpd.GeoDataFrame(geometry=partes), approach='primal')
+    extremos = [n for n, g in R.degree() if g == 1]
+    if len(extremos) > 1:
+        comp = {n: i for i, c in enumerate(nx.connected_components(R)) for n in c}
+        tree = KDTree(np.array(extremos))
+        for a, b in tree.query_pairs(GAP_LINEA_M):
+            u, v = extremos[a], extremos[b]
+            if comp[u] != comp[v]:
+                geom = shapely.LineString([u, v])
+                R.add_edge(u, v, geometry=geom, mm_len=geom.length)
+    return R
+
+def _agregar(M, u, v, minutos):
+    if not M.has_edge(u, v) or M[u][v][PESO] > minutos:
+        M.add_edge(u, v, **{PESO: minutos})
+
+def build_multimodal(G, lineas, estaciones, velocidades=VELOCIDAD_LINEA_KMH, esperas=ESPERA_MIN,
+                     acceso_min=ACCESO_MIN, transbordo_min=TRANSBORDO_MIN, velocidad_pie=VELOCIDAD_M_MIN):
+    """
+    G: grafo primal de calles (momepy, peso 'mm_len'). Se le agregan in place
+    los nodos de acceso de las estaciones.
+    lineas: GeoDataFrame con LINEASUB; estaciones: GeoDataFrame con estacion y
+    linea; ambos en la proyección métrica de G.
+    Retorna un DiGraph con peso 'minutos'. Los avisos y el destino se
+    proyectan sobre G antes: un nodo agregado después no está en el grafo.
+    """
+    cod_lineas = lineas['LINEASUB'].map(_linea)
+    cod_estaciones = estaciones['linea'].map(_linea).to_numpy()
+    puntos = estaciones.geometry.to_numpy()
+    # Antes de copiar las calles: los accesos parten aristas de G
+    accesos, _ = snap_points_to_edges(G, puntos)
+
+    M = nx.DiGraph()
+    for u, v, d in G.edges(data=True):
+        minutos = d['mm_len'] / velocidad_pie
+        _agregar(M, u, v, minutos)
+        _agregar(M, v, u, minutos)
+
+    andenes = [None] * len(estaciones)
+    for linea, geoms in lineas.geometry.groupby(cod_lineas):
+        R = _red_linea(geoms.to_numpy())
+        m_min = velocidades.get(linea, VELOCIDAD_DEFECTO_KMH) * 1000 / 60
+        idx = np.flatnonzero(cod_estaciones == linea)
+        if len(idx):
+            nodos, dist = snap_points_to_edges(R, puntos[idx])
+            for i, nodo, d in zip(idx, nodos, dist):
+                if d <= MAX_DIST_ESTACION_M:
+                    andenes[i] = _anden(linea, nodo)
+                else:
+                    telemetry.event('estacion_sin_linea', estacion=estaciones['estacion'].iloc[i], linea=linea, dist_m=round(d))
+        for u, v, d in R.edges(data=True):
+            minutos = d['mm_len'] / m_min
+            _agregar(M, _anden(linea, u), _anden(linea, v), minutos)
+            _agregar(M, _anden(linea, v), _anden(linea, u), minutos)
+
+    # Subir paga acceso + espera; bajar solo el acceso
+    for i, (anden, calle) in enumerate(zip(andenes, accesos)):
+        if anden is None: continue
+        _agregar(M, calle, anden, acceso_min + esperas.get(cod_estaciones[i], ESPERA_DEFECTO_MIN))
+        _agregar(M, anden, calle, acceso_min)
+
+    # Combinaciones: pasillo + caminata + espera de la línea a la que se sube
+    con_anden = [i for i, a in enumerate(andenes) if a is not None]
+    xy = shapely.get_coordinates(puntos[con_anden])
+    for a, b in KDTree(xy).query_pairs(TRANSBORDO_RADIO_M):
+        i, j = con_anden[a], con_anden[b]
+        if cod_estaciones[i] == cod_estaciones[j]: continue
+        caminata = transbordo_min + np.hypot(*(xy[a] - xy[b])) / velocidad_pie
+        _agregar(M, andenes[i], andenes[j], caminata + esperas.get(cod_estaciones[j], ESPERA_DEFECTO_MIN))
+        _agregar(M, andenes[j], andenes[i], caminata + esperas.get(cod_estaciones[i], ESPERA_DEFECTO_MIN))
+
+    telemetry.event('grafo_multimodal', nodos=M.number_of_nodes(), aristas=M.number_of_edges(),
+                    estaciones=len(con_anden), descartadas=len(andenes) - len(con_anden))
+    return M
+
+# ================= TIEMPOS =================
+
+def solo_a_pie(M):
+    """Vista del grafo sin subte (para comparar)."""
+    return nx.subgraph_view(M, filter_node=lambda n: len(n) == 2)
+
+def travel_times(M, origenes, destino, limite_min=None, cadenas=None, velocidad_pie=VELOCIDAD_M_MIN):
+    """
+    Minutos de cada nodo de 'origenes' hasta 'destino' con un único Dijkstra
+    desde el destino sobre el grafo invertido. NaN si no se llega.
+    Con calles contraídas (contraction.py) los orígenes contraídos se
+    resuelven caminando hasta los extremos de su cadena.
+    """
+    with telemetry.timer('multimodal_dijkstra_ms'):
+        dist = nx.single_source_dijkstra_path_length(M.reverse(copy=False), destino, cutoff=limite_min, weight=PESO)
+    minutos = resolve(dist, cadenas or {}, origenes, escala=1 / velocidad_pie)
+    if limite_min is not None:
+        minutos[minutos > limite_min] = np.nan
+    return minutos
+
+def door_to_door(M, nodos_org, dist_snap_org, nodo_destino, dist_snap_destino=0.0, limite_min=None, velocidad_pie=VELOCIDAD_M_MIN, cadenas=None):
+    """Tiempo puerta a puerta: red + tramos a pie entre cada punto y su calle."""
+    minutos = travel_times(M, nodos_org, nodo_destino, limite_min, cadenas, velocidad_pie)
+    return minutos + (np.asarray(dist_snap_org, dtype=float) + dist_snap_destino) / velocidad_pie
@@ -0,0 +1,169 @@
+import os
+import re
+import glob
+import numpy as np
+import pandas as pd
+import schema
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Los parsers guardan el texto crudo de cada campo como '<Campo>_raw'; acá se
+# convierte a valores en una pasada columnar. Cambiar una regla (ej. la
+# imputación de ambientes) y re-normalizar la historia no requiere HTML.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+
+RAW = '_raw'
+CAMPOS_NUMERICOS = [
+    'Precio', 'Expensas', 'Metros_Totales', 'Metros_Cubiertos', 'Ambientes',
+    'Dormitorios', 'Baños', 'Cocheras', 'Antiguedad', 'Visitas_Count',
+]
+
+# Campos de texto donde se busca la cantidad de ambientes cuando falta, por portal
+IMPUTAR_AMBIENTES = {
+    'argenprop': ['Titulo', 'Descripcion_Breve'],
+    'cabaprop': ['Titulo'],
+}
+
+PRECIO_MIN, PRECIO_MAX = 10000, 999999
+
+# Columnas del CSV diario: todas las que puede dar algún parser más las que
+# agrega normalize. Fija para que todos los bloques de save_data escriban el
+# mismo encabezado, aunque un campo aparezca recién en el bloque 2.
+EXTRA_COLUMNS = [
+    'Bajo_Precio', 'Porcentaje_Rebaja', 'Etiqueta_Destacado',
+    'Descripcion_Breve', 'Visto_Estado', 'Fecha_Publicacion', 'Inmobiliaria',
+    'Moneda',
+]
+CSV_COLUMNS = schema.CORE_COLUMNS + sorted(
+    set(EXTRA_COLUMNS + CAMPOS_NUMERICOS + [c + RAW for c in CAMPOS_NUMERICOS]) - set(schema.CORE_COLUMNS)
+)
+
+# Regex precompiladas (una sola compilación para toda la columna)
+USD_RE = re.compile(r'USD|U\$S|DOLARES|US\$', re.IGNORECASE)
+ESTRENAR_RE = re.compile(r'estrenar', re.IGNORECASE)
+NO_DIGITO_RE = re.compile(r'\D+')
+ESPACIOS_RE = re.compile(r'\s+')
+AMB_NUM_RE = re.compile(r'(\d+)\s*amb', re.IGNORECASE)
+AMB_PALABRA_RE = re.compile(r'(dos|tres|cuatro) amb', re.IGNORECASE)
+AMB_PALABRAS = {'dos': 2, 'tres': 3, 'cuatro': 4}
+
+# ================= REGLAS (vectorizadas) =================
+
+def clean_text(serie):
+    """Equivalente columnar de parsers.clean_text."""
+    s = serie.astype('string').str.replace('\r', '', regex=False)
+    return s.str.replace(ESPACIOS_RE, ' ', regex=True).str.strip()
+
+def force_int(serie):
+    """
+    Dígitos del texto como entero ("$ 450.000" -> 450000). "A estrenar"
+    vale 0 (antigüedad). Sin dígitos -> nulo.
+    """
+    s = serie.astype('string')
+    digitos = s.str.replace(NO_DIGITO_RE, '', regex=True).replace('', pd.NA)
+    digitos = digitos.mask(s.str.contains(ESTRENAR_RE, na=False), '0')
+    return pd.to_numeric(digitos, errors='coerce')
+
+def is_usd(serie):
+    return serie.astype('string').str.contains(USD_RE, na=False).astype(bool)
+
+def ambientes_from_text(serie):
+    """'2 amb', '3 ambientes' o 'dos/tres/cuatro ambientes' -> número (nulo si no aparece)."""
+    s = serie.astype('string')
+    numero = pd.to_numeric(s.str.extract(AMB_NUM_RE, expand=False), errors='coerce')
+    palabra = s.str.extract(AMB_PALABRA_RE, expand=False).str.lower().map(AMB_PALABRAS)
+    return numero.fillna(pd.to_numeric(palabra, errors='coerce'))
+
+# ================= NORMALIZACIÓN =================
+
+def normalize(df):
+    """
+    Recalcula los campos numéricos desde sus columnas '_raw' (las filas sin
+    texto crudo conservan su valor), marca la moneda e imputa ambientes.
+    Devuelve el frame con el esquema compartido aplicado.
+    """
+    df = df.copy()
+
+    textos = {campo: df[campo + RAW] for campo in CAMPOS_NUMERICOS if campo + RAW in df.columns}
+    if 'Precio' in textos:
+        crudo = textos['Precio'].astype('string')
+        df['Moneda'] = pd.Series(np.where(is_usd(crudo), 'USD', 'ARS'), index=df.index).where(crudo.notna())
+        # Argenprop muestra "precio + expensas" en el mismo texto
+        textos['Precio'] = crudo.str.split('+', n=1).str[0]
+
+    for campo, texto in textos.items():
+        valores = force_int(texto)
+        if campo in df.columns:
+            # Filas sin texto crudo (ej. historia previa) conservan su valor
+            valores = valores.where(texto.notna(), pd.to_numeric(df[campo], errors='coerce'))
+        df[campo] = valores
+
+    # Imputación de ambientes desde el texto libre
+    if 'Portal' in df.columns:
+        amb = pd.to_numeric(df['Ambientes'], errors='coerce') if 'Ambientes' in df.columns else pd.Series(np.nan, index=df.index)
+        for portal, campos in IMPUTAR_AMBIENTES.items():
+            faltan = amb.isna() & (df['Portal'].astype('string') == portal).fillna(False)
+            if not faltan.any(): continue
+            texto = pd.Series('', index=df.index, dtype='string')
+            for c in campos:
+                if c in df.columns:
+                    texto = texto + ' ' + df[c].astype('string').fillna('')
+            amb = amb.where(~faltan, ambientes_from_text(texto[faltan]).reindex(df.index))
+        df['Ambientes'] = amb
+
+    return schema.apply_schema(df)
+
+# ================= FILTROS =================
+
+def mask_excluded(df, terminos):
+    """
+    True para los avisos a descartar: algún término de exclusión en título,
+    descripción o ambientes (también con los espacios quitados, para palabras
+    pegadas) o exactamente 1 ambiente.
+    """
+    texto = pd.Series('', index=df.index, dtype='string')
+    for c in ('Titulo', 'Descripcion_Breve', 'Ambientes'):
+        parte = df[c].astype('string').fillna('') if c in df.columns else ''
+        texto = texto + parte + ' '
+    texto = texto.str.lower()
+    pegado = texto.str.replace(' ', '', regex=False)
+
+    terminos = [t.lower() for t in terminos]
+    con_espacios = re.compile('|'.join(re.escape(t) for t in terminos))
+    sin_espacios = re.compile('|'.join(re.escape(t.replace(' ', '')) for t in terminos))
+    excluido = texto.str.contains(con_espacios, na=False) | pegado.str.contains(sin_espacios, na=False)
+
+    if 'Ambientes' in df.columns:
+        excluido |= (pd.to_numeric(df['Ambientes'], errors='coerce') == 1).fillna(False)
+    return excluido.astype(bool)
+
+def mask_valid_price(df, minimo=PRECIO_MIN, maximo=PRECIO_MAX):
+    if 'Precio' not in df.columns:
+        return pd.Series(False, index=df.index)
+    precio = pd.to_numeric(df['Precio'], errors='coerce')
+    validos = precio.between(minimo, maximo).fillna(False)
+    if 'Moneda' in df.columns:
+        validos &= (df['Moneda'] != 'USD')
+    return validos.astype(bool)
+
+# ================= HISTORIA =================
+
+def renormalize_history(portales=schema.PORTALES, base_dir=BASE_DATA_DIR):
+    """
+    Re-aplica las reglas actuales a todos los CSV guardados (solo columnas,
+    sin HTML). Los CSV anteriores a las columnas '_raw' quedan como estaban.
+    """
+    for portal in portales:
+        for path in sorted(glob.glob(os.path.join(base_dir, portal, f"{portal}_*.csv"))):
+            df = schema.read_csv(path)
+            if not any(c.endswith(RAW) for c in df.columns):
+                continue
+            with telemetry.timer('renormalizar_ms', portal=portal):
+                df = normalize(df)
+            schema.write_csv(df, path)
+            print(f"   🔁 {os.path.relpath(path, base_dir)} ({len(df)} regs)")
+
+if __name__ == "__main__":
+    renormalize_history()
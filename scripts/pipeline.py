@@ -0,0 +1,194 @@
+import os
+import sys
+import glob
+import json
+import time
+import getpass
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import telemetry  # exporta TELEMETRY_RUN_ID: todas las etapas escriben al mismo JSONL
+
+# ================= CONFIGURACIÓN =================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+STATE_PATH = os.path.join(ROOT_DIR, '.pipeline_state.json')
+LOGS_DIR = os.path.join(ROOT_DIR, 'logs')
+TODAY_STR = datetime.now().strftime("%Y-%m-%d")
+MAX_WORKERS = 3
+
+# Cada etapa declara su script, entradas y salidas (globs relativos a la raíz)
+# y de qué etapas depende. 'salt' fuerza la re-ejecución cuando cambia
+# (el scraping corre una vez por día aunque los scripts no cambien).
+# Las entradas incluyen todos los scripts/*.py que la etapa importa, directa
+# o indirectamente (tests/test_pipeline.py lo verifica).
+STAGES = {
+    'scrape': {
+        'script': '3.main.py',
+        'inputs': ['scripts/1.url_builder.py', 'scripts/2.parsers.py', 'scripts/browser.py', 'scripts/scrape_store.py', 'scripts/scheduler.py', 'scripts/schema.py', 'scripts/normalize.py', 'scripts/telemetry.py', 'scripts/text_index.py'],
+        # Un portal sin resultados no escribe su CSV: alcanza con el de cualquier portal
+        'outputs': [f'data/*/*_{TODAY_STR}.csv'],
+        'deps': [],
+        'salt': TODAY_STR,
+    },
+    'flatten': {
+        'script': '4.flat_guide.py',
+        'inputs': ['scripts/schema.py', 'scripts/market_stats.py', 'scripts/telemetry.py', 'data/zonaprop/*.csv', 'data/argenprop/*.csv', 'data/cabaprop/*.csv'],
+        'outputs': ['data/departamentos.xlsx', 'data/market_stats.json'],
+        'deps': ['scrape'],
+    },
+    'geocode_gyms': {
+        'script': '5.geocode_gyms.py',
+        'inputs': ['scripts/geocoder.py', 'scripts/telemetry.py', 'data/gimnasios/*/*'],
+        'outputs': ['shapes/gimnasios.geojson'],
+        'deps': [],
+    },
+    'geocode': {
+        'script': '5.geocode.py',
+        'inputs': ['scripts/geocoder.py', 'scripts/schema.py', 'scripts/telemetry.py', 'data/departamentos.xlsx'],
+        'outputs': ['shapes/departamentos_geocoded.geojson'],
+        'deps': ['flatten'],
+    },
+    'metrics': {
+        'script': '6.metrics_new.py',
+        'inputs': [
+            'scripts/isochrones.py', 'scripts/snapping.py', 'scripts/routing.py', 'scripts/multimodal.py', 'scripts/hexgrid.py', 'scripts/contraction.py', 'scripts/deals.py', 'scripts/map_builder.py', 'scripts/schema.py', 'scripts/ranking.py', 'scripts/telemetry.py',
+            'shapes/barrios.geojson', 'shapes/espacio_verde_publico.geojson',
+            'shapes/subte_lineas.geojson', 'shapes/estaciones_de_subte.geojson',
+            'shapes/callejero.geojson', 'shapes/gimnasios.geojson',
+            'shapes/departamentos_geocoded.geojson',
+        ],
+        'outputs': ['shapes/departamentos_metrics.geojson', 'shapes/departamentos_hex.geojson', 'shapes/calles_hex.geojson'],
+        'deps': ['geocode', 'geocode_gyms'],
+    },
+}
+
+# ================= HASHING =================
+
+def expand(patterns):
+    archivos = set()
+    for pat in patterns:
+        archivos.update(glob.glob(os.path.join(ROOT_DIR, pat)))
+    return sorted(archivos)
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk)
+            if not block: break
+            h.update(block)
+    return h.hexdigest()
+
+def stage_hash(stage):
+    """Hash del script + todas sus entradas (ruta y contenido) + salt."""
+    h = hashlib.sha256()
+    archivos = [os.path.join(SCRIPT_DIR, stage['script'])] + expand(stage['inputs'])
+    for path in archivos:
+        h.update(os.path.relpath(path, ROOT_DIR).encode('utf-8'))
+        h.update(file_hash(path).encode('ascii'))
+    h.update(str(stage.get('salt', '')).encode('utf-8'))
+    return h.hexdigest()
+
+def outputs_exist(stage):
+    return all(glob.glob(os.path.join(ROOT_DIR, pat)) for pat in stage['outputs'])
+
+def load_state():
+    if not os.path.exists(STATE_PATH): return {}
+    with open(STATE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state):
+    with open(STATE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+# ================= EJECUCIÓN =================
+
+def run_stage(nombre, stage, state, forzar=False):
+    """
+    Corre una etapa si cambió su hash. Retorna (estado, segundos, digest);
+    no toca 'state': solo el hilo principal lo actualiza y lo guarda.
+    """
+    t0 = time.perf_counter()
+    digest = stage_hash(stage)
+    if not forzar and state.get(nombre) == digest and outputs_exist(stage):
+        return 'omitida', time.perf_counter() - t0, digest
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    log_path = os.path.join(LOGS_DIR, f"{nombre}_{TODAY_STR}.log")
+    print(f"▶️ {nombre}: {stage['script']} (log: {os.path.relpath(log_path, ROOT_DIR)})")
+    with open(log_path, 'w', encoding='utf-8') as log:
+        # Vía la CLI del paquete: resuelve los imports url_builder / parsers y corre con cwd=scripts/
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get('PYTHONPATH')])))
+        proc = subprocess.run([sys.executable, '-m', 'alquiler_finder', nombre.replace('_', '-')],
+                              cwd=SCRIPT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    if proc.returncode != 0:
+        return 'error', time.perf_counter() - t0, None
+    # El hash de las entradas tal como estaban al empezar
+    return 'ok', time.perf_counter() - t0, digest
+
+def run_pipeline(seleccion=None, forzar=False, max_workers=MAX_WORKERS):
+    """
+    Recorre el DAG: cada etapa arranca apenas terminan sus dependencias, así
+    las independientes (ej. geocode_gyms y flatten) corren en paralelo.
+    """
+    nombres = seleccion or list(STAGES)
+    state = load_state()
+    resultados = {}
+    pendientes = set(nombres)
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pendientes or en_curso:
+            for nombre in sorted(pendientes):
+                deps = [d for d in STAGES[nombre]['deps'] if d in nombres]
+                if any(resultados.get(d, ('',))[0] in ('error', 'bloqueada') for d in deps):
+                    resultados[nombre] = ('bloqueada', 0.0)
+                    pendientes.discard(nombre)
+                elif all(d in resultados for d in deps):
+                    en_curso[pool.submit(run_stage, nombre, STAGES[nombre], state, forzar)] = nombre
+                    pendientes.discard(nombre)
+
+            if not en_curso: continue
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                nombre = en_curso.pop(fut)
+                estado, segundos, digest = fut.result()
+                resultados[nombre] = (estado, segundos)
+                telemetry.event('etapa', etapa=nombre, estado=estado, segundos=round(segundos, 2))
+                if estado == 'ok':
+                    state[nombre] = digest
+                    save_state(state)
+
+    print("\n⏱️ RESUMEN")
+    for nombre in nombres:
+        estado, segundos = resultados[nombre]
+        icono = {'ok': '✅', 'omitida': '⏭️', 'error': '❌', 'bloqueada': '🚫'}[estado]
+        print(f"   {icono} {nombre:<14} {estado:<10} {segundos:8.1f} s")
+    if os.path.exists(telemetry.EVENTS_PATH):
+        telemetry.report()
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Corre las etapas del pipeline omitiendo las que no cambiaron.")
+    parser.add_argument('etapas', nargs='*', help=f"Etapas a correr (por defecto todas): {', '.join(STAGES)}")
+    parser.add_argument('--forzar', action='store_true', help="Ignora los hashes guardados")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    desconocidas = [e for e in args.etapas if e not in STAGES]
+    if desconocidas:
+        parser.error(f"Etapas desconocidas: {', '.join(desconocidas)}")
+
+    # Pedimos la API Key una sola vez para las etapas de geocodificación en paralelo
+    if not os.environ.get("GOOGLE_MAPS_API_KEY") and any(e.startswith('geocode') for e in (args.etapas or STAGES)):
+        os.environ["GOOGLE_MAPS_API_KEY"] = getpass.getpass("Ingrese su Google API Key: ")
+
+    resultados = run_pipeline(args.etapas or None, args.forzar, args.workers)
+    sys.exit(1 if any(r[0] == 'error' for r in resultados.values()) else 0)
+
+if __name__ == "__main__":
+    main()
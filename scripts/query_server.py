@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+import hexgrid
+
+# ================= CONFIGURACIÓN =================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'shapes', 'departamentos_metrics.geojson')
+
+HOST = "127.0.0.1"
+PORT = 8765
+LIMITE_DEFECTO = 200
+CACHE_SIZE = 512
+
+# Campos devueltos si la consulta no pide otros
+CAMPOS_DEFECTO = [
+    'Portal', 'Barrio', 'Tipo', 'Precio', 'Expensas', 'costo_total',
+    'Direccion', 'Ambientes', 'Metros_Cubiertos', 'distancia_m_subte',
+    'distancia_m_gym', 'distancia_m_parque', 'distancia_m_plaza', 'URL'
+]
+
+# ================= TABLA EN MEMORIA =================
+
+class MetricsTable:
+    """
+    Tabla de métricas como arrays tipados por columna:
+      - numéricas -> float64 (NaN para nulos)
+      - texto -> códigos enteros + categorías
+    más un STRtree sobre los puntos para filtrar por bbox y el id de celda
+    hexagonal de cada punto (hexgrid) para filtrar por celdas o por radio.
+    """
+    def __init__(self, path=METRICS_PATH):
+        gdf = gpd.read_file(path).to_crs(epsg=4326)
+        self.n = len(gdf)
+        self.lon = gdf.geometry.x.to_numpy()
+        self.lat = gdf.geometry.y.to_numpy()
+        self.tree = shapely.STRtree(gdf.geometry.values)
+        self.x, self.y = shapely.get_coordinates(gdf.geometry.to_crs(epsg=hexgrid.PROYECCION).values).T
+        self.hex = {t: hexgrid.cell_ids(self.x, self.y, t) for t in hexgrid.TAMANOS_M}
+
+        self.numericas, self.categoricas = {}, {}
+        for col in gdf.columns.drop(gdf.geometry.name):
+            serie = gdf[col]
+            if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                self.numericas[col] = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+            else:
+                cat = pd.Categorical(serie.astype('string'))
+                self.categoricas[col] = (cat.codes, cat.categories)
+        print(f"📦 {self.n} listados cargados desde {path}")
+
+    def columns(self):
+        return {
+            'numericas': sorted(self.numericas),
+            'categoricas': {c: list(cats) for c, (_, cats) in self.categoricas.items()},
+        }
+
+    def mask(self, filtros):
+        """
+        filtros: lista de (campo, operador, valor) con operador en
+        'min', 'max', 'in', 'bbox', 'hex', 'cerca'. Todo se resuelve con máscaras NumPy.
+        """
+        m = np.ones(self.n, dtype=bool)
+        for campo, op, valor in filtros:
+            if op == 'bbox':
+                idx = self.tree.query(shapely.box(*valor))
+                sub = np.zeros(self.n, dtype=bool)
+                sub[idx] = True
+                m &= sub
+            elif op == 'hex':
+                tamanos, _, _ = hexgrid.unpack(valor)
+                sub = np.zeros(self.n, dtype=bool)
+                for t in np.unique(tamanos).tolist():
+                    sub |= np.isin(self.hex[t], np.asarray(valor)[tamanos == t])
+                m &= sub
+            elif op == 'cerca':
+                # Candidatos por celdas que tocan el círculo; distancia exacta solo sobre ellos
+                lon, lat, radio = valor
+                p = gpd.GeoSeries(gpd.points_from_xy([lon], [lat]), crs="EPSG:4326").to_crs(epsg=hexgrid.PROYECCION)
+                x, y = p.x.iloc[0], p.y.iloc[0]
+                t = min((t for t in hexgrid.TAMANOS_M if t >= radio / 4), default=hexgrid.TAMANOS_M[-1])
+                idx = np.flatnonzero(m & np.isin(self.hex[t], hexgrid.disk(x, y, radio, t)))
+                sub = np.zeros(self.n, dtype=bool)
+                sub[idx[np.hypot(self.x[idx] - x, self.y[idx] - y) <= radio]] = True
+                m &= sub
+            elif op in ('min', 'max'):
+                col = self.numericas[campo]
+                m &= (col >= valor) if op == 'min' else (col <= valor)
+            elif op == 'in':
+                codes, cats = self.categoricas[campo]
+                buscados = cats.get_indexer(valor)
+                m &= np.isin(codes, buscados[buscados >= 0])
+        return m
+
+    def rows(self, idx, campos):
+        filas = {'lon': self.lon[idx].round(6).tolist(), 'lat': self.lat[idx].round(6).tolist()}
+        for c in campos:
+            if c in self.numericas:
+                vals = self.numericas[c][idx]
+                filas[c] = [None if np.isnan(v) else v for v in vals.tolist()]
+            elif c in self.categoricas:
+                codes, cats = self.categoricas[c]
+                sel = codes[idx]
+                filas[c] = [None if k < 0 else cats[k] for k in sel.tolist()]
+        claves = list(filas)
+        return [dict(zip(claves, valores)) for valores in zip(*filas.values())]
+
+# ================= CONSULTAS =================
+
+def _numeros(clave, valor, n):
+    """Lista de n números separados por comas (ValueError -> 400 si no)."""
+    nums = tuple(float(v) for v in valor.split(','))
+    if len(nums) != n:
+        raise ValueError(f"{clave} espera {n} números separados por comas")
+    return nums
+
+def parse_query(tabla, query):
+    """
+    Traduce el querystring a filtros. Convenciones:
+      costo_total_max=600000, distancia_m_subte_max=500, Ambientes_min=2
+      Barrio=Palermo,Belgrano   (columnas de texto, lista separada por comas)
+      bbox=lon_min,lat_min,lon_max,lat_max
+      cerca=lon,lat,radio_m    hex=id1,id2 (celdas de hexgrid, cualquier tamaño)
+      campos=Precio,URL  limit=100  orden=costo_total (o -costo_total)
+    """
+    filtros, opciones = [], {'limit': LIMITE_DEFECTO, 'campos': CAMPOS_DEFECTO, 'orden': None}
+    for clave, valor in query:
+        if clave == 'limit':
+            opciones['limit'] = int(valor)
+            if opciones['limit'] < 0:
+                raise ValueError("limit no puede ser negativo")
+        elif clave == 'campos':
+            opciones['campos'] = valor.split(',')
+        elif clave == 'orden':
+            opciones['orden'] = valor
+        elif clave == 'bbox':
+            filtros.append(('geometry', 'bbox', _numeros(clave, valor, 4)))
+        elif clave == 'cerca':
+            filtros.append(('geometry', 'cerca', _numeros(clave, valor, 3)))
+        elif clave == 'hex':
+            ids = [int(v) for v in valor.split(',')]
+            if any(t not in tabla.hex for t in hexgrid.unpack(ids)[0].tolist()):
+                raise ValueError(f"Celda de tamaño desconocido (tamaños: {hexgrid.TAMANOS_M})")
+            filtros.append(('geometry', 'hex', ids))
+        elif clave.endswith(('_min', '_max')) and clave[:-4] in tabla.numericas:
+            filtros.append((clave[:-4], clave[-3:], float(valor)))
+        elif clave in tabla.categoricas:
+            filtros.append((clave, 'in', valor.split(',')))
+        else:
+            raise ValueError(f"Filtro desconocido: {clave}")
+    return filtros, opciones
+
+def run_query(tabla, query):
+    filtros, opciones = parse_query(tabla, query)
+    idx = np.flatnonzero(tabla.mask(filtros))
+    total = len(idx)
+
+    orden = opciones['orden']
+    if orden:
+        campo = orden.lstrip('-')
+        vals = tabla.numericas[campo][idx]
+        vals = np.where(np.isnan(vals), np.inf, -vals if orden.startswith('-') else vals)
+        k = min(opciones['limit'], total)
+        if 0 < k < total:
+            # Top-k sin ordenar todo el resultado. Se toman todos los empatados con
+            # el k-ésimo (en orden original) para desempatar igual que el sort estable
+            corte = np.partition(vals, k - 1)[k - 1]
+            cand = np.flatnonzero(vals <= corte)
+            idx = idx[cand[np.argsort(vals[cand], kind='stable')]]
+        else:
+            idx = idx[np.argsort(vals, kind='stable')]
+    idx = idx[:opciones['limit']]
+
+    return {'total': total, 'devueltos': len(idx), 'resultados': tabla.rows(idx, opciones['campos'])}
+
+# ================= SERVIDOR =================
+
+def make_handler(tabla):
+    @lru_cache(maxsize=CACHE_SIZE)
+    def cached(query_canonica):
+        query = parse_qsl(query_canonica)
+        return json.dumps(run_query(tabla, query), ensure_ascii=False).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, ms=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if ms is not None:
+                self.send_header('X-Query-Ms', f"{ms:.2f}")
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            t0 = time.perf_counter()
+            try:
+                if url.path == '/listings':
+                    # Forma canónica: mismo filtro en distinto orden -> mismo hit de caché
+                    canonica = urlencode(sorted(parse_qsl(url.query)))
+                    body = cached(canonica)
+                elif url.path == '/columns':
+                    body = json.dumps(tabla.columns(), ensure_ascii=False).encode('utf-8')
+                else:
+                    self._send(404, b'{"error": "not found"}')
+                    return
+            except (ValueError, KeyError) as e:
+                self._send(400, json.dumps({'error': str(e)}).encode('utf-8'))
+                return
+            self._send(200, body, (time.perf_counter() - t0) * 1000)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    tabla = MetricsTable()
+    server = ThreadingHTTPServer((HOST, PORT), make_handler(tabla))
+    print(f"🔎 Escuchando en http://{HOST}:{PORT}/listings?costo_total_max=600000&distancia_m_subte_max=500")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
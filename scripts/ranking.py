@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# ================= CONFIGURACIÓN =================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'shapes', 'departamentos_metrics.geojson')
+
+# Criterio -> sentido: -1 menor es mejor, +1 mayor es mejor
+CRITERIOS = {
+    'costo_total': -1,
+    'precio_m2': -1,
+    'distancia_m_subte': -1, 'distancia_m_gym': -1, 'distancia_m_parque': -1, 'distancia_m_plaza': -1,
+    'cant_subte': 1, 'cant_gym': 1, 'cant_parque': 1, 'cant_plaza': 1,
+}
+
+PESOS = {
+    'costo_total': 3.0,
+    'precio_m2': 1.0,
+    'distancia_m_subte': 2.0,
+    'distancia_m_parque': 1.0,
+    'distancia_m_gym': 0.5,
+    'cant_plaza': 0.5,
+}
+
+# Restricciones duras: columna -> (mínimo, máximo) con None abierto, o lista de valores admitidos
+RESTRICCIONES = {
+    'costo_total': (None, 800000),
+    'Ambientes': (2, None),
+}
+
+# Percentiles para escalar cada criterio a [0, 1] sin que un outlier aplaste al resto
+PERCENTILES = (5, 95)
+
+# ================= RANKING =================
+
+def add_precio_m2(df):
+    """Precio por m² cubierto (nulo si no hay superficie)."""
+    precio = pd.to_numeric(df['Precio'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    metros = pd.to_numeric(df['Metros_Cubiertos'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['precio_m2'] = np.where(metros > 0, precio / metros, np.nan)
+    return df
+
+class Ranker:
+    """
+    Ranking ponderado sobre departamentos_final. La matriz de criterios ya
+    escalados (1 = mejor) se arma una sola vez; re-ponderar es un producto
+    matriz-vector y el top-k un argpartition, así se puede ajustar en vivo.
+    """
+    def __init__(self, df, criterios=CRITERIOS, percentiles=PERCENTILES):
+        if 'precio_m2' in criterios and 'precio_m2' not in df.columns and {'Precio', 'Metros_Cubiertos'} <= set(df.columns):
+            df = add_precio_m2(df.copy())
+        self.df = df
+        self.criterios = [c for c in criterios if c in df.columns]
+
+        columnas = []
+        for col in self.criterios:
+            x = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            validos = x[~np.isnan(x)]
+            lo, hi = np.percentile(validos, percentiles) if len(validos) else (0.0, 1.0)
+            escala = (x - lo) / (hi - lo) if hi > lo else np.full_like(x, 0.5)
+            escala = np.clip(escala, 0, 1)
+            if criterios[col] < 0:
+                escala = 1 - escala
+            # Sin dato (ej. ningún POI al alcance del cutoff) = peor valor
+            columnas.append(np.nan_to_num(escala, nan=0.0))
+        self.matriz = np.column_stack(columnas).astype(np.float32) if columnas else np.zeros((len(df), 0), np.float32)
+        self._crudos = {}
+
+    def _crudo(self, col):
+        if col not in self._crudos:
+            serie = self.df[col]
+            if pd.api.types.is_numeric_dtype(serie):
+                self._crudos[col] = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            else:
+                self._crudos[col] = serie.astype('string').to_numpy(dtype=object, na_value=None)
+        return self._crudos[col]
+
+    def scores(self, pesos=PESOS):
+        """Puntaje en [0, 1]: promedio ponderado de los criterios escalados."""
+        w = np.array([pesos.get(c, 0.0) for c in self.criterios], dtype=np.float32)
+        total = np.abs(w).sum()
+        if not total:
+            return np.zeros(len(self.df), dtype=np.float32)
+        return self.matriz @ (w / total)
+
+    def mask(self, restricciones=RESTRICCIONES):
+        ok = np.ones(len(self.df), dtype=bool)
+        for col, regla in (restricciones or {}).items():
+            if col not in self.df.columns:
+                raise KeyError(f"Columna desconocida en restricciones: {col}")
+            x = self._crudo(col)
+            if isinstance(regla, (list, set, frozenset)):
+                ok &= np.isin(x, list(regla))
+                continue
+            minimo, maximo = regla
+            # Los nulos no cumplen una cota
+            if minimo is not None: ok &= np.nan_to_num(x, nan=-np.inf) >= minimo
+            if maximo is not None: ok &= np.nan_to_num(x, nan=np.inf) <= maximo
+        return ok
+
+    def top(self, k=20, pesos=PESOS, restricciones=RESTRICCIONES):
+        """Índices posicionales y puntajes de los k mejores que cumplen las restricciones."""
+        idx = np.flatnonzero(self.mask(restricciones))
+        s = self.scores(pesos)[idx]
+        k = min(k, len(idx))
+        if 0 < k < len(idx):
+            # Top-k sin ordenar todo: partición O(n) + orden de los candidatos. Entran
+            # todos los empatados con el k-ésimo para desempatar como el sort estable
+            corte = np.partition(-s, k - 1)[k - 1]
+            cand = np.flatnonzero(-s <= corte)
+            orden = cand[np.argsort(-s[cand], kind='stable')][:k]
+        else:
+            orden = np.argsort(-s, kind='stable')
+        return idx[orden], s[orden]
+
+    def rank(self, k=20, pesos=PESOS, restricciones=RESTRICCIONES, columnas=None):
+        idx, s = self.top(k, pesos, restricciones)
+        res = self.df.iloc[idx]
+        if columnas:
+            res = res[[c for c in columnas if c in res.columns]]
+        return res.assign(score=np.round(s, 4))
+
+if __name__ == "__main__":
+    # Uso: python ranking.py [shapes/departamentos_metrics.geojson] [k]
+    import schema
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_PATH
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ranker = Ranker(schema.read_file(path))
+
+    t0 = time.perf_counter()
+    ranking = ranker.rank(k, columnas=['Barrio', 'Direccion', 'costo_total', 'precio_m2', 'Ambientes',
+                                       'distancia_m_subte', 'distancia_m_parque', 'URL'])
+    ms = (time.perf_counter() - t0) * 1000
+    with pd.option_context('display.max_colwidth', 60, 'display.width', 200):
+        print(ranking.to_string(index=False))
+    print(f"\n⏱️ {len(ranker.df)} avisos rankeados en {ms:.2f} ms")
@@ -0,0 +1,84 @@
+import numpy as np
+import networkx as nx
+from contraction import add_source, extremos
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+
+CUTOFF_M = 1000     # Distancia máxima de ruteo a pie
+PESO = 'mm_len'
+
+# ================= BACKENDS =================
+# Todos devuelven lo mismo para cada origen: distancia al POI más cercano
+# (NaN si ninguno está dentro del cutoff) y cantidad de POIs al alcance.
+# El grafo es no dirigido, así que da igual expandir desde los orígenes o
+# desde los POIs; conviene el lado con menos fuentes.
+# Con un grafo contraído (contraction.py) los accesos de los POIs son nodos
+# conservados y los orígenes se resuelven por los extremos de su cadena.
+
+def _accesos_por_nodo(accesos_por_poi):
+    """Un nodo puede ser acceso de varios POIs y un POI tener varios accesos."""
+    nodo_a_poi = {}
+    for poi_i, accesos in enumerate(accesos_por_poi):
+        for nodo in accesos:
+            nodo_a_poi.setdefault(nodo, set()).add(poi_i)
+    return nodo_a_poi
+
+def _por_origen(G, origenes, accesos_por_poi, cutoff, weight, capa, cadenas):
+    """Un Dijkstra acotado por origen (el cálculo original de 6.metrics_new.py)."""
+    nodo_a_poi = _accesos_por_nodo(accesos_por_poi)
+    dist = np.full(len(origenes), np.nan)
+    cant = np.zeros(len(origenes), dtype=np.uint16)
+    for i, n_start in enumerate(origenes):
+        agregado = add_source(G, cadenas, n_start, weight) if cadenas else False
+        with telemetry.timer('dijkstra_ms', capa=capa):
+            dists_dict = nx.single_source_dijkstra_path_length(G, n_start, cutoff=cutoff, weight=weight)
+        if agregado: G.remove_node(n_start)
+        d_por_poi = {}
+        for nodo, d in dists_dict.items():
+            for poi_i in nodo_a_poi.get(nodo, ()):
+                if d < d_por_poi.get(poi_i, np.inf): d_por_poi[poi_i] = d
+        if d_por_poi:
+            dist[i] = min(d_por_poi.values())
+            cant[i] = len(d_por_poi)
+    return dist, cant
+
+def _por_poi(G, origenes, accesos_por_poi, cutoff, weight, capa, cadenas):
+    """Un Dijkstra multi-fuente por POI (sus accesos) y se vuelca sobre los orígenes."""
+    # Cada origen cuelga de los extremos de su cadena (de sí mismo si no se contrajo)
+    por_extremo = {}
+    for i, n in enumerate(origenes):
+        a, off_a, b, off_b = extremos(cadenas or {}, n)
+        por_extremo.setdefault(a, []).append((i, off_a))
+        if b != a: por_extremo.setdefault(b, []).append((i, off_b))
+    dist = np.full(len(origenes), np.inf)
+    cant = np.zeros(len(origenes), dtype=np.uint16)
+    for accesos in accesos_por_poi:
+        if not accesos: continue
+        with telemetry.timer('dijkstra_ms', capa=capa):
+            dists_dict = nx.multi_source_dijkstra_path_length(G, set(accesos), cutoff=cutoff, weight=weight)
+        mejor = {}
+        for nodo, d in dists_dict.items():
+            for i, off in por_extremo.get(nodo, ()):
+                if d + off <= cutoff and d + off < mejor.get(i, np.inf): mejor[i] = d + off
+        for i, d in mejor.items():
+            cant[i] += 1
+            if d < dist[i]: dist[i] = d
+    dist[np.isinf(dist)] = np.nan
+    return dist, cant
+
+BACKENDS = {
+    'por_origen': _por_origen,
+    'por_poi': _por_poi,
+}
+
+def poi_distances(G, origenes, accesos_por_poi, cutoff=CUTOFF_M, weight=PESO, backend='auto', capa='', cadenas=None):
+    """
+    Distancia por red al POI más cercano y cantidad de POIs a menos de
+    'cutoff' metros, para cada nodo de 'origenes'.
+    backend='auto' elige el lado con menos Dijkstras. 'cadenas': el mapa de
+    contract_degree2 si G está contraído.
+    """
+    if backend == 'auto':
+        backend = 'por_poi' if len(accesos_por_poi) < len(set(origenes)) else 'por_origen'
+    return BACKENDS[backend](G, origenes, accesos_por_poi, cutoff, weight, capa, cadenas)
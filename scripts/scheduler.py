@@ -0,0 +1,76 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Por portal:
+#   intervalo_s   -> separación mínima entre navegaciones (con jitter)
+#   concurrencia  -> navegadores simultáneos contra el mismo sitio
+#   backoff_*     -> espera exponencial tras errores / bloqueos
+POLITICAS = {
+    "zonaprop":  {"intervalo_s": 6.0, "jitter_s": 2.0, "concurrencia": 1, "backoff_base_s": 30, "backoff_max_s": 900},
+    "argenprop": {"intervalo_s": 4.0, "jitter_s": 1.5, "concurrencia": 1, "backoff_base_s": 20, "backoff_max_s": 600},
+    "cabaprop":  {"intervalo_s": 3.0, "jitter_s": 1.0, "concurrencia": 1, "backoff_base_s": 15, "backoff_max_s": 600},
+}
+
+# ================= SCHEDULER =================
+
+class PortalScheduler:
+    """
+    Cortesía por portal compartida entre hilos: cada navegación pasa por
+    request(portal), que respeta el cupo de concurrencia, el intervalo mínimo
+    desde la navegación anterior y el backoff vigente. Los portales son
+    independientes entre sí, así que sus esperas se solapan.
+    Una excepción en la navegación penaliza al portal; el éxito lo declara
+    quien mira la página (reward), porque un desafío anti-bot carga sin error.
+    """
+    def __init__(self, politicas=POLITICAS):
+        self.politicas = politicas
+        self._lock = threading.Lock()
+        self._cupos = {p: threading.Semaphore(cfg['concurrencia']) for p, cfg in politicas.items()}
+        self._proximo = {p: 0.0 for p in politicas}    # instante mínimo de la próxima navegación
+        self._nivel = {p: 0 for p in politicas}        # errores consecutivos
+
+    def _reservar_turno(self, portal):
+        """Reserva el próximo turno del portal y devuelve cuánto hay que esperar."""
+        cfg = self.politicas[portal]
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo[portal])
+            self._proximo[portal] = turno + cfg['intervalo_s'] + random.uniform(0, cfg['jitter_s'])
+        return turno - ahora
+
+    @contextmanager
+    def request(self, portal):
+        with self._cupos[portal]:
+            espera = self._reservar_turno(portal)
+            if espera > 0:
+                telemetry.observe('cortesia_espera_ms', espera * 1000, portal=portal)
+                time.sleep(espera)
+            try:
+                yield
+            except Exception:
+                self.penalize(portal)
+                raise
+
+    def penalize(self, portal, motivo="error"):
+        """Backoff exponencial: corre el próximo turno del portal."""
+        cfg = self.politicas[portal]
+        with self._lock:
+            self._nivel[portal] += 1
+            espera = min(cfg['backoff_base_s'] * 2 ** (self._nivel[portal] - 1), cfg['backoff_max_s'])
+            self._proximo[portal] = max(self._proximo[portal], time.monotonic() + espera)
+            nivel = self._nivel[portal]
+        telemetry.event('backoff', portal=portal, motivo=motivo, nivel=nivel, espera_s=espera)
+        print(f"   ⏳ {portal}: backoff {espera:.0f}s ({motivo}, nivel {nivel})")
+        return espera
+
+    def reward(self, portal):
+        with self._lock:
+            self._nivel[portal] = 0
+
+    def slots(self, portal):
+        return self.politicas[portal]['concurrencia']
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+
+# ================= ESQUEMA CANÓNICO =================
+# Un solo lugar para los tipos de los listados: scraping, flat guide,
+# geocodificación y métricas cargan y guardan a través de este módulo, así
+# cada columna se convierte una sola vez y al tipo más angosto que le alcanza.
+
+PORTALES = ['zonaprop', 'argenprop', 'cabaprop']
+TIPOS = ['Departamento', 'PH']
+CAPAS = ['gym', 'subte', 'parque', 'plaza']
+
+# Baja cardinalidad -> category (Barrio e Inmobiliaria con categorías abiertas)
+CATEGORICAS = {
+    'Portal': pd.CategoricalDtype(PORTALES),
+    'Tipo': pd.CategoricalDtype(TIPOS),
+    'Moneda': pd.CategoricalDtype(['ARS', 'USD']),
+    'Barrio': 'category',
+    'Inmobiliaria': 'category',
+}
+
+# Enteros con nulos: (dtype, máximo). Lo que excede el rango es basura del
+# parseo (ej. dos números pegados) y queda como nulo en lugar de desbordar.
+ENTEROS = {
+    'Precio': ('UInt32', 2**32 - 1),
+    'Expensas': ('UInt32', 2**32 - 1),
+    'costo_total': ('UInt32', 2**32 - 1),
+    'costo_vecinos': ('UInt32', 2**32 - 1),
+    'Ambientes': ('UInt8', 2**8 - 1),
+    'Dormitorios': ('UInt8', 2**8 - 1),
+    'Baños': ('UInt8', 2**8 - 1),
+    'Cocheras': ('UInt8', 2**8 - 1),
+    'Antiguedad': ('UInt16', 2**16 - 1),
+    'Metros_Totales': ('UInt32', 2**32 - 1),
+    'Metros_Cubiertos': ('UInt32', 2**32 - 1),
+    'Visitas_Count': ('UInt32', 2**32 - 1),
+}
+# Métricas de 6.metrics_new.py (el cutoff de Dijkstra es 1000 m)
+for _capa in CAPAS:
+    ENTEROS[f'distancia_m_{_capa}'] = ('UInt16', 2**16 - 1)
+    ENTEROS[f'cant_{_capa}'] = ('UInt16', 2**16 - 1)
+    ENTEROS[f'cant_10min_{_capa}'] = ('UInt16', 2**16 - 1)
+
+# Coordenadas en float64 (float32 pierde ~1 m a estas latitudes)
+FLOTANTES = {'lat': 'float64', 'lon': 'float64'}
+for _capa in CAPAS:
+    FLOTANTES[f'min_a_pie_{_capa}'] = 'float32'
+FLOTANTES['min_destino'] = 'float32'
+FLOTANTES['min_destino_a_pie'] = 'float32'
+FLOTANTES['ratio_vecinos'] = 'float32'
+FLOTANTES['z_vecinos'] = 'float32'
+
+BOOLEANAS = ['Bajo_Precio', 'Oportunidad']
+FECHAS = ['Fecha_Publicacion']
+
+# Orden de salida: primero las columnas núcleo, después el resto alfabético
+CORE_COLUMNS = [
+    'Portal', 'Barrio', 'Tipo', 'Titulo', 'Precio', 'Expensas',
+    'Direccion',
+    'Metros_Totales', 'Metros_Cubiertos',
+    'Ambientes', 'Dormitorios', 'Baños',
+    'URL'
+]
+
+# ================= CONVERSIÓN =================
+
+def _to_int(serie, dtype, maximo):
+    if serie.dtype == dtype:
+        return serie
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    valores = serie.astype('Float64')
+    fuera = ((valores < 0) | (valores > maximo)).fillna(False)
+    return np.floor(valores.mask(fuera)).astype(dtype)
+
+def _to_bool(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.astype('boolean')
+    texto = serie.astype('string').str.strip().str.lower()
+    return texto.map({'true': True, 'false': False, '1': True, '0': False}).astype('boolean')
+
+def apply_schema(df, dayfirst=True):
+    """
+    Lleva un DataFrame (o GeoDataFrame) al esquema canónico. Solo toca las
+    columnas presentes y no re-convierte las que ya tienen el tipo correcto,
+    así aplicarlo en cada etapa es barato.
+    """
+    df = df.loc[:, ~df.columns.duplicated()]
+    cambios = {}
+    for col, dtype in CATEGORICAS.items():
+        # Ojo: CategoricalDtype(...) == 'category' es True; las cerradas se comparan enteras
+        abierta = isinstance(dtype, str)
+        if col in df.columns and not (isinstance(df[col].dtype, pd.CategoricalDtype) and (abierta or df[col].dtype == dtype)):
+            texto = df[col].astype('string').str.strip().replace('', pd.NA)
+            if not abierta:
+                # Fuera de las categorías -> nulo
+                texto = texto.where(texto.isin(dtype.categories))
+            cambios[col] = texto.astype(dtype)
+    for col, (dtype, maximo) in ENTEROS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            cambios[col] = _to_int(df[col], dtype, maximo)
+    for col, dtype in FLOTANTES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            cambios[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    for col in BOOLEANAS:
+        if col in df.columns and df[col].dtype != 'boolean':
+            cambios[col] = _to_bool(df[col])
+    for col in FECHAS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            cambios[col] = pd.to_datetime(df[col], dayfirst=dayfirst, errors='coerce')
+    if not cambios:
+        return df
+    df = df.copy()
+    for col, serie in cambios.items():
+        df[col] = serie
+    return df
+
+def order_columns(df):
+    extras = sorted(c for c in df.columns if c not in CORE_COLUMNS and c != getattr(df, '_geometry_column_name', None))
+    orden = [c for c in CORE_COLUMNS if c in df.columns] + extras
+    geom = getattr(df, '_geometry_column_name', None)
+    if geom in df.columns:
+        orden.append(geom)
+    return df[orden]
+
+def concat(frames):
+    """
+    pd.concat de frames ya tipados: las categorías abiertas (Barrio) se unen
+    antes para que el resultado siga siendo category y no object.
+    """
+    frames = [f for f in frames if f is not None and len(f)]
+    for col, dtype in CATEGORICAS.items():
+        if dtype != 'category': continue
+        presentes = [f for f in frames if col in f.columns]
+        if not presentes: continue
+        union = pd.CategoricalDtype(pd.api.types.union_categoricals([f[col].astype('category') for f in presentes]).categories)
+        frames = [f.assign(**{col: f[col].astype(union)}) if col in f.columns else f for f in frames]
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+# ================= LECTURA / ESCRITURA =================
+
+def read_csv(path, sep=';'):
+    """
+    CSV de un portal (save_data). Todo se lee como texto (sin inferencia: los
+    '_raw' no deben volverse números) y las categorías directo como category.
+    """
+    dtype = defaultdict(lambda: 'string', {col: 'category' for col in CATEGORICAS})
+    return apply_schema(pd.read_csv(path, sep=sep, dtype=dtype, encoding='utf-8-sig'))
+
+def write_csv(df, path, sep=';'):
+    order_columns(apply_schema(df)).to_csv(path, index=False, sep=sep, encoding='utf-8-sig')
+
+def read_excel(path):
+    return apply_schema(pd.read_excel(path))
+
+def write_excel(df, path):
+    order_columns(apply_schema(df)).to_excel(path, index=False)
+
+def read_file(path, **kwargs):
+    import geopandas as gpd
+    return apply_schema(gpd.read_file(path, **kwargs))
+
+def _exportable(df):
+    """Los drivers OGR no conocen category: salen como texto (se recuperan al leer)."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+def write_file(gdf, path, driver="GeoJSON"):
+    _exportable(order_columns(apply_schema(gdf))).to_file(path, driver=driver)
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
@@ -0,0 +1,246 @@
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime
+from url_builder import FILTROS_EXCLUSION
+import normalize
+import schema
+import telemetry
+import text_index
+
+# ================= CONFIGURACIÓN =================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+TODAY_STR = datetime.now().strftime("%Y-%m-%d")
+
+# Varios workers de un mismo portal escriben a los mismos archivos
+_write_lock = threading.Lock()
+
+# ================= PERSISTENCIA POR PÁGINA =================
+
+class ScrapeStore:
+    """
+    Persistencia incremental de un portal para el día:
+      - <portal>_<fecha>.records.jsonl: un registro crudo por línea, escrito
+        apenas se parsea cada página (sin acumular en memoria)
+      - <portal>_<fecha>.manifest.jsonl: unidades (consulta, página) terminadas
+        y consultas cerradas, para retomar una corrida interrumpida
+    """
+    def __init__(self, portal_name, fecha=TODAY_STR, base_dir=BASE_DATA_DIR):
+        self.portal = portal_name
+        self.folder = os.path.join(base_dir, portal_name, 'parts')
+        os.makedirs(self.folder, exist_ok=True)
+        self.records_path = os.path.join(self.folder, f"{portal_name}_{fecha}.records.jsonl")
+        self.manifest_path = os.path.join(self.folder, f"{portal_name}_{fecha}.manifest.jsonl")
+        self.plan_path = os.path.join(self.folder, f"{portal_name}_{fecha}.plan.json")
+
+        # Estado de la corrida anterior (si la hubo)
+        self.paginas = {}      # url consulta -> última página guardada
+        self.cerradas = set()  # consultas completas
+        for entry in self._read_jsonl(self.manifest_path):
+            if entry.get('fin'):
+                self.cerradas.add(entry['url'])
+            else:
+                self.paginas[entry['url']] = max(self.paginas.get(entry['url'], 0), entry['pagina'])
+
+    @staticmethod
+    def _read_jsonl(path):
+        if not os.path.exists(path): return
+        with open(path, encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea: continue
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    # Última línea truncada por un corte abrupto
+                    continue
+
+    @staticmethod
+    def _append(path, filas):
+        bloque = "".join(json.dumps(fila, ensure_ascii=False) + "\n" for fila in filas)
+        with _write_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(bloque)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Consultas sobre el estado ---
+    def is_done(self, url):
+        return url in self.cerradas
+
+    def last_page(self, url):
+        return self.paginas.get(url, 0)
+
+    def seen_urls(self):
+        """URLs de avisos ya guardados hoy (para el dedupe entre páginas)."""
+        return {r['URL'] for r in self._read_jsonl(self.records_path) if r.get('URL')}
+
+    # --- Plan de consultas del día (evita re-contar al retomar) ---
+    def load_plan(self):
+        if not os.path.exists(self.plan_path): return None
+        with open(self.plan_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_plan(self, consultas):
+        with open(self.plan_path, 'w', encoding='utf-8') as f:
+            json.dump(consultas, f, ensure_ascii=False, indent=1)
+
+    # --- Escritura ---
+    def write_page(self, url, barrio, tipo, pagina, items):
+        # Primero los registros y después el manifest: si el proceso muere en
+        # el medio, la página se repite al retomar, sus avisos ya están en
+        # seen_urls (no se duplican) y la consulta sigue con la página siguiente
+        if items:
+            self._append(self.records_path, items)
+        self._append(self.manifest_path, [{
+            'url': url, 'barrio': barrio, 'tipo': tipo, 'pagina': pagina, 'registros': len(items)
+        }])
+        self.paginas[url] = max(self.paginas.get(url, 0), pagina)
+
+    def mark_done(self, url):
+        self._append(self.manifest_path, [{'url': url, 'fin': True}])
+        self.cerradas.add(url)
+
+    def load_records(self):
+        return self._read_jsonl(self.records_path)
+
+def load_records(portal_name, fecha=TODAY_STR):
+    """Registros crudos del día de un portal (generador), listos para save_data."""
+    return ScrapeStore(portal_name, fecha).load_records()
+
+# ================= PARTES POR TAREA (cola distribuida) =================
+
+def task_part_path(portal_name, fecha, clave, base_dir=BASE_DATA_DIR):
+    return os.path.join(base_dir, portal_name, 'parts', 'tasks', fecha, f"{clave}.jsonl")
+
+def write_task_part(portal_name, fecha, clave, items, base_dir=BASE_DATA_DIR):
+    """
+    Resultado de una tarea (consulta, página) en su propio archivo, escrito
+    atómicamente (tmp + rename): si dos workers completan la misma tarea, el
+    segundo reemplaza al primero con el mismo contenido.
+    """
+    path = task_part_path(portal_name, fecha, clave, base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+def load_task_records(portal_name, fecha=TODAY_STR, base_dir=BASE_DATA_DIR):
+    """Registros de todas las tareas del día (generador, archivo por archivo)."""
+    carpeta = os.path.dirname(task_part_path(portal_name, fecha, 'x', base_dir))
+    if not os.path.isdir(carpeta): return
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre.endswith('.jsonl'):
+            yield from ScrapeStore._read_jsonl(os.path.join(carpeta, nombre))
+
+# ================= GUARDADO =================
+# El CSV del día se arma por bloques de GUARDADO_BLOQUE registros: normalizar,
+# filtrar e indexar un bloque a la vez mantiene la memoria plana aunque el
+# portal traiga decenas de miles de avisos.
+GUARDADO_BLOQUE = 5000
+
+def _bloques(registros, n):
+    bloque = []
+    for r in registros:
+        bloque.append(r)
+        if len(bloque) == n:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+def _limpiar(df, portal_name, urls_vistas):
+    """Filtros de un bloque ya normalizado; los duplicados se cuentan contra todos los bloques anteriores."""
+    excluded = normalize.mask_excluded(df, FILTROS_EXCLUSION)
+    telemetry.incr('filtro_exclusion', int(excluded.sum()), portal=portal_name)
+    df = df[~excluded]
+
+    if 'Moneda' in df.columns:
+        telemetry.incr('cards_usd', int((df['Moneda'] == 'USD').sum()), portal=portal_name)
+    valid_price = normalize.mask_valid_price(df)
+    telemetry.incr('filtro_precio', int((~valid_price).sum()), portal=portal_name)
+    df = df[valid_price].copy()
+
+    if 'URL' in df.columns:
+        antes = len(df)
+        urls = df['URL'].astype('string')
+        df = df[~(urls.isin(urls_vistas).fillna(False) | (urls.duplicated(keep='first') & urls.notna()))]
+        urls_vistas.update(df['URL'].dropna())
+        telemetry.incr('filtro_duplicados', antes - len(df), portal=portal_name)
+
+    return df.drop(columns=['Ubicacion'], errors='ignore')
+
+def save_data(registros, portal_name, fecha=TODAY_STR, bloque=GUARDADO_BLOQUE):
+    """
+    Normaliza, filtra y escribe el CSV del día de un portal. 'registros' puede
+    ser cualquier iterable (ej. el generador de load_records): se procesa por
+    bloques. Todos los bloques se escriben con las columnas fijas de
+    normalize.CSV_COLUMNS; una columna fuera de esa lista se descarta (y se avisa).
+    """
+    target_folder = os.path.join(BASE_DATA_DIR, portal_name)
+    if not os.path.exists(target_folder): os.makedirs(target_folder)
+    path = os.path.join(target_folder, f"{portal_name}_{fecha}.csv")
+    tmp = f"{path}.{os.getpid()}.tmp"
+
+    indice = None
+    try:
+        indice = text_index.TextIndex()
+    except Exception as e:
+        telemetry.event('indice_texto_error', portal=portal_name, error=str(e)[:200])
+
+    initial_len, clean_len, indexados = 0, 0, 0
+    descartadas, urls_vistas = set(), set()
+    primero = True
+    try:
+        for lote in _bloques(registros, bloque):
+            # Texto crudo -> valores en una pasada columnar (normalize.py)
+            with telemetry.timer('normalizar_ms', portal=portal_name):
+                df = normalize.normalize(pd.DataFrame(lote))
+            initial_len += len(df)
+            df = _limpiar(df, portal_name, urls_vistas)
+            clean_len += len(df)
+
+            # Tipos y orden de columnas del esquema compartido
+            df = schema.order_columns(schema.apply_schema(df))
+            descartadas.update(c for c in df.columns if c not in normalize.CSV_COLUMNS)
+            # El BOM (utf-8-sig) va solo al principio del archivo
+            df.reindex(columns=normalize.CSV_COLUMNS).to_csv(tmp, index=False, sep=';', header=primero,
+                                                             mode='w' if primero else 'a', encoding='utf-8-sig' if primero else 'utf-8')
+            primero = False
+
+            # Índice de texto: incremental, y un fallo no debe perder el CSV
+            if indice is not None:
+                try:
+                    indexados += indice.add(df, fecha)
+                except Exception as e:
+                    telemetry.event('indice_texto_error', portal=portal_name, error=str(e)[:200])
+                    indice.close()
+                    indice = None
+
+        if initial_len == 0:
+            print(f"❌ {portal_name}: Vacío.")
+            return
+        os.replace(tmp, path)
+        # Recién con el CSV en su lugar el índice lo da por ingerido
+        if indice is not None:
+            indice.mark_ingested(path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+        if indice is not None:
+            indice.close()
+
+    if descartadas:
+        telemetry.event('columnas_descartadas', portal=portal_name, columnas=sorted(descartadas))
+    if initial_len - clean_len > 0:
+        print(f"   🧹 Eliminados: {initial_len - clean_len} registros.")
+    telemetry.event('guardado', portal=portal_name, path=path, registros=clean_len, iniciales=initial_len)
+    print(f"💾 GUARDADO: {path} ({clean_len} regs)")
+    if indice is not None:
+        print(f"   🔤 {indexados} avisos indexados")
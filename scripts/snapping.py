@@ -0,0 +1,154 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.ops import substring
+
+# ================= CONFIGURACIÓN =================
+
+TOLERANCIA_ACCESO_M = 30    # Distancia máxima de un nodo al borde de un polígono para ser acceso
+EPS_M = 0.5                 # Proyecciones más cerca que esto de un extremo usan el nodo existente
+
+# ================= HERRAMIENTAS =================
+
+def _edge_list(G):
+    """Aristas del grafo como (u, v, key, data) + array de geometrías."""
+    if G.is_multigraph():
+        aristas = list(G.edges(keys=True, data=True))
+    else:
+        aristas = [(u, v, None, d) for u, v, d in G.edges(data=True)]
+    geoms = np.array([a[3]['geometry'] for a in aristas], dtype=object)
+    return aristas, geoms
+
+def _split_edge(G, arista, offsets, nodos_nuevos):
+    """
+    Reemplaza la arista por una cadena inicio -> p1 -> ... -> fin, con los
+    puntos ordenados por su posición sobre la geometría.
+    """
+    u, v, key, data = arista
+    geom = data['geometry']
+    inicio = tuple(geom.coords[0])
+    fin = v if inicio == u else u
+    inicio = u if inicio == u else v
+    escala = data['mm_len'] / geom.length if geom.length > 0 else 1.0
+
+    if key is None:
+        G.remove_edge(u, v)
+    else:
+        G.remove_edge(u, v, key)
+
+    cadena = [(inicio, 0.0)] + list(zip(nodos_nuevos, offsets)) + [(fin, geom.length)]
+    for (a, off_a), (b, off_b) in zip(cadena[:-1], cadena[1:]):
+        attrs = {k: val for k, val in data.items() if k not in ('geometry', 'mm_len')}
+        attrs['geometry'] = substring(geom, off_a, off_b)
+        attrs['mm_len'] = (off_b - off_a) * escala
+        G.add_edge(a, b, **attrs)
+
+# ================= SNAPPING =================
+
+def snap_points_to_edges(G, puntos):
+    """
+    Proyecta cada punto sobre la arista más cercana (STRtree) y parte la
+    arista en el punto proyectado, agregando un nodo al grafo (in place).
+
+    puntos: GeoSeries / array de Points en la misma proyección que G.
+    Retorna (nodos, dist_snap): el nodo de cada punto y la distancia
+    perpendicular entre el punto y la calle.
+    """
+    puntos = np.asarray(puntos, dtype=object)
+    aristas, geoms = _edge_list(G)
+    tree = STRtree(geoms)
+
+    # Búsqueda vectorizada: una arista por punto
+    idx_pts, idx_edge = tree.query_nearest(puntos, all_matches=False)
+    edge_de_punto = np.empty(len(puntos), dtype=int)
+    edge_de_punto[idx_pts] = idx_edge
+
+    geoms_sel = geoms[edge_de_punto]
+    offsets = shapely.line_locate_point(geoms_sel, puntos)
+    proyectados = shapely.line_interpolate_point(geoms_sel, offsets)
+    dist_snap = shapely.distance(puntos, proyectados)
+    coords = shapely.get_coordinates(proyectados)
+    largos = shapely.length(geoms_sel)
+
+    nodos = [None] * len(puntos)
+
+    # Agrupamos por arista para partir cada una una sola vez
+    orden = np.lexsort((offsets, edge_de_punto))
+    cortes = np.flatnonzero(np.diff(edge_de_punto[orden])) + 1
+    for grupo in np.split(orden, cortes):
+        arista = aristas[edge_de_punto[grupo[0]]]
+        u, v, _, data = arista
+        inicio_es_u = tuple(data['geometry'].coords[0]) == u
+
+        internos, offs_internos = [], []
+        for i in grupo:
+            off = offsets[i]
+            if off <= EPS_M:
+                nodos[i] = u if inicio_es_u else v
+            elif off >= largos[i] - EPS_M:
+                nodos[i] = v if inicio_es_u else u
+            else:
+                nodo = tuple(coords[i].tolist())
+                nodos[i] = nodo
+                # Puntos que proyectan al mismo lugar comparten nodo
+                if not internos or nodo != internos[-1]:
+                    internos.append(nodo)
+                    offs_internos.append(off)
+
+        if internos:
+            _split_edge(G, arista, offs_internos, internos)
+
+    return nodos, dist_snap
+
+def polygon_access_nodes(G, poligonos, tolerancia=TOLERANCIA_ACCESO_M):
+    """
+    Nodos de acceso de cada polígono (parques, plazas): todos los nodos del
+    grafo dentro del polígono o a menos de 'tolerancia' metros de su borde.
+    Los polígonos sin ningún nodo cercano se conectan por el punto de la
+    calle más cercana a su borde.
+
+    Retorna una lista de listas de nodos, alineada con 'poligonos'.
+    """
+    poligonos = np.asarray(poligonos, dtype=object)
+    nodos = list(G.nodes)
+    tree_nodos = STRtree(shapely.points(np.array(nodos, dtype=float)))
+
+    idx_pol, idx_nodo = tree_nodos.query(poligonos, predicate='dwithin', distance=tolerancia)
+    accesos = [[] for _ in range(len(poligonos))]
+    for p, n in zip(idx_pol, idx_nodo):
+        accesos[p].append(nodos[n])
+
+    # Fallback vectorizado: punto de la arista más cercana al polígono
+    sin_acceso = np.array([i for i, a in enumerate(accesos) if not a], dtype=int)
+    if len(sin_acceso):
+        _, geoms = _edge_list(G)
+        tree_edges = STRtree(geoms)
+        idx_in, idx_edge = tree_edges.query_nearest(poligonos[sin_acceso], all_matches=False)
+        lineas = shapely.shortest_line(geoms[idx_edge], poligonos[sin_acceso][idx_in])
+        en_calle = shapely.get_point(lineas, 0)
+        nodos_fallback, _ = snap_points_to_edges(G, en_calle)
+        for i, nodo in zip(sin_acceso[idx_in], nodos_fallback):
+            accesos[i] = [nodo]
+
+    return accesos
+
+def snap_layer(G, geometrias):
+    """
+    Nodos de acceso para una capa de POIs: los puntos se proyectan sobre la
+    calle y los polígonos usan sus accesos de borde.
+    Retorna una lista de listas de nodos, alineada con 'geometrias'.
+    """
+    geometrias = np.asarray(geometrias, dtype=object)
+    es_poligono = np.isin(shapely.get_type_id(geometrias), [3, 6])  # Polygon, MultiPolygon
+
+    accesos = [None] * len(geometrias)
+    if (~es_poligono).any():
+        idx = np.flatnonzero(~es_poligono)
+        nodos, _ = snap_points_to_edges(G, shapely.centroid(geometrias[idx]))
+        for i, nodo in zip(idx, nodos):
+            accesos[i] = [nodo]
+    if es_poligono.any():
+        idx = np.flatnonzero(es_poligono)
+        for i, nodos in zip(idx, polygon_access_nodes(G, geometrias[idx])):
+            accesos[i] = nodos
+    return accesos
@@ -0,0 +1,314 @@
+import os
+import time
+import socket
+import sqlite3
+import hashlib
+import itertools
+import argparse
+from datetime import datetime
+from contextlib import contextmanager
+
+from url_builder import consultas_fijas, url_pagina, PAGE_SIZE, MAX_PAGINAS
+from parsers import parse_zonaprop, parse_argenprop, parse_cabaprop, classify_page, PAGINA_RESULTADOS, PAGINA_VACIA, PAGINA_DESAFIO
+from scrape_store import ScrapeStore, write_task_part, load_task_records, load_records, save_data
+from scheduler import POLITICAS
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Cola durable de tareas (portal, consulta, página) en SQLite. Cualquier
+# cantidad de workers (en este host o en otros que compartan el directorio
+# data/) toma tareas con un lease; si un worker muere, su lease vence y otra
+# la retoma. Completar es idempotente: cada tarea escribe su propio archivo.
+# Sobre un filesystem de red conviene un lock confiable (NFSv4 / SMB): SQLite
+# usa locks de archivo y se deja en journal DELETE (WAL no funciona en red).
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+QUEUE_PATH = os.path.join(BASE_DATA_DIR, 'queue.sqlite')
+
+LEASE_S = 120           # Tiempo para cargar + parsear una página
+MAX_INTENTOS = 4
+REINTENTO_BASE_S = 30   # Espera antes de reintentar (se duplica por intento)
+ESPERA_VACIA_S = 5
+
+PARSERS = {
+    "zonaprop": parse_zonaprop,
+    "argenprop": parse_argenprop,
+    "cabaprop": parse_cabaprop,
+}
+
+class PaginaRechazada(Exception):
+    """La página cargó pero es un desafío anti-bot o un error (ver classify_page)."""
+    def __init__(self, clase):
+        super().__init__(clase)
+        self.clase = clase
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS tareas (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    portal TEXT NOT NULL,
+    consulta TEXT NOT NULL,
+    barrio TEXT, tipo TEXT,
+    pagina INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',   -- pendiente / en_curso / hecha / fallida
+    intentos INTEGER NOT NULL DEFAULT 0,
+    disponible_desde REAL NOT NULL DEFAULT 0,
+    lease_hasta REAL,
+    worker TEXT,
+    registros INTEGER,
+    error TEXT,
+    UNIQUE (fecha, portal, consulta, pagina)
+);
+CREATE INDEX IF NOT EXISTS tareas_estado ON tareas (estado, disponible_desde);
+-- Próximo turno por portal: la cortesía se respeta entre todos los workers
+CREATE TABLE IF NOT EXISTS turnos (
+    portal TEXT PRIMARY KEY,
+    proximo REAL NOT NULL DEFAULT 0
+);
+"""
+
+# ================= COLA =================
+
+def today():
+    """Fecha del día al momento de llamar: un worker con --esperar pasa la medianoche."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+def task_key(t):
+    """Clave estable de una tarea: nombre de su archivo de resultados."""
+    h = hashlib.sha1(t['consulta'].encode('utf-8')).hexdigest()[:12]
+    return f"{h}_p{t['pagina']}"
+
+class TaskQueue:
+    def __init__(self, path=QUEUE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(SCHEMA_SQL)
+
+    @contextmanager
+    def _tx(self):
+        # BEGIN IMMEDIATE: toma el lock de escritura antes de leer, así dos
+        # workers no pueden elegir la misma tarea
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, tareas, fecha=None):
+        """Inserta tareas [{portal, consulta, barrio, tipo, pagina, url}]; las repetidas se ignoran."""
+        fecha = fecha or today()
+        with self._tx() as c:
+            antes = c.total_changes
+            c.executemany(
+                "INSERT OR IGNORE INTO tareas (fecha, portal, consulta, barrio, tipo, pagina, url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(fecha, t['portal'], t['consulta'], t.get('barrio'), t.get('tipo'), t['pagina'], t['url']) for t in tareas]
+            )
+            return c.total_changes - antes
+
+    def lease(self, worker, portales=None, lease_s=LEASE_S, fecha=None):
+        """
+        Toma la próxima tarea disponible de un portal cuyo turno de cortesía
+        ya llegó (pendiente, o en curso con el lease vencido). None si no hay.
+        Una tarea que mata a su worker nunca llega a fail(): con el lease
+        vencido y los intentos agotados pasa acá a fallida.
+        """
+        ahora = time.time()
+        fecha = fecha or today()
+        with self._tx() as c:
+            agotadas = c.execute("""UPDATE tareas SET estado = 'fallida', lease_hasta = NULL,
+                                    error = COALESCE(error, 'lease vencido sin respuesta del worker')
+                                    WHERE fecha = ? AND estado = 'en_curso' AND lease_hasta < ? AND intentos >= ?""",
+                                 (fecha, ahora, MAX_INTENTOS)).rowcount
+            if agotadas:
+                telemetry.incr('cola_lease_agotado', agotadas)
+            filtro = f"AND t.portal IN ({','.join('?' * len(portales))})" if portales else ""
+            fila = c.execute(f"""
+                SELECT t.* FROM tareas t LEFT JOIN turnos p ON p.portal = t.portal
+                WHERE t.fecha = ? AND COALESCE(p.proximo, 0) <= ? {filtro}
+                  AND ((t.estado = 'pendiente' AND t.disponible_desde <= ?)
+                    OR (t.estado = 'en_curso' AND t.lease_hasta < ? AND t.intentos < ?))
+                ORDER BY t.pagina, t.id LIMIT 1
+            """, (fecha, ahora, *(portales or []), ahora, ahora, MAX_INTENTOS)).fetchone()
+            if fila is None:
+                return None
+            if fila['estado'] == 'en_curso':
+                telemetry.incr('cola_lease_vencido', portal=fila['portal'])
+            c.execute("""UPDATE tareas SET estado = 'en_curso', intentos = intentos + 1,
+                         lease_hasta = ?, worker = ? WHERE id = ?""", (ahora + lease_s, worker, fila['id']))
+            intervalo = POLITICAS.get(fila['portal'], {}).get('intervalo_s', 0)
+            c.execute("INSERT INTO turnos (portal, proximo) VALUES (?, ?) ON CONFLICT(portal) DO UPDATE SET proximo = excluded.proximo",
+                      (fila['portal'], ahora + intervalo))
+            return dict(fila, intentos=fila['intentos'] + 1)
+
+    def next_turn(self, portales=None):
+        """Segundos hasta el próximo turno libre (para dormir sin sondear la base)."""
+        filas = self.conn.execute("SELECT portal, proximo FROM turnos").fetchall()
+        proximos = [f['proximo'] for f in filas if not portales or f['portal'] in portales]
+        return max(0.0, min(proximos) - time.time()) if proximos else 0.0
+
+    def backoff(self, portal, espera_s):
+        """Corre el turno del portal para todos los workers (ej. tras un desafío)."""
+        with self._tx() as c:
+            c.execute("""INSERT INTO turnos (portal, proximo) VALUES (?, ?)
+                         ON CONFLICT(portal) DO UPDATE SET proximo = MAX(proximo, excluded.proximo)""",
+                      (portal, time.time() + espera_s))
+
+    def complete(self, tarea, worker, registros):
+        """Idempotente: si el lease ya pasó a otro worker, no pisa su estado."""
+        with self._tx() as c:
+            return c.execute("""UPDATE tareas SET estado = 'hecha', registros = ?, lease_hasta = NULL, error = NULL
+                                WHERE id = ? AND estado = 'en_curso' AND worker = ?""",
+                             (registros, tarea['id'], worker)).rowcount == 1
+
+    def fail(self, tarea, worker, error, espera_s=None):
+        """Vuelve a pendiente con espera exponencial, o fallida al agotar intentos."""
+        espera_s = REINTENTO_BASE_S * 2 ** (tarea['intentos'] - 1) if espera_s is None else espera_s
+        estado = 'fallida' if tarea['intentos'] >= MAX_INTENTOS else 'pendiente'
+        with self._tx() as c:
+            c.execute("""UPDATE tareas SET estado = ?, error = ?, disponible_desde = ?, lease_hasta = NULL
+                         WHERE id = ? AND worker = ?""",
+                      (estado, str(error)[:500], time.time() + espera_s, tarea['id'], worker))
+        return estado
+
+    def stats(self, fecha=None):
+        filas = self.conn.execute(
+            "SELECT portal, estado, COUNT(*) n, COALESCE(SUM(registros), 0) r FROM tareas WHERE fecha = ? GROUP BY portal, estado ORDER BY portal, estado",
+            (fecha or today(),)).fetchall()
+        return [dict(f) for f in filas]
+
+    def pending(self, fecha=None):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tareas WHERE fecha = ? AND estado IN ('pendiente', 'en_curso')", (fecha or today(),)
+        ).fetchone()[0]
+
+# ================= PRODUCTOR =================
+
+def tasks_for(portal, consultas, max_paginas=MAX_PAGINAS):
+    """
+    Tareas de las consultas de un portal. Con total conocido (plan del día)
+    se encolan todas las páginas; si no, solo la 1 y el worker agrega la
+    siguiente mientras haya resultados.
+    """
+    tareas = []
+    for c in consultas:
+        total = c.get('total')
+        paginas = min(max_paginas, -(-total // PAGE_SIZE[portal])) if total else 1
+        for n in range(1, paginas + 1):
+            tareas.append({'portal': portal, 'consulta': c['url'], 'barrio': c['barrio'], 'tipo': c['tipo'],
+                           'pagina': n, 'url': url_pagina(portal, c['url'], n)})
+    return tareas
+
+# ================= WORKER =================
+
+def run_task(driver, tarea):
+    """
+    Carga y parsea una página; escribe sus registros (en la fecha de la
+    tarea). Retorna los items.
+    Un desafío o error levanta PaginaRechazada (la tarea se reintenta).
+    """
+    portal = tarea['portal']
+    with telemetry.timer('page_load_ms', portal=portal):
+        driver.get(tarea['url'])
+    time.sleep(3)
+    html = driver.page_source
+    clase = classify_page(html, portal)
+    telemetry.incr('pagina_clase', portal=portal, clase=clase)
+    if clase == PAGINA_VACIA:
+        items = []
+    elif clase != PAGINA_RESULTADOS:
+        raise PaginaRechazada(clase)
+    else:
+        with telemetry.timer('parse_ms', portal=portal):
+            items = PARSERS[portal](html)
+
+    tipo_label = "PH" if tarea['tipo'] == 'ph' else "Departamento"
+    for item in items:
+        item.pop('Ubicacion', None)
+        item.update(Portal=portal, Barrio=tarea['barrio'], Tipo=tipo_label)
+    write_task_part(portal, tarea['fecha'], task_key(tarea), items)
+    return items
+
+def worker(cola, portales=None, esperar=False, fecha=None):
+    """Sin 'fecha' fija, cada vuelta trabaja la cola del día en curso."""
+    # selenium recién acá: encolar, estado y consolidar no abren navegador
+    from browser import setup_driver, close_driver
+    nombre = f"{socket.gethostname()}:{os.getpid()}"
+    driver = setup_driver()
+    print(f"👷 Worker {nombre}")
+    try:
+        while True:
+            dia = fecha or today()
+            tarea = cola.lease(nombre, portales, fecha=dia)
+            if tarea is None:
+                if not cola.pending(dia) and not esperar:
+                    break
+                espera = cola.next_turn(portales)
+                time.sleep(espera if espera > 0 else ESPERA_VACIA_S)
+                continue
+
+            try:
+                items = run_task(driver, tarea)
+            except Exception as e:
+                espera = None
+                if isinstance(e, PaginaRechazada) and e.clase == PAGINA_DESAFIO:
+                    # Un desafío es del sitio, no de la tarea: frena al portal entero
+                    cfg = POLITICAS.get(tarea['portal'], {})
+                    espera = min(cfg.get('backoff_base_s', REINTENTO_BASE_S) * 2 ** (tarea['intentos'] - 1),
+                                 cfg.get('backoff_max_s', REINTENTO_BASE_S * 2 ** MAX_INTENTOS))
+                    cola.backoff(tarea['portal'], espera)
+                estado = cola.fail(tarea, nombre, repr(e), espera)
+                telemetry.event('tarea_error', portal=tarea['portal'], url=tarea['url'], intento=tarea['intentos'], estado=estado, error=repr(e))
+                print(f"   ❌ {tarea['portal']} p{tarea['pagina']} ({estado}): {e}")
+                continue
+
+            if cola.complete(tarea, nombre, len(items)):
+                telemetry.incr('tareas_hechas', portal=tarea['portal'])
+                print(f"   ✅ {tarea['portal']} {tarea['barrio']} p{tarea['pagina']}: {len(items)}")
+            # Paginación dinámica: página llena -> probablemente hay otra (si ya estaba encolada se ignora)
+            if len(items) >= PAGE_SIZE[tarea['portal']] and tarea['pagina'] < MAX_PAGINAS:
+                siguiente = dict(tarea, pagina=tarea['pagina'] + 1, url=url_pagina(tarea['portal'], tarea['consulta'], tarea['pagina'] + 1))
+                cola.enqueue([siguiente], tarea['fecha'])
+    finally:
+        close_driver(driver)
+
+# ================= CLI =================
+
+def main():
+    parser = argparse.ArgumentParser(description="Cola de scraping distribuida (SQLite).")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_enc = sub.add_parser('encolar', help="Encola las consultas del día (plan guardado o producto fijo)")
+    p_wrk = sub.add_parser('worker', help="Toma y procesa tareas hasta vaciar la cola")
+    p_wrk.add_argument('--esperar', action='store_true', help="No salir con la cola vacía")
+    sub.add_parser('estado', help="Tareas por portal y estado")
+    sub.add_parser('consolidar', help="Escribe el CSV del día de cada portal")
+    for p in (p_enc, p_wrk):
+        p.add_argument('--portales', nargs='*', default=list(PARSERS), choices=list(PARSERS))
+    parser.add_argument('--cola', default=QUEUE_PATH)
+    parser.add_argument('--fecha', default=None, help="Por defecto, el día en curso (el worker la recalcula en cada vuelta)")
+    args = parser.parse_args()
+    cola = TaskQueue(args.cola)
+    fecha = args.fecha or today()
+
+    if args.cmd == 'encolar':
+        for portal in args.portales:
+            consultas = ScrapeStore(portal, fecha).load_plan() or consultas_fijas(portal)
+            n = cola.enqueue(tasks_for(portal, consultas), fecha)
+            print(f"📥 {portal}: {n} tareas nuevas ({len(consultas)} consultas)")
+    elif args.cmd == 'worker':
+        worker(cola, args.portales, args.esperar, args.fecha)
+    elif args.cmd == 'estado':
+        for f in cola.stats(fecha):
+            print(f"   {f['portal']:<10} {f['estado']:<10} {f['n']:>6} tareas {f['r']:>8} registros")
+    elif args.cmd == 'consolidar':
+        for portal in PARSERS:
+            # Se suman los registros del scraping secuencial del día, si lo hubo
+            save_data(itertools.chain(load_task_records(portal, fecha), load_records(portal, fecha)), portal, fecha)
+
+if __name__ == "__main__":
+    main()
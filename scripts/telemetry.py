@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+# ================= CONFIGURACIÓN =================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGS_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'logs')
+
+# Todas las etapas de una corrida comparten RUN_ID (el runner lo exporta)
+RUN_ID = os.environ.setdefault("TELEMETRY_RUN_ID", datetime.now().strftime("%Y-%m-%dT%H%M%S"))
+EVENTS_PATH = os.path.join(LOGS_DIR, f"telemetry_{RUN_ID}.jsonl")
+
+_lock = threading.Lock()
+_counters = {}
+_stats = {}
+
+# ================= REGISTRO =================
+
+def _key(nombre, etiquetas):
+    return (nombre, tuple(sorted(etiquetas.items())))
+
+def event(nombre, **campos):
+    """Escribe un evento JSONL (una línea por evento, en modo append)."""
+    registro = {'ts': round(time.time(), 3), 'run': RUN_ID, 'pid': os.getpid(), 'event': nombre}
+    registro.update(campos)
+    linea = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+    with _lock:
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        with open(EVENTS_PATH, 'a', encoding='utf-8') as f:
+            f.write(linea)
+
+def incr(nombre, n=1, **etiquetas):
+    """Contador en memoria; se vuelca en el resumen de la corrida."""
+    with _lock:
+        k = _key(nombre, etiquetas)
+        _counters[k] = _counters.get(k, 0) + n
+
+def observe(nombre, valor, **etiquetas):
+    """Acumula count/total/min/max de una medición sin escribir un evento por llamada."""
+    with _lock:
+        k = _key(nombre, etiquetas)
+        s = _stats.get(k)
+        if s is None:
+            _stats[k] = {'count': 1, 'total': valor, 'min': valor, 'max': valor}
+        else:
+            s['count'] += 1
+            s['total'] += valor
+            s['min'] = min(s['min'], valor)
+            s['max'] = max(s['max'], valor)
+
+@contextmanager
+def timer(nombre, emitir=False, **etiquetas):
+    """
+    Mide milisegundos de un bloque. Siempre se acumula en las estadísticas;
+    con emitir=True además queda un evento con el valor puntual.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - t0) * 1000
+        observe(nombre, ms, **etiquetas)
+        if emitir:
+            event(nombre, ms=round(ms, 2), **etiquetas)
+
+# ================= RESUMEN =================
+
+def summary(imprimir=True):
+    """
+    Vuelca contadores y estadísticas del proceso como evento 'summary' y los
+    reinicia (así el volcado automático al salir no los duplica).
+    """
+    with _lock:
+        counters = [{'name': n, 'tags': dict(t), 'value': v} for (n, t), v in _counters.items()]
+        stats = [{'name': n, 'tags': dict(t), **s} for (n, t), s in _stats.items()]
+        _counters.clear()
+        _stats.clear()
+    if not counters and not stats:
+        return
+    event('summary', script=os.path.basename(sys.argv[0]), counters=counters, stats=stats)
+    if imprimir:
+        # A stderr: stdout queda para la salida del script (JSON por línea, etc.)
+        _print_report(counters, stats, file=sys.stderr)
+
+def _fmt_tags(tags):
+    return " ".join(f"{k}={v}" for k, v in sorted(tags.items()))
+
+def _print_report(counters, stats, file=None):
+    print(f"\n📊 TELEMETRÍA ({RUN_ID})", file=file)
+    for c in sorted(counters, key=lambda c: (c['name'], _fmt_tags(c['tags']))):
+        print(f"   {c['name']:<28} {_fmt_tags(c['tags']):<36} {c['value']:>8}", file=file)
+    for s in sorted(stats, key=lambda s: (s['name'], _fmt_tags(s['tags']))):
+        media = s['total'] / s['count'] if s['count'] else 0
+        print(f"   {s['name']:<28} {_fmt_tags(s['tags']):<36} n={s['count']:<6} media={media:9.1f} max={s['max']:9.1f}", file=file)
+
+def report(path=EVENTS_PATH):
+    """Combina los resúmenes de todos los procesos de una corrida."""
+    counters, stats = {}, {}
+    with open(path, encoding='utf-8') as f:
+        for linea in f:
+            ev = json.loads(linea)
+            if ev['event'] != 'summary': continue
+            for c in ev['counters']:
+                k = _key(c['name'], c['tags'])
+                counters[k] = counters.get(k, 0) + c['value']
+            for s in ev['stats']:
+                k = _key(s['name'], s['tags'])
+                if k not in stats:
+                    stats[k] = {x: s[x] for x in ('count', 'total', 'min', 'max')}
+                else:
+                    acc = stats[k]
+                    acc['count'] += s['count']
+                    acc['total'] += s['total']
+                    acc['min'] = min(acc['min'], s['min'])
+                    acc['max'] = max(acc['max'], s['max'])
+    _print_report(
+        [{'name': n, 'tags': dict(t), 'value': v} for (n, t), v in counters.items()],
+        [{'name': n, 'tags': dict(t), **s} for (n, t), s in stats.items()],
+    )
+
+def disable_summary():
+    """Sin volcado al salir (comandos livianos: no escriben logs/ en cada llamada)."""
+    atexit.unregister(summary)
+
+atexit.register(summary)
+
+if __name__ == "__main__":
+    # Uso: python telemetry.py [logs/telemetry_<run>.jsonl]
+    report(sys.argv[1] if len(sys.argv) > 1 else max(
+        (os.path.join(LOGS_DIR, f) for f in os.listdir(LOGS_DIR) if f.startswith('telemetry_')),
+        key=os.path.getmtime
+    ))
@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import glob
+import sqlite3
+import hashlib
+import pandas as pd
+
+import normalize
+import schema
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Índice invertido de Titulo + Descripcion_Breve en SQLite: token -> avisos
+# con sus posiciones (para frases). Un aviso es su URL; reaparecer en otro CSV
+# solo actualiza su última fecha, y solo se re-tokeniza si cambió el texto.
+# Texto normalizado igual que clean_text, en minúsculas y sin acentos.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+INDEX_PATH = os.path.join(BASE_DATA_DIR, 'text_index.sqlite')
+PORTALES = ('zonaprop', 'argenprop', 'cabaprop')
+
+CAMPOS = ('Titulo', 'Descripcion_Breve')
+SALTO_CAMPO = 100     # Hueco de posiciones entre campos: una frase no cruza de título a descripción
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+CONSULTA_RE = re.compile(r'(-?)(?:"([^"]+)"|(\S+))')
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    portal TEXT, barrio TEXT, titulo TEXT,
+    primera TEXT, ultima TEXT,
+    huella TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    pos TEXT NOT NULL,          -- posiciones separadas por coma
+    PRIMARY KEY (token, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS ingeridos (archivo TEXT PRIMARY KEY);
+"""
+
+# ================= TEXTO =================
+
+def fold(serie):
+    """clean_text columnar + minúsculas + sin acentos (ñ -> n, como al buscar sin tildes)."""
+    s = normalize.clean_text(serie).fillna('').str.lower().str.normalize('NFKD')
+    return s.str.replace(r'[\u0300-\u036f]', '', regex=True)
+
+def tokenize(texto):
+    return TOKEN_RE.findall(texto)
+
+def _valores(df, col):
+    """Columna como lista de str / None (sqlite no acepta pd.NA)."""
+    if col not in df.columns:
+        return [None] * len(df)
+    return df[col].astype('string').astype(object).where(df[col].notna(), None).tolist()
+
+def _fold_str(texto):
+    return fold(pd.Series([texto])).iloc[0]
+
+# ================= ÍNDICE =================
+
+class TextIndex:
+    def __init__(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA_SQL)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, df, fecha):
+        """Indexa los avisos de un CSV / DataFrame del día. Retorna cuántos se (re)tokenizaron."""
+        if 'URL' not in df.columns or df.empty:
+            return 0
+        df = df.drop_duplicates('URL')
+        campos = [fold(df[c]) if c in df.columns else pd.Series('', index=df.index) for c in CAMPOS]
+        urls, portales, barrios, titulos = (_valores(df, c) for c in ('URL', 'Portal', 'Barrio', 'Titulo'))
+
+        cambiados, filas = 0, []
+        with self.conn:
+            existentes = {}
+            for i in range(0, len(urls), 500):
+                lote = [u for u in urls[i:i + 500] if u is not None]
+                if not lote: continue
+                q = f"SELECT id, url, huella, primera, ultima FROM docs WHERE url IN ({','.join('?' * len(lote))})"
+                existentes.update({f['url']: f for f in self.conn.execute(q, lote)})
+
+            for url, portal, barrio, titulo, *textos in zip(urls, portales, barrios, titulos, *campos):
+                if url is None: continue
+                huella = hashlib.sha1("\x1f".join(textos).encode('utf-8')).hexdigest()[:16]
+                previo = existentes.get(url)
+                if previo is not None:
+                    primera, ultima = min(previo['primera'], fecha), max(previo['ultima'], fecha)
+                    self.conn.execute("UPDATE docs SET primera = ?, ultima = ? WHERE id = ?", (primera, ultima, previo['id']))
+                    if previo['huella'] == huella: continue
+                    doc = previo['id']
+                    self.conn.execute("UPDATE docs SET huella = ?, titulo = ? WHERE id = ?", (huella, titulo, doc))
+                    self.conn.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+                else:
+                    doc = self.conn.execute(
+                        "INSERT INTO docs (url, portal, barrio, titulo, primera, ultima, huella) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url, portal, barrio, titulo, fecha, fecha, huella)).lastrowid
+
+                posiciones = {}
+                for n_campo, texto in enumerate(textos):
+                    for p, tok in enumerate(tokenize(texto), start=n_campo * SALTO_CAMPO):
+                        posiciones.setdefault(tok, []).append(p)
+                filas.extend((tok, doc, ",".join(map(str, ps))) for tok, ps in posiciones.items())
+                cambiados += 1
+            # Una sola inserción ordenada por token: recorre el árbol de postings en orden
+            filas.sort()
+            self.conn.executemany("INSERT INTO postings (token, doc, pos) VALUES (?, ?, ?)", filas)
+        telemetry.incr('indice_texto_docs', cambiados)
+        return cambiados
+
+    def ingest(self, base_dir=BASE_DATA_DIR, portales=PORTALES):
+        """Indexa los CSV diarios que todavía no se ingirieron (para armar el índice con la historia)."""
+        hechos = {f['archivo'] for f in self.conn.execute("SELECT archivo FROM ingeridos")}
+        pendientes = []
+        for portal in portales:
+            for path in glob.glob(os.path.join(base_dir, portal, f"{portal}_*.csv")):
+                m = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(path))
+                if m and os.path.basename(path) not in hechos:
+                    pendientes.append((m.group(1), path))
+        for fecha, path in sorted(pendientes):
+            n = self.add(schema.read_csv(path), fecha)
+            self.mark_ingested(path)
+            print(f"   🔤 {os.path.basename(path)}: {n} avisos indexados")
+        return len(pendientes)
+
+    def mark_ingested(self, path):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO ingeridos (archivo) VALUES (?)", (os.path.basename(path),))
+
+    # ================= CONSULTAS =================
+
+    def _postings(self, token):
+        return {f['doc']: f['pos'] for f in self.conn.execute("SELECT doc, pos FROM postings WHERE token = ?", (token,))}
+
+    def _docs_frase(self, tokens):
+        """Avisos con los tokens consecutivos (un solo token: su lista de postings)."""
+        listas = [self._postings(t) for t in tokens]
+        if not listas: return set()
+        # Se intersecta empezando por la lista más corta
+        candidatos = set(min(listas, key=len))
+        for l in listas:
+            candidatos &= l.keys()
+        if len(tokens) == 1:
+            return candidatos
+        res = set()
+        for doc in candidatos:
+            pos = [set(map(int, l[doc].split(','))) for l in listas]
+            if any(all(p + i in pos[i] for i in range(1, len(pos))) for p in pos[0]):
+                res.add(doc)
+        return res
+
+    def search(self, consulta, desde=None, hasta=None, limite=100):
+        """
+        Palabras sueltas (todas deben estar), "frases entre comillas" y
+        -exclusiones. desde/hasta filtran por fechas de aparición (YYYY-MM-DD).
+        """
+        incluir, excluir = [], []
+        for neg, frase, palabra in CONSULTA_RE.findall(consulta):
+            tokens = tokenize(_fold_str(frase or palabra))
+            if tokens:
+                (excluir if neg else incluir).append(tokens)
+        if not incluir:
+            raise ValueError("La consulta necesita al menos un término positivo")
+
+        with telemetry.timer('indice_texto_busqueda_ms'):
+            docs = set.intersection(*sorted((self._docs_frase(t) for t in incluir), key=len))
+            for tokens in excluir:
+                if not docs: break
+                docs -= self._docs_frase(tokens)
+
+            if not docs:
+                return []
+            filtro, params = "", []
+            if desde: filtro += " AND ultima >= ?"; params.append(desde)
+            if hasta: filtro += " AND primera <= ?"; params.append(hasta)
+            ids = sorted(docs)
+            filas = []
+            for i in range(0, len(ids), 900):
+                lote = ids[i:i + 900]
+                filas += self.conn.execute(
+                    f"SELECT url, portal, barrio, titulo, primera, ultima FROM docs WHERE id IN ({','.join('?' * len(lote))}){filtro}",
+                    lote + params).fetchall()
+        filas.sort(key=lambda f: f['ultima'], reverse=True)
+        return [dict(f) for f in filas[:limite]]
+
+if __name__ == "__main__":
+    # Uso: python text_index.py                       -> indexa los CSV pendientes
+    #      python text_index.py 'luminoso "apto mascotas" -monoambiente'
+    indice = TextIndex()
+    if len(sys.argv) == 1:
+        print(f"📚 {indice.ingest()} archivos nuevos")
+    else:
+        resultados = indice.search(" ".join(sys.argv[1:]))
+        for r in resultados:
+            print(f"   {r['ultima']} {r['portal']:<10} {r['barrio'] or '':<14} {(r['titulo'] or '')[:60]:<60} {r['url']}")
+        print(f"🔎 {len(resultados)} avisos")
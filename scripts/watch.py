@@ -0,0 +1,228 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import urllib.request
+from datetime import datetime
+import pandas as pd
+
+from url_builder import generar_todas_urls, consultas_fijas, FILTROS_EXCLUSION
+from parsers import parse_zonaprop, parse_argenprop, parse_cabaprop, classify_page, PAGINAS_REINTENTABLES
+from scheduler import PortalScheduler
+import normalize
+import schema
+import telemetry
+
+# ================= CONFIGURACIÓN =================
+# Modo vigilancia: re-lee solo la página 1 de cada consulta cada INTERVALO_S
+# y avisa de los avisos nuevos que pasan los filtros del scraping diario.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
+WATCH_DIR = os.path.join(BASE_DATA_DIR, 'watch')
+STATE_PATH = os.path.join(WATCH_DIR, 'watch_state.json')
+ALERTAS_PATH = os.path.join(WATCH_DIR, 'alertas.jsonl')
+
+INTERVALO_S = 300
+# Avisos vistos: URL -> última vez que apareció. Se olvidan los que no
+# reaparecen en VISTOS_DIAS, y nunca se guardan más de VISTOS_MAX
+VISTOS_DIAS = 30
+VISTOS_MAX = 50_000
+WEBHOOK_URL = os.environ.get("ALQUILER_WEBHOOK_URL")
+
+PARSERS = {
+    "zonaprop": parse_zonaprop,
+    "argenprop": parse_argenprop,
+    "cabaprop": parse_cabaprop,
+}
+
+# Huella barata de la página: los identificadores de los avisos listados, sin
+# armar el DOM. Banners, tokens y contadores cambian en cada carga y no
+# deben disparar un re-parseo.
+HUELLAS = {
+    "zonaprop": re.compile(r'"postingId"\s*:\s*"?(\d+)|data-id="(\d+)"'),
+    "argenprop": re.compile(r'href="(/[^"?#]+--\d+)"'),
+    "cabaprop": re.compile(r'href="([^"?#]*/propiedad[^"?#]*)"'),
+}
+SCRIPTS_RE = re.compile(r'<script\b.*?</script>|<style\b.*?</style>', re.S | re.I)
+
+# ================= ESTADO =================
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {'hashes': {}, 'vistos': {}}
+    with open(STATE_PATH, encoding='utf-8') as f:
+        state = json.load(f)
+    if isinstance(state['vistos'], list):
+        # Formato anterior (lista de URLs): se toman como vistas ahora
+        ahora = time.time()
+        state['vistos'] = {u: ahora for u in state['vistos']}
+    return state
+
+def prune_seen(vistos, dias=VISTOS_DIAS, maximo=VISTOS_MAX):
+    """Olvida (in place) los avisos que no aparecen hace 'dias' y recorta a los 'maximo' más recientes."""
+    limite = time.time() - dias * 86400
+    viejos = [u for u, t in vistos.items() if t < limite]
+    if len(vistos) - len(viejos) > maximo:
+        viejos = sorted(vistos, key=vistos.get)[:len(vistos) - maximo]
+    for u in viejos:
+        del vistos[u]
+    telemetry.incr('watch_vistos_olvidados', len(viejos))
+
+def save_state(hashes, vistos):
+    os.makedirs(WATCH_DIR, exist_ok=True)
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'hashes': hashes, 'vistos': vistos}, f, ensure_ascii=False)
+    os.replace(tmp, STATE_PATH)
+
+def seed_seen(portales):
+    """URLs del último CSV de cada portal: lo ya scrapeado no es novedad."""
+    vistos = set()
+    for portal in portales:
+        archivos = sorted(glob.glob(os.path.join(BASE_DATA_DIR, portal, f"{portal}_*.csv")))
+        if not archivos: continue
+        df = pd.read_csv(archivos[-1], sep=';', usecols=lambda c: c == 'URL', dtype='string', encoding='utf-8-sig')
+        if 'URL' in df.columns:
+            vistos.update(df['URL'].dropna())
+    return vistos
+
+def page_hash(portal, html):
+    ids = [m if isinstance(m, str) else "".join(m) for m in HUELLAS[portal].findall(html)]
+    if ids:
+        base = "\n".join(sorted(set(ids)))
+    else:
+        # Sin identificadores reconocibles: el HTML sin scripts ni estilos
+        base = SCRIPTS_RE.sub('', html)
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+# ================= AVISOS =================
+
+def notify(avisos, webhook_url=WEBHOOK_URL):
+    """Sinks: consola, alertas.jsonl y (opcional) un webhook que recibe un POST JSON."""
+    os.makedirs(WATCH_DIR, exist_ok=True)
+    with open(ALERTAS_PATH, 'a', encoding='utf-8') as f:
+        for a in avisos:
+            f.write(json.dumps(a, ensure_ascii=False, default=str) + "\n")
+    for a in avisos:
+        print(f"   🔔 {a.get('Portal')} | {a.get('Barrio')} | ${a.get('Precio')} + {a.get('Expensas') or 0} | {a.get('Direccion', '')} -> {a.get('URL')}")
+
+    if webhook_url:
+        body = json.dumps({'avisos': avisos}, ensure_ascii=False, default=str).encode('utf-8')
+        req = urllib.request.Request(webhook_url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                resp.read()
+        except Exception as e:
+            telemetry.event('webhook_error', error=repr(e))
+            print(f"   ⚠️ Webhook: {e}")
+    telemetry.incr('alertas', len(avisos))
+
+def filter_new(items):
+    """Normaliza las cards nuevas y aplica los mismos filtros que save_data."""
+    df = normalize.normalize(pd.DataFrame(items))
+    ok = ~normalize.mask_excluded(df, FILTROS_EXCLUSION) & normalize.mask_valid_price(df)
+    df = df[ok]
+    campos = [c for c in schema.CORE_COLUMNS if c in df.columns]
+    return [
+        {k: (None if pd.isna(v) else v.item() if hasattr(v, 'item') else v) for k, v in fila.items()}
+        for fila in df[campos].to_dict('records')
+    ]
+
+# ================= LOOP =================
+
+def poll(driver, scheduler, consultas, hashes, vistos, alertar=True):
+    """Una pasada por la página 1 de cada consulta. Retorna los avisos alertados."""
+    alertados = []
+    for c in consultas:
+        portal, url = c['portal'], c['url']
+        try:
+            with scheduler.request(portal), telemetry.timer('watch_load_ms', portal=portal):
+                driver.get(url)
+            time.sleep(2)
+            html = driver.page_source
+        except Exception as e:
+            telemetry.event('watch_error', portal=portal, url=url, error=repr(e))
+            continue
+        telemetry.incr('watch_polls', portal=portal)
+
+        # Un desafío, error o página desconocida no cambia la huella guardada: se reintenta en la próxima pasada
+        clase = classify_page(html, portal)
+        telemetry.incr('pagina_clase', portal=portal, clase=clase)
+        if clase in PAGINAS_REINTENTABLES:
+            scheduler.penalize(portal, motivo=clase)
+            continue
+        scheduler.reward(portal)
+
+        digest = page_hash(portal, html)
+        if hashes.get(url) == digest:
+            telemetry.incr('watch_sin_cambios', portal=portal)
+            continue
+        hashes[url] = digest
+
+        with telemetry.timer('parse_ms', portal=portal):
+            items = PARSERS[portal](html)
+        nuevos, ahora = [], time.time()
+        for item in items:
+            if not item.get('URL'): continue
+            es_nuevo = item['URL'] not in vistos
+            # Un aviso que sigue publicado renueva su fecha y no se olvida
+            vistos[item['URL']] = ahora
+            if not es_nuevo: continue
+            item.pop('Ubicacion', None)
+            item.update(Portal=portal, Barrio=c['barrio'], Tipo="PH" if c['tipo'] == 'ph' else "Departamento")
+            nuevos.append(item)
+        telemetry.incr('watch_nuevos', len(nuevos), portal=portal)
+
+        if nuevos and alertar:
+            avisos = filter_new(nuevos)
+            if avisos:
+                notify(avisos)
+                alertados.extend(avisos)
+    return alertados
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigila la página 1 de cada consulta y avisa de publicaciones nuevas.")
+    parser.add_argument('--intervalo', type=int, default=INTERVALO_S, help="Segundos entre pasadas")
+    parser.add_argument('--portales', nargs='*', default=list(PARSERS), choices=list(PARSERS))
+    parser.add_argument('--una-vez', action='store_true', help="Una sola pasada (ej. desde cron)")
+    args = parser.parse_args()
+
+    urls_dict = generar_todas_urls()
+    consultas = [dict(c, portal=p) for p in args.portales for c in consultas_fijas(p, urls_dict)]
+    state = load_state()
+    hashes = state['hashes']
+    semilla = seed_seen(args.portales)
+    # Sin estado ni CSV previos, la primera pasada solo arma la línea de base
+    primera = not state['vistos'] and not semilla
+    # Lo que está en el último CSV sigue publicado: renueva su fecha
+    vistos = state['vistos']
+    vistos.update(dict.fromkeys(semilla, time.time()))
+
+    # selenium recién acá: el resto del módulo (estado, huellas) se usa sin navegador
+    from browser import setup_driver, close_driver, kill_stale_browser
+    kill_stale_browser()
+    driver = setup_driver()
+    scheduler = PortalScheduler()
+    try:
+        while True:
+            t0 = time.perf_counter()
+            alertados = poll(driver, scheduler, consultas, hashes, vistos, alertar=not primera)
+            primera = False
+            prune_seen(vistos)
+            save_state(hashes, vistos)
+            print(f"[{datetime.now():%H:%M:%S}] 👀 {len(consultas)} consultas, {len(alertados)} alertas ({time.perf_counter() - t0:.0f} s)")
+            if args.una_vez: break
+            time.sleep(max(0, args.intervalo - (time.perf_counter() - t0)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        save_state(hashes, vistos)
+        close_driver(driver)
+
+if __name__ == "__main__":
+    main()
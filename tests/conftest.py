@@ -0,0 +1,33 @@
+import os
+import sys
+
+# Los módulos de scripts/ se importan entre sí por nombre (y con los alias de la CLI)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+
+from alquiler_finder.cli import _AliasFinder
+
+if not any(isinstance(f, _AliasFinder) for f in sys.meta_path):
+    sys.meta_path.insert(0, _AliasFinder())
+
+# Los tests no escriben en logs/ ni imprimen el resumen de telemetría al salir
+import tempfile
+import telemetry
+
+telemetry.EVENTS_PATH = os.path.join(tempfile.mkdtemp(prefix='telemetry_'), 'telemetry.jsonl')
+telemetry.disable_summary()
+
+import pytest
+
+@pytest.fixture
+def ciudad():
+    """Ciudad sintética chica del benchmark: calles (con tramos partidos), POIs y avisos."""
+    import numpy as np
+    import benchmark
+    rng = np.random.default_rng(0)
+    lado = 12
+    calles = benchmark.synthetic_streets(lado, rng)
+    capas = benchmark.synthetic_pois(lado, rng)
+    avisos = benchmark.synthetic_listings(150, lado, rng)
+    return calles, capas, avisos
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ('pandas', 'geopandas', 'selenium', 'folium', 'numpy')
+
+def _correr(codigo, cwd=ROOT_DIR):
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    return subprocess.run([sys.executable, '-c', codigo], cwd=cwd, env=env, capture_output=True, text=True)
+
+def _modulos_cargados(argv):
+    """Corre la CLI en un proceso nuevo y devuelve qué módulos pesados quedaron importados."""
+    codigo = (
+        "import sys\nfrom alquiler_finder import cli\n"
+        f"try:\n    cli.main({argv!r})\nexcept SystemExit:\n    pass\n"
+        f"print('MODULOS', [m for m in {PESADOS!r} if m in sys.modules])"
+    )
+    proc = _correr(codigo)
+    assert proc.returncode == 0, proc.stderr
+    linea = [l for l in proc.stdout.splitlines() if l.startswith('MODULOS')][-1]
+    return eval(linea.split(' ', 1)[1])
+
+def test_help_no_importa_dependencias_pesadas():
+    assert _modulos_cargados(['--help']) == []
+
+def test_urls_no_importa_dependencias_pesadas():
+    assert _modulos_cargados(['urls', '--portal', 'zonaprop']) == []
+
+def test_parse_ruta_relativa_y_stdout_json(tmp_path):
+    (tmp_path / 'pagina.html').write_text('<html><body><li class="listing__item"></li></body></html>', encoding='utf-8')
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    proc = subprocess.run([sys.executable, '-m', 'alquiler_finder', 'parse', 'argenprop', 'pagina.html'],
+                          cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    # stdout son solo cards JSON (el resumen de telemetría no se mezcla)
+    for linea in proc.stdout.splitlines():
+        json.loads(linea)
+    assert 'pagina.html' in proc.stderr
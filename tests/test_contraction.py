@@ -0,0 +1,70 @@
+import numpy as np
+import networkx as nx
+import momepy
+import pytest
+
+from snapping import snap_points_to_edges, snap_layer
+from routing import poi_distances
+from contraction import contract_degree2, resolve
+from isochrones import build_isochrones
+
+@pytest.fixture
+def red(ciudad):
+    """Grafo con avisos y POIs ya proyectados, y su versión contraída conservando los accesos."""
+    calles, capas, avisos = ciudad
+    G = momepy.gdf_to_nx(calles, approach='primal')
+    nodos_org, _ = snap_points_to_edges(G, avisos.geometry.to_numpy())
+    nodos_por_capa = {c: snap_layer(G, g.geometry.to_numpy()) for c, g in capas.items()}
+    fuentes = {n for accesos in nodos_por_capa.values() for nodos in accesos for n in nodos}
+    H, cadenas = contract_degree2(G, keep=fuentes)
+    return G, H, cadenas, nodos_org, nodos_por_capa, fuentes
+
+def test_grafo_mas_chico_y_mismo_largo(red):
+    G, H, cadenas, *_ = red
+    assert H.number_of_nodes() < G.number_of_nodes()
+    assert H.number_of_nodes() + len(cadenas) == G.number_of_nodes()
+    assert sum(d['mm_len'] for *_, d in H.edges(data=True)) == pytest.approx(sum(d['mm_len'] for *_, d in G.edges(data=True)))
+    # Solo quedan cruces, puntas y fuentes
+    fuentes = red[5]
+    assert all(G.degree(n) != 2 or n in fuentes for n in H.nodes)
+
+def test_distancias_exactas_desde_fuentes(red):
+    G, H, cadenas, _, _, fuentes = red
+    nodos = list(G.nodes)
+    for fuente in sorted(fuentes)[:10]:
+        d0 = nx.single_source_dijkstra_path_length(G, fuente, weight='mm_len')
+        d1 = nx.single_source_dijkstra_path_length(H, fuente, weight='mm_len')
+        esperado = np.array([d0.get(n, np.nan) for n in nodos])
+        np.testing.assert_allclose(resolve(d1, cadenas, nodos), esperado, rtol=0, atol=1e-6)
+
+@pytest.mark.parametrize('backend', ['por_poi', 'por_origen'])
+def test_poi_distances_igual_que_sin_contraer(red, backend):
+    G, H, cadenas, nodos_org, nodos_por_capa, _ = red
+    for capa, accesos in nodos_por_capa.items():
+        d0, c0 = poi_distances(G, nodos_org, accesos, backend=backend, capa=capa)
+        d1, c1 = poi_distances(H, nodos_org, accesos, backend=backend, capa=capa, cadenas=cadenas)
+        np.testing.assert_allclose(d1, d0, rtol=0, atol=1e-6)
+        np.testing.assert_array_equal(c1, c0)
+    # El backend por origen saca del grafo las fuentes que re-conecta
+    assert H.number_of_nodes() + len(cadenas) == G.number_of_nodes()
+
+def test_isocronas_casi_iguales(red, ciudad):
+    G, H, _, _, nodos_por_capa, _ = red
+    _, capas, _ = ciudad
+    capa = {'gym': capas['gym']}
+    i0 = build_isochrones(G, capa, {'gym': nodos_por_capa['gym']})
+    i1 = build_isochrones(H, capa, {'gym': nodos_por_capa['gym']})
+    dif = i0.union_all().symmetric_difference(i1.union_all()).area
+    assert dif <= 0.01 * i0.union_all().area
+
+def test_ciclo_sin_nodos_conservados():
+    # Una rotonda suelta: todos sus nodos son de grado 2
+    import shapely
+    import geopandas as gpd
+    cuadrado = [(0, 0), (100, 0), (100, 100), (0, 100)]
+    tramos = [shapely.LineString([a, b]) for a, b in zip(cuadrado, cuadrado[1:] + cuadrado[:1])]
+    G = momepy.gdf_to_nx(gpd.GeoDataFrame(geometry=tramos), approach='primal')
+    H, cadenas = contract_degree2(G)
+    assert H.number_of_nodes() == 1 and len(cadenas) == 3
+    d = nx.single_source_dijkstra_path_length(H, next(iter(H.nodes)), weight='mm_len')
+    np.testing.assert_allclose(sorted(resolve(d, cadenas, list(G.nodes))), [0, 100, 100, 200])
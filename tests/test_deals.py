@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import pytest
+
+import deals
+
+@pytest.fixture
+def avisos(ciudad):
+    _, _, avisos = ciudad
+    avisos = avisos.copy()
+    avisos['Tipo'] = np.where(np.arange(len(avisos)) % 3 == 0, 'PH', 'Departamento')
+    # Un duplicado exacto (el mismo aviso en dos portales)
+    return pd.concat([avisos, avisos.iloc[[5]]], ignore_index=True)
+
+def _fuerza_bruta(df, k=deals.K):
+    """Mediana de costo de los k vecinos (sin el propio aviso) comparando contra todos los del mismo Tipo."""
+    X = deals.features(df)
+    costo = df['costo_total'].to_numpy(dtype=float)
+    res = np.full(len(df), np.nan)
+    for tipo in df['Tipo'].unique():
+        idx = np.flatnonzero(df['Tipo'].to_numpy() == tipo)
+        d = np.linalg.norm(X[idx][:, None] - X[idx][None], axis=-1)
+        np.fill_diagonal(d, np.inf)
+        cerca = np.argsort(d, axis=1, kind='stable')[:, :k]
+        confiable = np.take_along_axis(d, cerca, 1)[:, -1] <= deals.MAX_DIST
+        res[idx] = np.where(confiable, np.exp(np.median(np.log(costo[idx][cerca]), axis=1)), np.nan)
+    return res
+
+def test_mediana_de_vecinos_igual_a_fuerza_bruta(avisos):
+    res = deals.score(avisos)
+    np.testing.assert_allclose(res['costo_vecinos'], np.round(_fuerza_bruta(avisos)), equal_nan=True)
+    assert res.index.equals(avisos.index)
+
+def test_aviso_barato_para_su_zona_es_oportunidad(avisos):
+    # Mismo lugar y superficie que otro aviso, a un tercio de su costo
+    barato = avisos.iloc[[10]].assign(costo_total=avisos['costo_total'].median() / 3)
+    df = pd.concat([avisos, barato], ignore_index=True)
+    res = deals.score(df)
+    assert res['Oportunidad'].iloc[-1]
+    assert res['ratio_vecinos'].iloc[-1] < deals.RATIO_UMBRAL and res['z_vecinos'].iloc[-1] < deals.Z_UMBRAL
+    # Precios al azar en la misma ciudad: casi nadie es oportunidad
+    assert res['Oportunidad'].iloc[:-1].mean() < 0.05
+
+def test_sin_comparables_cerca_o_sin_datos_queda_nulo(avisos):
+    lejos = avisos.iloc[[0]].copy()
+    lejos.geometry = gpd.GeoSeries([shapely.Point(0, 0)], crs=avisos.crs, index=lejos.index)
+    sin_costo = avisos.iloc[[1]].assign(costo_total=0)
+    df = pd.concat([avisos, lejos, sin_costo], ignore_index=True)
+    res = deals.score(df)
+    assert res.iloc[-2:][['costo_vecinos', 'ratio_vecinos', 'z_vecinos']].isna().all().all()
+    assert not res['Oportunidad'].iloc[-2:].any()
+
+def test_imputa_superficie_por_ambientes():
+    df = gpd.GeoDataFrame({'Metros_Cubiertos': [40, 60, None, 0], 'Ambientes': [2, 3, 3, 2]},
+                          geometry=gpd.points_from_xy([0] * 4, [0] * 4), crs=f"EPSG:{deals.PROYECCION}")
+    X = deals.features(df)
+    # Faltante y cero toman la superficie de los de su misma cantidad de ambientes
+    np.testing.assert_allclose(np.exp(X[:, 2] * deals.ESCALA_METROS_LOG), [40, 60, 60, 40])
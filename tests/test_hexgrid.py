@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import shapely
+import momepy
+import pytest
+
+import hexgrid
+
+def _puntos(n, semilla):
+    # Alrededor de Buenos Aires en EPSG:22185 (coordenadas grandes, como en el mapa)
+    rng = np.random.default_rng(semilla)
+    return 5_640_000 + rng.uniform(0, 5_000, n), 6_170_000 + rng.uniform(0, 5_000, n)
+
+@pytest.mark.parametrize('tamano', hexgrid.TAMANOS_M)
+def test_cada_punto_cae_en_su_hexagono(tamano):
+    x, y = _puntos(5_000, tamano)
+    ids = hexgrid.cell_ids(x, y, tamano)
+    assert shapely.covers(hexgrid.polygons(ids), shapely.points(x, y)).all()
+    t, q, r = hexgrid.unpack(ids)
+    assert (t == tamano).all()
+    np.testing.assert_array_equal(hexgrid.pack(q, r, tamano), ids)
+
+@pytest.mark.parametrize('tamano', [100, 250])
+def test_disco_contiene_las_celdas_del_radio(tamano):
+    x, y = _puntos(5_000, 1)
+    cx, cy, radio = x[0], y[0], 700
+    dentro = np.hypot(x - cx, y - cy) <= radio
+    celdas = hexgrid.disk(cx, cy, radio, tamano)
+    assert np.isin(hexgrid.cell_ids(x[dentro], y[dentro], tamano), celdas).all()
+
+def test_agregados_iguales_a_pandas():
+    x, y = _puntos(2_000, 2)
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'costo_total': rng.integers(300, 900, len(x)) * 1000.0,
+                       'distancia_m_subte': np.where(rng.random(len(x)) < 0.2, np.nan, rng.uniform(0, 2_000, len(x)))})
+    df['hex_500'] = hexgrid.cell_ids(x, y, 500)
+    res = hexgrid.aggregate(df, 500).set_index('hex')
+    esperado = df.groupby('hex_500').agg(avisos=('costo_total', 'size'), mediana=('costo_total', 'median'),
+                                         subte=('distancia_m_subte', 'mean'))
+    assert res['avisos'].sum() == len(df)
+    np.testing.assert_array_equal(res.loc[esperado.index, 'avisos'], esperado['avisos'])
+    np.testing.assert_allclose(res.loc[esperado.index, 'costo_total_mediana'], esperado['mediana'])
+    np.testing.assert_allclose(res.loc[esperado.index, 'distancia_m_subte_media'], esperado['subte'])
+
+def test_nodos_de_la_calle_por_celda(ciudad):
+    calles, _, _ = ciudad
+    G = momepy.gdf_to_nx(calles, approach='primal')
+    xy = np.array(list(G.nodes), dtype=float)
+    ids = hexgrid.node_cells(G, 250)
+    # Alineado con list(G.nodes)
+    np.testing.assert_array_equal(ids, hexgrid.cell_ids(xy[:, 0], xy[:, 1], 250))
+    acceso = pd.DataFrame({'min_destino': xy[:, 0] / 100, 'hex_250': ids})
+    res = hexgrid.aggregate(acceso, 250, agregados=hexgrid.AGREGADOS_NODOS)
+    assert res['nodos'].sum() == G.number_of_nodes()
+    assert set(res.columns) >= {'hex', 'nodos', 'min_destino_mediana', 'tamano_m', 'geometry'}
@@ -0,0 +1,70 @@
+import json
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import folium
+from folium import plugins
+import pytest
+
+import map_builder
+from map_builder import compact_geojson, PayloadBudget, circle_layer, NIVELES
+
+def _avisos(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return gpd.GeoDataFrame({
+        'Precio': pd.array(np.where(rng.random(n) < 0.2, None, rng.integers(300, 900, n) * 1000), dtype='Int64'),
+        'Barrio': rng.choice(['palermo', 'belgrano'], n),
+        'Oculta': np.arange(n),
+        'color_map': '#1a9850',
+    }, geometry=gpd.points_from_xy(-58.43 + rng.uniform(-0.05, 0.05, n), -34.58 + rng.uniform(-0.05, 0.05, n)),
+        crs="EPSG:4326")
+
+def _calles(n, semilla=0):
+    # Líneas con muchos vértices en la proyección métrica: simplificar sí achica
+    rng = np.random.default_rng(semilla)
+    x0, y0 = 5_630_000, 6_160_000
+    lineas = [shapely.LineString(np.column_stack([np.linspace(0, 500, 200) + x0 + 600 * i,
+                                                  y0 + rng.normal(0, 1, 200)])) for i in range(n)]
+    return gpd.GeoDataFrame(geometry=lineas, crs=f"EPSG:{map_builder.PROYECCION_M}")
+
+def test_solo_campos_pedidos_y_precision_reducida():
+    gdf = _avisos(50)
+    gj = json.loads(compact_geojson(gdf, ['Precio', 'Barrio', 'NoExiste'], decimales=4))
+    assert len(gj['features']) == 50
+    for f, precio in zip(gj['features'], gdf['Precio']):
+        assert set(f['properties']) == {'Precio', 'Barrio'}
+        # Int64 con nulos -> número o null
+        assert f['properties']['Precio'] == (None if pd.isna(precio) else float(precio))
+        for c in f['geometry']['coordinates']:
+            assert c == pytest.approx(round(c, 4), abs=1e-9)
+
+def test_simplificar_achica_y_respeta_la_tolerancia():
+    gdf = _calles(5)
+    fiel = compact_geojson(gdf, [], 0, 6)
+    simple = compact_geojson(gdf, [], 10, 6)
+    assert len(simple) < len(fiel) / 5
+    vuelta = gpd.read_file(simple).set_crs(epsg=4326, allow_override=True).to_crs(epsg=map_builder.PROYECCION_M)
+    # Simplificar mueve la línea a lo sumo la tolerancia (más el redondeo de coordenadas)
+    assert (gdf.geometry.hausdorff_distance(vuelta.geometry) <= 10 + 1).all()
+
+def test_presupuesto_elige_el_primer_nivel_que_entra():
+    gdf = _calles(20)
+    tamanos = [len(compact_geojson(gdf, [], t, d)) for t, d in NIVELES]
+    presupuesto = PayloadBudget(total=tamanos[2] + 1)
+    gj = presupuesto.fit('Calles', gdf, [], cuota=1.0)
+    assert len(gj) == tamanos[2] and presupuesto.usado == {'Calles': tamanos[2]}
+    # Si no entra ni el más agresivo, queda el último nivel y el reporte lo marca
+    chico = PayloadBudget(total=10)
+    assert len(chico.fit('Calles', gdf, [], cuota=1.0)) == tamanos[-1]
+    assert chico.report() > chico.total
+
+def test_capa_de_puntos_se_agrupa_por_encima_del_umbral(monkeypatch):
+    gj = compact_geojson(_avisos(30), ['Precio', 'color_map'])
+    assert isinstance(circle_layer(gj, 'Avisos', 'color_map', tooltip_campos=['Precio']), folium.GeoJson)
+    monkeypatch.setattr(map_builder, 'UMBRAL_CLUSTER', 10)
+    capa = circle_layer(gj, 'Avisos', 'color_map', tooltip_campos=['Precio'])
+    assert isinstance(capa, plugins.FastMarkerCluster)
+    assert len(capa.data) == 30
+    # [lat, lon, color, tooltip...]
+    assert capa.data[0][2] == '#1a9850' and len(capa.data[0]) == 4
@@ -0,0 +1,71 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_stats import QuantileSketch, MarketStats, ALPHA, market_frame
+
+CUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+def _precios(n, semilla):
+    # Log-normal como los alquileres: cola larga a la derecha
+    return np.random.default_rng(semilla).lognormal(np.log(600_000), 0.5, n).round()
+
+@pytest.mark.parametrize('n', [1, 10, 1_000, 50_000])
+def test_cuantiles_con_error_relativo_alpha(n):
+    x = _precios(n, n)
+    sk = QuantileSketch()
+    sk.add(x)
+    for q in CUANTILES:
+        # El sketch devuelve el valor de rango floor(q * (n - 1)): method='lower'
+        exacto = np.quantile(x, q, method='lower')
+        assert abs(sk.quantile(q) - exacto) <= ALPHA * exacto * (1 + 1e-9), q
+
+def test_merge_igual_a_un_solo_sketch():
+    a, b = _precios(3_000, 1), _precios(5_000, 2)
+    junto, sa, sb = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    junto.add(np.concatenate([a, b])); sa.add(a); sb.add(b)
+    sa.merge(sb)
+    assert sa.buckets == junto.buckets and sa.count == junto.count
+    assert sa.mean() == pytest.approx(np.concatenate([a, b]).mean())
+
+def test_ceros_nan_y_negativos():
+    sk = QuantileSketch()
+    sk.add([0, 0, np.nan, -5, 100, 200])
+    assert sk.count == 4
+    assert sk.quantile(0.25) == 0.0
+    assert abs(sk.quantile(1.0) - 200) <= ALPHA * 200
+
+def test_ida_y_vuelta_json():
+    sk = QuantileSketch()
+    sk.add(_precios(2_000, 3))
+    otro = QuantileSketch.from_dict(json.loads(json.dumps(sk.to_dict())))
+    assert [otro.quantile(q) for q in CUANTILES] == [sk.quantile(q) for q in CUANTILES]
+
+def test_etiquetas_combinadas_no_son_barrio():
+    df = pd.DataFrame({'Barrio': ['Palermo', 'palermo|belgrano'], 'Tipo': ['Departamento'] * 2,
+                       'Precio': [500_000, 600_000], 'URL': ['a', 'b']})
+    assert market_frame(df)['Barrio'].tolist() == ['palermo', '?']
+
+def test_un_aviso_por_mes(tmp_path):
+    df = pd.DataFrame({'Barrio': ['Palermo'] * 3, 'Tipo': ['Departamento'] * 3,
+                       'Precio': [500_000, 600_000, 700_000], 'URL': ['a', 'b', 'c']})
+    stats = MarketStats(str(tmp_path / 'stats.json'))
+    stats.update(df, '2026-01-01')
+    stats.update(df, '2026-01-02')
+    total = sum(g['Precio'].count for g in stats.grupos.values())
+    assert total == 3
+
+@pytest.mark.parametrize('legado_primero', [True, False])
+def test_load_suma_grupo_legado_en_cualquier_orden(tmp_path, legado_primero):
+    a, b = QuantileSketch(), QuantileSketch()
+    a.add(_precios(100, 4)); b.add(_precios(200, 5))
+    legado = {'clave': ['palermo|belgrano', 'Departamento'], 'sketches': {'Precio': a.to_dict()}}
+    real = {'clave': ['?', 'Departamento'], 'sketches': {'Precio': b.to_dict()}}
+    path = tmp_path / 'stats.json'
+    path.write_text(json.dumps({'alpha': ALPHA, 'grupos': [legado, real] if legado_primero else [real, legado],
+                                'ingeridos': [], 'vistos': {}}), encoding='utf-8')
+    stats = MarketStats.load(str(path))
+    assert list(stats.grupos) == [('?', 'Departamento')]
+    sk = stats.grupos[('?', 'Departamento')]['Precio']
+    assert sk.count == 300 and sk.buckets == a.merge(b).buckets
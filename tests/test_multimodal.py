@@ -0,0 +1,62 @@
+import numpy as np
+import networkx as nx
+import geopandas as gpd
+import shapely
+import momepy
+import pytest
+
+from snapping import snap_points_to_edges, snap_layer
+from contraction import contract_degree2
+from isochrones import VELOCIDAD_M_MIN
+from multimodal import build_multimodal, door_to_door, solo_a_pie
+from benchmark import ORIGEN, CUADRA_M
+
+LADO_M = 12 * CUADRA_M
+
+@pytest.fixture
+def escenario(ciudad):
+    """Una línea de subte que cruza la ciudad sintética, con una estación en cada punta."""
+    calles, _, avisos = ciudad
+    x0, y0 = ORIGEN
+    y = y0 + LADO_M / 2
+    lineas = gpd.GeoDataFrame({'LINEASUB': ['LINEA A']}, geometry=[shapely.LineString([(x0, y), (x0 + LADO_M, y)])])
+    estaciones = gpd.GeoDataFrame({'estacion': ['Oeste', 'Este'], 'linea': ['A', 'A']},
+                                  geometry=shapely.points([(x0 + 50, y), (x0 + LADO_M - 50, y)]))
+    destino = shapely.Point(x0 + LADO_M - 40, y + 20)
+    return calles, avisos, lineas, estaciones, destino
+
+def _preparar(escenario, contraer):
+    calles, avisos, lineas, estaciones, destino = escenario
+    G = momepy.gdf_to_nx(calles, approach='primal')
+    nodos_org, dist_org = snap_points_to_edges(G, avisos.geometry.to_numpy())
+    accesos = snap_layer(G, estaciones.geometry.to_numpy())
+    nodo_destino, dist_destino = snap_points_to_edges(G, [destino])
+    cadenas = None
+    if contraer:
+        G, cadenas = contract_degree2(G, keep={n for a in accesos for n in a} | set(nodo_destino))
+    M = build_multimodal(G, lineas, estaciones)
+    return G, M, cadenas, nodos_org, dist_org, nodo_destino[0], dist_destino[0]
+
+def test_a_pie_igual_a_dijkstra_de_calles(escenario):
+    G, M, _, nodos_org, dist_org, destino, dist_destino = _preparar(escenario, contraer=False)
+    metros = nx.single_source_dijkstra_path_length(G, destino, weight='mm_len')
+    esperado = (np.array([metros.get(n, np.nan) for n in nodos_org]) + dist_org + dist_destino) / VELOCIDAD_M_MIN
+    np.testing.assert_allclose(door_to_door(solo_a_pie(M), nodos_org, dist_org, destino, dist_destino), esperado, atol=1e-6)
+
+def test_subte_nunca_empeora_y_ayuda_de_punta_a_punta(escenario):
+    _, M, _, nodos_org, dist_org, destino, dist_destino = _preparar(escenario, contraer=False)
+    con_subte = door_to_door(M, nodos_org, dist_org, destino, dist_destino)
+    a_pie = door_to_door(solo_a_pie(M), nodos_org, dist_org, destino, dist_destino)
+    assert np.all(con_subte <= a_pie + 1e-9)
+    # Desde cerca de la estación oeste, cruzar en subte gana a caminar toda la ciudad
+    avisos, estaciones = escenario[1], escenario[3]
+    cerca_oeste = avisos.distance(estaciones.geometry.iloc[0]).to_numpy() < 2 * CUADRA_M
+    assert cerca_oeste.any() and np.all(con_subte[cerca_oeste] < a_pie[cerca_oeste])
+
+def test_contraido_igual_que_sin_contraer(escenario):
+    _, M0, _, org0, dist0, dest0, dd0 = _preparar(escenario, contraer=False)
+    _, M1, cadenas, org1, dist1, dest1, dd1 = _preparar(escenario, contraer=True)
+    assert org0 == org1 and dest0 == dest1
+    for vista in (lambda M: M, solo_a_pie):
+        np.testing.assert_allclose(door_to_door(vista(M1), org1, dist1, dest1, dd1, cadenas=cadenas),
+                                   door_to_door(vista(M0), org0, dist0, dest0, dd0), atol=1e-6)
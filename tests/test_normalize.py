@@ -0,0 +1,63 @@
+import pandas as pd
+
+import normalize
+from normalize import RAW
+
+def _texto(valores):
+    return pd.Series(valores, dtype='string')
+
+def test_force_int_y_moneda():
+    s = _texto(['$ 450.000', 'USD 1.200', 'A estrenar', 'Consultar precio', None, '35 m² cub.'])
+    vals = normalize.force_int(s)
+    # El '²' no es un dígito: "35 m²" vale 35
+    assert vals.iloc[0] == 450000 and vals.iloc[1] == 1200 and vals.iloc[2] == 0 and vals.iloc[5] == 35
+    assert vals.iloc[3:5].isna().all()
+    assert normalize.is_usd(s).tolist() == [False, True, False, False, False, False]
+
+def test_ambientes_desde_texto():
+    s = _texto(['Depto 3 amb. luminoso', 'dos ambientes con balcón', 'PH 2ambientes', 'monoambiente', None])
+    res = normalize.ambientes_from_text(s)
+    assert res.iloc[:3].tolist() == [3, 2, 2]
+    assert res.iloc[3:].isna().all()
+
+def test_normalize_desde_raw():
+    df = pd.DataFrame({
+        'Portal': ['argenprop', 'zonaprop', 'cabaprop'],
+        'Titulo': ['Lindo 3 ambientes', 'Depto', 'tres ambientes'],
+        'Precio' + RAW: ['$ 500.000 + $ 80.000 expensas', 'USD 900', None],
+        'Precio': [None, None, 610000],
+        'Ambientes' + RAW: [None, '2 amb.', None],
+    })
+    res = normalize.normalize(df)
+    # Argenprop: el precio es lo que va antes del '+'
+    assert res['Precio'].tolist() == [500000, 900, 610000]
+    assert res['Moneda'].tolist()[:2] == ['ARS', 'USD'] and pd.isna(res['Moneda'].iloc[2])
+    # Sin texto crudo se imputa desde el título (solo en los portales configurados)
+    assert res['Ambientes'].tolist() == [3, 2, 3]
+    assert res['Precio'].dtype == 'UInt32' and res['Ambientes'].dtype == 'UInt8'
+    # El texto crudo se conserva para poder re-normalizar
+    assert res['Precio' + RAW].tolist()[:2] == df['Precio' + RAW].tolist()[:2]
+
+def test_normalize_es_idempotente():
+    df = pd.DataFrame({'Portal': ['zonaprop'] * 2, 'Precio' + RAW: ['$ 450.000', 'USD 1.000'],
+                       'Expensas' + RAW: ['$ 50.000', None]})
+    una = normalize.normalize(df)
+    pd.testing.assert_frame_equal(normalize.normalize(una), una)
+
+def test_filtros_de_exclusion_y_precio():
+    df = normalize.normalize(pd.DataFrame({
+        'Portal': ['zonaprop'] * 5,
+        'Titulo': ['Monoambiente', 'Mono Ambiente al frente', 'Depto 2 amb', 'Depto', 'Depto'],
+        'Descripcion_Breve': [None, None, None, 'ideal monoamb', None],
+        'Ambientes' + RAW: [None, None, '2', '3', '1 amb'],
+        'Precio' + RAW: ['$ 400.000', '$ 400.000', '$ 5.000', 'USD 500', '$ 400.000'],
+    }))
+    excluido = normalize.mask_excluded(df, ['monoambiente', 'mono ambiente', 'monoamb'])
+    assert excluido.tolist() == [True, True, False, True, True]
+    assert normalize.mask_valid_price(df).tolist() == [True, True, False, False, True]
+
+def test_columnas_del_csv_cubren_lo_que_produce_normalize():
+    df = normalize.normalize(pd.DataFrame({c + RAW: ['1'] for c in normalize.CAMPOS_NUMERICOS}))
+    assert set(df.columns) <= set(normalize.CSV_COLUMNS)
+    assert normalize.CSV_COLUMNS[:len(normalize.schema.CORE_COLUMNS)] == normalize.schema.CORE_COLUMNS
+    assert len(set(normalize.CSV_COLUMNS)) == len(normalize.CSV_COLUMNS)
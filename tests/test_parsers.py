@@ -0,0 +1,31 @@
+import parsers
+from parsers import classify_page, EMPTY_RE, MIN_HTML_BYTES
+
+def _pagina(cuerpo):
+    # Relleno para pasar MIN_HTML_BYTES: una página completa sin cards
+    return f"<html><head><title>Alquileres</title></head><body>{cuerpo}{'<div></div>' * MIN_HTML_BYTES}</body></html>"
+
+def test_empty_re_cero_exacto():
+    assert EMPTY_RE.search("0 resultados")
+    assert EMPTY_RE.search("Se encontraron 0 propiedades")
+    assert not EMPTY_RE.search("10 resultados")
+    assert not EMPTY_RE.search("120 resultados")
+    assert not EMPTY_RE.search("10 propiedades")
+    assert not EMPTY_RE.search("1.200 resultados")
+
+def test_listado_con_conteo_no_es_vacio():
+    assert classify_page(_pagina("<h1>10 resultados</h1>"), 'argenprop') == parsers.PAGINA_DESCONOCIDA
+
+def test_vacia_solo_con_texto_del_portal():
+    assert classify_page(_pagina("<p>No se encontraron resultados</p>"), 'zonaprop') == parsers.PAGINA_VACIA
+
+def test_pagina_sin_cards_es_desconocida():
+    clase = classify_page(_pagina(""), 'zonaprop')
+    assert clase == parsers.PAGINA_DESCONOCIDA
+    assert clase in parsers.PAGINAS_REINTENTABLES
+
+def test_resultados_desafio_error():
+    assert classify_page(_pagina('<li class="listing__item">'), 'argenprop') == parsers.PAGINA_RESULTADOS
+    assert classify_page(_pagina('<div id="challenge-platform"></div>'), 'zonaprop') == parsers.PAGINA_DESAFIO
+    assert classify_page("<html><body>hola</body></html>", 'zonaprop') == parsers.PAGINA_ERROR
+    assert classify_page("", 'zonaprop') == parsers.PAGINA_ERROR
@@ -0,0 +1,35 @@
+import ast
+import os
+
+import pytest
+
+from pipeline import STAGES, SCRIPT_DIR
+
+# Módulos que la CLI importa con otro nombre (alquiler_finder/cli.py)
+ALIAS = {'url_builder': '1.url_builder.py', 'parsers': '2.parsers.py'}
+
+def _locales(script, vistos=None):
+    """scripts/*.py que importa el script, directa o indirectamente."""
+    vistos = set() if vistos is None else vistos
+    with open(os.path.join(SCRIPT_DIR, script), encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Import):
+            nombres = [a.name for a in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres = [nodo.module]
+        else:
+            continue
+        for nombre in nombres:
+            archivo = ALIAS.get(nombre, f'{nombre}.py')
+            if archivo not in vistos and os.path.exists(os.path.join(SCRIPT_DIR, archivo)):
+                vistos.add(archivo)
+                _locales(archivo, vistos)
+    return vistos
+
+@pytest.mark.parametrize('nombre', list(STAGES))
+def test_entradas_incluyen_los_modulos_importados(nombre):
+    stage = STAGES[nombre]
+    declarados = {os.path.basename(p) for p in stage['inputs'] if p.startswith('scripts/')}
+    faltan = _locales(stage['script']) - declarados
+    assert not faltan, f"{nombre}: agregar a inputs {sorted(faltan)}"
@@ -0,0 +1,86 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import geopandas as gpd
+import pytest
+
+import hexgrid
+from query_server import MetricsTable, parse_query, run_query, make_handler
+
+N = 300
+
+@pytest.fixture(scope='module')
+def datos(tmp_path_factory):
+    """Avisos al azar alrededor de Palermo, con precios nulos y dos barrios."""
+    rng = np.random.default_rng(0)
+    gdf = gpd.GeoDataFrame({
+        'Precio': np.where(rng.random(N) < 0.1, np.nan, rng.integers(300, 900, N) * 1000.0),
+        'Ambientes': rng.integers(1, 5, N).astype(float),
+        'Barrio': rng.choice(['palermo', 'belgrano'], N),
+        'URL': [f'u{i}' for i in range(N)],
+    }, geometry=gpd.points_from_xy(-58.43 + rng.uniform(-0.02, 0.02, N), -34.58 + rng.uniform(-0.02, 0.02, N)),
+        crs="EPSG:4326")
+    path = tmp_path_factory.mktemp('metrics') / 'metrics.geojson'
+    gdf.to_file(path, driver='GeoJSON')
+    return gdf, MetricsTable(str(path))
+
+def test_mascara_igual_a_pandas(datos):
+    gdf, tabla = datos
+    bbox = (-58.44, -34.59, -58.42, -34.57)
+    filtros, _ = parse_query(tabla, [('Precio_min', '400000'), ('Precio_max', '700000'),
+                                     ('Barrio', 'palermo'), ('bbox', ','.join(map(str, bbox)))])
+    x, y = gdf.geometry.x, gdf.geometry.y
+    esperado = (gdf['Precio'].between(400_000, 700_000) & (gdf['Barrio'] == 'palermo')
+                & x.between(bbox[0], bbox[2]) & y.between(bbox[1], bbox[3]))
+    np.testing.assert_array_equal(tabla.mask(filtros), esperado.to_numpy())
+
+def test_cerca_es_distancia_exacta(datos):
+    gdf, tabla = datos
+    radio = 800
+    filtros, _ = parse_query(tabla, [('cerca', f'-58.43,-34.58,{radio}')])
+    pts = gdf.to_crs(epsg=hexgrid.PROYECCION).geometry
+    centro = gpd.GeoSeries(gpd.points_from_xy([-58.43], [-34.58]), crs="EPSG:4326").to_crs(epsg=hexgrid.PROYECCION).iloc[0]
+    np.testing.assert_array_equal(tabla.mask(filtros), (pts.distance(centro) <= radio).to_numpy())
+
+@pytest.mark.parametrize('orden', ['Precio', '-Precio'])
+@pytest.mark.parametrize('limit', [0, 5, N, N + 10])
+def test_top_k_igual_a_ordenar_todo(datos, orden, limit):
+    gdf, tabla = datos
+    res = run_query(tabla, [('orden', orden), ('limit', str(limit)), ('campos', 'Precio,URL')])
+    # Nulos al final, empates en el orden original
+    ordenado = gdf.sort_values('Precio', ascending=not orden.startswith('-'), kind='stable', na_position='last')
+    assert res['total'] == N
+    assert [r['URL'] for r in res['resultados']] == ordenado['URL'].tolist()[:limit]
+
+@pytest.mark.parametrize('query', [
+    [('bbox', '-58.44,-34.59,-58.42')],
+    [('bbox', '-58.44,-34.59,-58.42,-34.57,1')],
+    [('cerca', '-58.43,-34.58')],
+    [('limit', '-1')],
+    [('desconocido', '1')],
+])
+def test_consultas_invalidas(datos, query):
+    _, tabla = datos
+    with pytest.raises(ValueError):
+        parse_query(tabla, query)
+
+def test_servidor_responde_400_a_consultas_invalidas(datos):
+    _, tabla = datos
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(tabla))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}/listings"
+    try:
+        for qs in ('bbox=1,2,3', 'limit=-5'):
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(f"{base}?{qs}", timeout=5)
+            assert e.value.code == 400
+            assert 'error' in json.loads(e.value.read())
+        with urllib.request.urlopen(f"{base}?limit=3", timeout=5) as r:
+            assert json.loads(r.read())['devueltos'] == 3
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
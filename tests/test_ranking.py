@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ranking import Ranker, CRITERIOS, add_precio_m2
+
+N = 2_000
+
+@pytest.fixture(scope='module')
+def deptos():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Precio': rng.integers(300, 900, N) * 1000,
+        'Expensas': rng.integers(0, 150, N) * 1000,
+        'Metros_Cubiertos': np.where(rng.random(N) < 0.05, 0, rng.integers(25, 120, N)),
+        'Ambientes': pd.array(np.where(rng.random(N) < 0.1, None, rng.integers(1, 5, N)), dtype='UInt8'),
+        # Distancias redondeadas: muchos empates, como en la tabla real
+        'distancia_m_subte': np.where(rng.random(N) < 0.1, np.nan, rng.integers(0, 10, N) * 100.0),
+        'cant_plaza': rng.integers(0, 4, N),
+        'Barrio': rng.choice(['palermo', 'belgrano', 'almagro'], N),
+    })
+    df['costo_total'] = df['Precio'] + df['Expensas']
+    return df
+
+def test_puntajes_en_rango_y_sentido_de_cada_criterio(deptos):
+    r = Ranker(deptos)
+    s = r.scores({'costo_total': 1.0})
+    assert s.min() >= 0 and s.max() <= 1
+    # Menor costo -> mayor puntaje (monótono, salvo empates por el recorte de percentiles)
+    orden = np.argsort(deptos['costo_total'].to_numpy(), kind='stable')
+    assert (np.diff(s[orden]) <= 1e-6).all()
+    # Sin dato = peor valor
+    s = r.scores({'distancia_m_subte': 1.0})
+    assert (s[deptos['distancia_m_subte'].isna().to_numpy()] == 0).all()
+    assert (r.scores({'cant_plaza': 1.0})[deptos['cant_plaza'].to_numpy() == 3] == 1).all()
+
+def test_precio_m2_nulo_sin_superficie(deptos):
+    df = add_precio_m2(deptos.copy())
+    assert df['precio_m2'][deptos['Metros_Cubiertos'] == 0].isna().all()
+    assert 'precio_m2' in Ranker(deptos).criterios
+
+def test_restricciones(deptos):
+    r = Ranker(deptos)
+    ok = r.mask({'costo_total': (None, 700_000), 'Ambientes': (2, None), 'Barrio': ['palermo', 'almagro']})
+    esperado = ((deptos['costo_total'] <= 700_000) & (deptos['Ambientes'] >= 2).fillna(False)
+                & deptos['Barrio'].isin(['palermo', 'almagro']))
+    np.testing.assert_array_equal(ok, esperado.to_numpy())
+    with pytest.raises(KeyError):
+        r.mask({'NoExiste': (0, 1)})
+
+@pytest.mark.parametrize('pesos', [{'distancia_m_subte': 1.0}, {'cant_plaza': 1.0, 'distancia_m_subte': 1.0}, None])
+@pytest.mark.parametrize('k', [1, 10, 500, N])
+def test_top_k_igual_a_ordenar_todo(deptos, pesos, k):
+    r = Ranker(deptos)
+    pesos = pesos or {c: 1.0 for c in CRITERIOS}
+    idx, s = r.top(k, pesos, {'Ambientes': (2, None)})
+    validos = np.flatnonzero(r.mask({'Ambientes': (2, None)}))
+    todos = r.scores(pesos)[validos]
+    orden = validos[np.argsort(-todos, kind='stable')][:k]
+    np.testing.assert_array_equal(idx, orden)
+    np.testing.assert_array_equal(s, r.scores(pesos)[orden])
+
+def test_rank_devuelve_filas_y_columnas_pedidas(deptos):
+    res = Ranker(deptos).rank(5, columnas=['Barrio', 'costo_total', 'NoExiste'])
+    assert list(res.columns) == ['Barrio', 'costo_total', 'score']
+    assert len(res) == 5 and res['score'].is_monotonic_decreasing
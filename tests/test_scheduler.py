@@ -0,0 +1,66 @@
+import time
+import threading
+import pytest
+
+from scheduler import PortalScheduler
+
+def _politicas(intervalo=0.05, concurrencia=1):
+    cfg = {"intervalo_s": intervalo, "jitter_s": 0.0, "concurrencia": concurrencia, "backoff_base_s": 1, "backoff_max_s": 5}
+    return {"a": dict(cfg), "b": dict(cfg)}
+
+def _navegar(sched, portal, n, tiempos, adentro=None, maximo=None):
+    for _ in range(n):
+        with sched.request(portal):
+            tiempos.append(time.monotonic())
+            if adentro is not None:
+                with adentro['lock']:
+                    adentro['n'] += 1
+                    maximo.append(adentro['n'])
+                time.sleep(0.01)
+                with adentro['lock']:
+                    adentro['n'] -= 1
+
+def test_intervalo_minimo_entre_navegaciones_del_mismo_portal():
+    sched = PortalScheduler(_politicas(0.05))
+    tiempos, t0 = [], time.monotonic()
+    hilos = [threading.Thread(target=_navegar, args=(sched, 'a', 3, tiempos)) for _ in range(2)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    tiempos.sort()
+    assert len(tiempos) == 6
+    # Los turnos están separados 50 ms; lo medido incluye cuándo despierta cada hilo
+    assert min(b - a for a, b in zip(tiempos, tiempos[1:])) >= 0.05 - 0.01
+    assert tiempos[-1] - t0 >= 5 * 0.05
+
+def test_portales_distintos_esperan_en_paralelo():
+    sched = PortalScheduler(_politicas(0.05))
+    t0 = time.monotonic()
+    hilos = [threading.Thread(target=_navegar, args=(sched, p, 5, [])) for p in ('a', 'b')]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    # 4 esperas de 50 ms por portal: en serie serían ~0.4 s
+    assert time.monotonic() - t0 < 0.35
+
+def test_cupo_de_concurrencia():
+    sched = PortalScheduler(_politicas(0.0, concurrencia=2))
+    adentro, maximo = {'n': 0, 'lock': threading.Lock()}, []
+    hilos = [threading.Thread(target=_navegar, args=(sched, 'a', 4, [], adentro, maximo)) for _ in range(5)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    assert max(maximo) == 2
+
+def test_backoff_exponencial_con_tope_y_reward():
+    sched = PortalScheduler(_politicas())
+    assert [sched.penalize('a') for _ in range(5)] == [1, 2, 4, 5, 5]
+    # El backoff corre el turno del portal, no el de los demás
+    assert sched._reservar_turno('a') > 4
+    assert sched._reservar_turno('b') == 0
+    sched.reward('a')
+    assert sched.penalize('a') == 1
+
+def test_excepcion_en_la_navegacion_penaliza_y_se_propaga():
+    sched = PortalScheduler(_politicas())
+    with pytest.raises(RuntimeError):
+        with sched.request('a'):
+            raise RuntimeError("timeout")
+    assert sched._nivel['a'] == 1
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+import schema
+
+def _crudo():
+    return pd.DataFrame({
+        'URL': ['a', 'b', 'c'],
+        'Portal': ['zonaprop', ' argenprop ', 'otro'],
+        'Barrio': ['Palermo', '', None],
+        'Precio': ['450000', '1234567890123', 'n/a'],
+        'Ambientes': [2.0, -1, 300],
+        'Bajo_Precio': ['True', 'false', None],
+        'Fecha_Publicacion': ['05/03/2026', 'ayer', None],
+        'min_destino': ['12.5', None, '7'],
+    })
+
+def test_tipos_angostos_y_valores_fuera_de_rango_nulos():
+    df = schema.apply_schema(_crudo())
+    assert df['Portal'].dtype == schema.CATEGORICAS['Portal']
+    assert df['Portal'].tolist()[:2] == ['zonaprop', 'argenprop'] and pd.isna(df['Portal'].iloc[2])
+    assert isinstance(df['Barrio'].dtype, pd.CategoricalDtype) and df['Barrio'].isna().tolist() == [False, True, True]
+    assert df['Precio'].dtype == 'UInt32' and df['Precio'].tolist()[:1] == [450000] and df['Precio'].isna()[1:].all()
+    assert df['Ambientes'].dtype == 'UInt8' and df['Ambientes'].tolist()[0] == 2 and df['Ambientes'].isna()[1:].all()
+    assert df['Bajo_Precio'].dtype == 'boolean' and df['Bajo_Precio'].tolist()[:2] == [True, False]
+    assert df['Fecha_Publicacion'].iloc[0] == pd.Timestamp('2026-03-05') and df['Fecha_Publicacion'].isna()[1:].all()
+    assert df['min_destino'].dtype == 'float32'
+
+def test_aplicar_dos_veces_no_cambia_nada():
+    una = schema.apply_schema(_crudo())
+    dos = schema.apply_schema(una)
+    pd.testing.assert_frame_equal(dos, una)
+    # Lo que ya está en el esquema no se toca: el frame comparte los datos
+    assert np.shares_memory(dos['Precio'].array._data, una['Precio'].array._data)
+
+def test_orden_nucleo_primero_y_geometria_al_final():
+    gdf = gpd.GeoDataFrame({'zeta': [1], 'URL': ['a'], 'Precio': [1], 'alfa': [2]},
+                           geometry=gpd.points_from_xy([0], [0]))
+    assert list(schema.order_columns(gdf).columns) == ['Precio', 'URL', 'alfa', 'zeta', 'geometry']
+
+def test_concat_conserva_categorias_abiertas():
+    a = schema.apply_schema(pd.DataFrame({'Barrio': ['palermo'], 'Precio': [1]}))
+    b = schema.apply_schema(pd.DataFrame({'Barrio': ['belgrano'], 'Precio': [2]}))
+    df = schema.concat([a, None, b])
+    assert isinstance(df['Barrio'].dtype, pd.CategoricalDtype)
+    assert df['Barrio'].tolist() == ['palermo', 'belgrano']
+
+def test_ida_y_vuelta_csv_sin_inferencia(tmp_path):
+    df = schema.apply_schema(_crudo().assign(Precio_raw=['$ 450.000', '007', None]))
+    path = tmp_path / 'zonaprop.csv'
+    schema.write_csv(df, path)
+    leido = schema.read_csv(path)
+    # Los '_raw' siguen siendo texto tal cual (ceros a la izquierda incluidos)
+    assert leido['Precio_raw'].tolist()[:2] == ['$ 450.000', '007']
+    for col in ('Portal', 'Precio', 'Ambientes', 'Bajo_Precio'):
+        assert leido[col].dtype == df[col].dtype
+        pd.testing.assert_series_equal(leido[col], df[col], check_categorical=False, check_names=False)
@@ -0,0 +1,87 @@
+import numpy as np
+import networkx as nx
+import shapely
+import momepy
+import pytest
+
+import benchmark
+from snapping import snap_points_to_edges, snap_layer, polygon_access_nodes, TOLERANCIA_ACCESO_M
+
+def _grafo(calles):
+    return momepy.gdf_to_nx(calles, approach='primal')
+
+def test_proyeccion_sobre_la_calle_mas_cercana(ciudad):
+    calles, _, avisos = ciudad
+    G = _grafo(calles)
+    puntos = avisos.geometry.to_numpy()
+    nodos, dist = snap_points_to_edges(G, puntos)
+    # La distancia informada es la del punto a la calle más cercana, y el nodo está sobre esa calle
+    cercana = shapely.distance(puntos, shapely.union_all(calles.geometry.to_numpy()))
+    np.testing.assert_allclose(dist, cercana, atol=1e-6)
+    xy = np.array(nodos, dtype=float)
+    np.testing.assert_allclose(shapely.distance(puntos, shapely.points(xy)), dist, atol=0.5 + 1e-6)
+    assert all(n in G for n in nodos)
+
+def test_partir_aristas_conserva_largos_y_distancias(ciudad):
+    calles, _, avisos = ciudad
+    G = _grafo(calles)
+    H = G.copy()
+    largo = sum(d['mm_len'] for *_, d in G.edges(data=True))
+    snap_points_to_edges(H, avisos.geometry.to_numpy())
+    assert sum(d['mm_len'] for *_, d in H.edges(data=True)) == pytest.approx(largo)
+    for u, v, d in H.edges(data=True):
+        assert d['mm_len'] == pytest.approx(d['geometry'].length)
+        # La geometría une los dos nodos de la arista
+        extremos = sorted([d['geometry'].coords[0], d['geometry'].coords[-1]])
+        np.testing.assert_allclose(extremos, sorted([u, v]), atol=1e-6)
+    # Las distancias entre nodos originales no cambian
+    origen = next(iter(G.nodes))
+    d0 = nx.single_source_dijkstra_path_length(G, origen, weight='mm_len')
+    d1 = nx.single_source_dijkstra_path_length(H, origen, weight='mm_len')
+    for n, d in d0.items():
+        assert d1[n] == pytest.approx(d)
+
+def test_puntos_repetidos_y_extremos_reusan_nodos(ciudad):
+    calles, _, _ = ciudad
+    G = _grafo(calles)
+    esquina = next(iter(G.nodes))
+    nodos, dist = snap_points_to_edges(G, [shapely.Point(esquina), shapely.Point(esquina)])
+    assert nodos == [esquina, esquina] and np.allclose(dist, 0)
+    antes = G.number_of_nodes()
+    u, v = next(iter(G.edges()))
+    geom = G[u][v][0]['geometry'] if G.is_multigraph() else G[u][v]['geometry']
+    medio = shapely.line_interpolate_point(geom, 0.5, normalized=True)
+    nodos, _ = snap_points_to_edges(G, [medio, medio])
+    assert nodos[0] == nodos[1] and G.number_of_nodes() == antes + 1
+
+def test_capa_mixta_puntos_y_poligonos(ciudad):
+    calles, capas, _ = ciudad
+    G = _grafo(calles)
+    for capa in ('gym', 'plaza'):
+        accesos = snap_layer(G, capas[capa].geometry.to_numpy())
+        assert len(accesos) == len(capas[capa])
+        assert all(acc and all(n in G for n in acc) for acc in accesos)
+
+def test_accesos_de_poligono_son_los_nodos_del_borde(ciudad):
+    calles, capas, _ = ciudad
+    G = _grafo(calles)
+    poligonos = capas['plaza'].geometry.to_numpy()
+    nodos = list(G.nodes)
+    puntos = shapely.points(np.array(nodos, dtype=float))
+    for pol, acc in zip(poligonos, polygon_access_nodes(G, poligonos)):
+        cerca = {n for n, p in zip(nodos, puntos) if shapely.distance(pol, p) <= TOLERANCIA_ACCESO_M}
+        if cerca:
+            assert set(acc) == cerca
+
+def test_poligono_sin_nodos_cerca_entra_por_la_calle_mas_cercana(ciudad):
+    calles, _, _ = ciudad
+    G = _grafo(calles)
+    # Cuadradito en medio de una manzana: ningún nodo a menos de la tolerancia
+    x, y = benchmark.ORIGEN[0] + 550, benchmark.ORIGEN[1] + 550
+    pol = shapely.box(x - 2, y - 2, x + 2, y + 2)
+    assert min(shapely.distance(pol, shapely.points(np.array(list(G.nodes), dtype=float)))) > TOLERANCIA_ACCESO_M
+    [acc] = polygon_access_nodes(G, [pol])
+    assert len(acc) == 1 and acc[0] in G
+    # El acceso está sobre la calle más cercana al polígono
+    cercana = shapely.distance(pol, shapely.union_all(calles.geometry.to_numpy()))
+    assert shapely.distance(pol, shapely.Point(acc[0])) == pytest.approx(cercana, abs=0.5 + 1e-6)
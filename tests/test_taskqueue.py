@@ -0,0 +1,98 @@
+import time
+import pytest
+
+import taskqueue
+from taskqueue import TaskQueue, tasks_for, MAX_INTENTOS
+
+FECHA = '2026-01-01'
+
+@pytest.fixture
+def cola(tmp_path, monkeypatch):
+    # Sin intervalo de cortesía: los tests toman tareas seguidas del mismo portal
+    monkeypatch.setattr(taskqueue, 'POLITICAS', {})
+    return TaskQueue(str(tmp_path / 'queue.sqlite'))
+
+def _tareas(portal='zonaprop', paginas=(1, 2), consulta='https://x/q'):
+    return [{'portal': portal, 'consulta': consulta, 'barrio': 'palermo', 'tipo': 'departamento',
+             'pagina': n, 'url': f'{consulta}-p{n}'} for n in paginas]
+
+def _estados(cola, fecha=FECHA):
+    return {(f['portal'], f['estado']): f['n'] for f in cola.stats(fecha)}
+
+def test_encolar_ignora_repetidas(cola):
+    assert cola.enqueue(_tareas(), FECHA) == 2
+    assert cola.enqueue(_tareas(paginas=(2, 3)), FECHA) == 1
+    assert cola.pending(FECHA) == 3
+
+def test_lease_por_pagina_y_una_sola_vez(cola):
+    cola.enqueue(_tareas(paginas=(2, 1)), FECHA)
+    a = cola.lease('w1', fecha=FECHA)
+    b = cola.lease('w2', fecha=FECHA)
+    assert (a['pagina'], b['pagina']) == (1, 2)
+    assert a['intentos'] == 1 and a['fecha'] == FECHA
+    assert cola.lease('w3', fecha=FECHA) is None
+    # Las tareas de otro día no se mezclan
+    assert cola.lease('w3', fecha='2026-01-02') is None
+
+def test_lease_vencido_pasa_a_otro_worker(cola):
+    cola.enqueue(_tareas(paginas=(1,)), FECHA)
+    a = cola.lease('w1', lease_s=0, fecha=FECHA)
+    time.sleep(0.01)
+    b = cola.lease('w2', fecha=FECHA)
+    assert b['id'] == a['id'] and b['intentos'] == 2
+    # El primer worker ya no puede completarla; el dueño actual sí (una sola vez)
+    assert not cola.complete(a, 'w1', 10)
+    assert cola.complete(b, 'w2', 10)
+    assert not cola.complete(b, 'w2', 10)
+    assert _estados(cola) == {('zonaprop', 'hecha'): 1}
+
+def test_reintentos_con_espera_hasta_fallida(cola):
+    cola.enqueue(_tareas(paginas=(1,)), FECHA)
+    t = cola.lease('w1', fecha=FECHA)
+    assert cola.fail(t, 'w1', 'timeout') == 'pendiente'
+    # Con espera pendiente no se vuelve a tomar
+    assert cola.lease('w1', fecha=FECHA) is None
+    for intento in range(2, MAX_INTENTOS + 1):
+        cola.fail(t, 'w1', 'timeout', espera_s=0)
+        t = cola.lease('w1', fecha=FECHA)
+        assert t['intentos'] == intento
+    assert cola.fail(t, 'w1', 'timeout', espera_s=0) == 'fallida'
+    assert cola.lease('w1', fecha=FECHA) is None and cola.pending(FECHA) == 0
+
+def test_worker_muerto_con_intentos_agotados_queda_fallida(cola):
+    cola.enqueue(_tareas(paginas=(1,)), FECHA)
+    for _ in range(MAX_INTENTOS):
+        t = cola.lease('w1', lease_s=0, fecha=FECHA)
+        assert t is not None
+        time.sleep(0.01)
+    # Nunca llegó a fail(): el lease vencido con los intentos agotados la cierra
+    assert cola.lease('w2', fecha=FECHA) is None
+    assert _estados(cola) == {('zonaprop', 'fallida'): 1}
+
+def test_turnos_de_cortesia_compartidos(cola, monkeypatch):
+    monkeypatch.setattr(taskqueue, 'POLITICAS', {'zonaprop': {'intervalo_s': 60}})
+    cola.enqueue(_tareas(paginas=(1, 2)) + _tareas('argenprop', paginas=(1,)), FECHA)
+    assert cola.lease('w1', fecha=FECHA)['portal'] == 'zonaprop'
+    # zonaprop espera su turno; argenprop no
+    assert cola.lease('w2', fecha=FECHA)['portal'] == 'argenprop'
+    assert cola.lease('w3', fecha=FECHA) is None
+    assert 50 < cola.next_turn(['zonaprop']) <= 60
+    cola.backoff('argenprop', 300)
+    assert cola.next_turn(['argenprop']) > 290
+
+def test_fecha_por_defecto_es_la_del_momento(cola, monkeypatch):
+    monkeypatch.setattr(taskqueue, 'today', lambda: FECHA)
+    cola.enqueue(_tareas(paginas=(1,)))
+    assert cola.lease('w1')['fecha'] == FECHA
+    monkeypatch.setattr(taskqueue, 'today', lambda: '2026-01-02')
+    assert cola.pending() == 0
+
+def test_tareas_por_total_conocido():
+    consultas = [{'url': 'https://x/a', 'barrio': 'palermo', 'tipo': 'ph', 'total': 45},
+                 {'url': 'https://x/b', 'barrio': 'belgrano', 'tipo': 'ph', 'total': None},
+                 {'url': 'https://x/c', 'barrio': 'almagro', 'tipo': 'ph', 'total': 10_000}]
+    paginas = {}
+    for t in tasks_for('zonaprop', consultas):
+        paginas.setdefault(t['consulta'], []).append(t['pagina'])
+    # 45 avisos de a 30 -> 2 páginas; sin total solo la 1; el tope de páginas se respeta
+    assert paginas == {'https://x/a': [1, 2], 'https://x/b': [1], 'https://x/c': list(range(1, taskqueue.MAX_PAGINAS + 1))}
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from text_index import TextIndex
+
+def _avisos(filas):
+    return pd.DataFrame(filas, columns=['URL', 'Portal', 'Barrio', 'Titulo', 'Descripcion_Breve'])
+
+@pytest.fixture
+def indice(tmp_path):
+    idx = TextIndex(str(tmp_path / 'text_index.sqlite'))
+    idx.add(_avisos([
+        ('a', 'zonaprop', 'palermo', 'Depto LUMINÓSO apto mascotas', 'Con balcón al frente'),
+        ('b', 'argenprop', 'belgrano', 'Monoambiente luminoso', 'apto profesional, mascotas no'),
+        ('c', 'cabaprop', 'almagro', 'PH luminoso con patio', 'Sin balcón'),
+        ('d', 'zonaprop', 'palermo', 'Departamento apto', 'mascotas bienvenidas'),
+        ('d', 'zonaprop', 'palermo', 'Departamento apto', 'mascotas bienvenidas'),
+        (None, 'zonaprop', None, 'sin url', None),
+    ]), '2026-01-01')
+    yield idx
+    idx.close()
+
+def _urls(indice, consulta, **kw):
+    return sorted(r['url'] for r in indice.search(consulta, **kw))
+
+def test_palabras_sin_acentos_ni_mayusculas(indice):
+    assert _urls(indice, 'luminoso') == ['a', 'b', 'c']
+    assert _urls(indice, 'Luminoso BALCON') == ['a', 'c']
+
+def test_frase_exige_tokens_consecutivos(indice):
+    assert _urls(indice, '"apto mascotas"') == ['a']
+    assert _urls(indice, 'apto mascotas') == ['a', 'b', 'd']
+    # La frase no cruza del título a la descripción ('... apto' + 'mascotas ...')
+    assert 'd' not in _urls(indice, '"apto mascotas"')
+
+def test_exclusiones(indice):
+    assert _urls(indice, 'luminoso -monoambiente') == ['a', 'c']
+    assert _urls(indice, 'luminoso -"sin balcon"') == ['a', 'b']
+    with pytest.raises(ValueError):
+        indice.search('-monoambiente')
+
+def test_reindexar_solo_lo_que_cambio(indice):
+    assert indice.add(_avisos([('a', 'zonaprop', 'palermo', 'Depto LUMINÓSO apto mascotas', 'Con balcón al frente')]), '2026-01-05') == 0
+    assert indice.add(_avisos([('c', 'cabaprop', 'almagro', 'PH reciclado con patio', 'Sin balcón')]), '2026-01-05') == 1
+    # Los tokens viejos del aviso cambiado ya no lo encuentran
+    assert _urls(indice, 'luminoso') == ['a', 'b']
+    assert _urls(indice, 'reciclado') == ['c']
+
+def test_filtro_por_fechas_de_aparicion(indice):
+    indice.add(_avisos([('a', 'zonaprop', 'palermo', 'Depto LUMINÓSO apto mascotas', 'Con balcón al frente')]), '2026-02-01')
+    assert _urls(indice, 'luminoso', desde='2026-01-15') == ['a']
+    assert _urls(indice, 'luminoso', hasta='2025-12-31') == []
+    # Más reciente primero
+    assert indice.search('luminoso')[0]['url'] == 'a'
+    assert indice.search('luminoso')[0]['primera'] == '2026-01-01'
@@ -0,0 +1,71 @@
+import re
+import numpy as np
+import pytest
+
+from url_builder import planificar_consultas, url_pagina, PARAMS, PAGE_SIZE, MAX_PAGINAS, LISTA_BARRIOS
+
+# Inventario sintético: cuántos avisos tiene cada barrio (los dos tipos iguales)
+TAMANOS = {'palermo': 400, 'villa-urquiza': 95, 'parque-chas': 0, 'belgrano': 30,
+           'recoleta': 12, 'almagro': 5, 'colegiales': 41, 'barrio-norte': 7}
+
+@pytest.fixture
+def inventario():
+    rng = np.random.default_rng(0)
+    pmin, pmax = PARAMS['precio']['min'], PARAMS['precio']['max']
+    return {b: rng.integers(pmin, pmax + 1, n) for b, n in TAMANOS.items()}
+
+def _contador(portal, inventario):
+    """contar(url) como lo haría el portal: avisos de los barrios de la URL dentro del rango de precio."""
+    def contar(url):
+        if portal == 'argenprop':
+            barrios, pmin, pmax = re.search(r'/alquiler/([^/]+)/pesos-(\d+)-(\d+)', url).groups()
+            barrios = barrios.split('-o-')
+        else:
+            barrios = [b for b in LISTA_BARRIOS if f'-alquiler-{b}-' in url]
+            pmin, pmax = re.search(r'-(\d+)-(\d+)-pesos\.html$', url).groups()
+        return int(sum(((inventario[b] >= int(pmin)) & (inventario[b] <= int(pmax))).sum() for b in barrios))
+    return contar
+
+@pytest.mark.parametrize('portal', ['argenprop', 'zonaprop'])
+def test_plan_cubre_todo_sin_pasar_el_tope(portal, inventario):
+    consultas = planificar_consultas(portal, _contador(portal, inventario))
+    capacidad = MAX_PAGINAS * PAGE_SIZE[portal]
+    contar = _contador(portal, inventario)
+    for tipo in PARAMS['tipos']:
+        del_tipo = [c for c in consultas if c['tipo'] == tipo]
+        # Rangos de precio disjuntos: la suma de totales es el inventario completo
+        assert sum(c['total'] for c in del_tipo) == sum(TAMANOS.values())
+        for c in del_tipo:
+            assert 0 < c['total'] <= capacidad
+            assert contar(c['url']) == c['total']
+    # Los barrios vacíos no generan consultas
+    assert not any('parque-chas' in c['barrio'].split('|') for c in consultas)
+
+def test_barrios_chicos_se_agrupan_solo_donde_el_portal_lo_admite(inventario):
+    argenprop = planificar_consultas('argenprop', _contador('argenprop', inventario))
+    grupos = [c for c in argenprop if '|' in c['barrio']]
+    assert grupos and all('-o-'.join(c['barrio'].split('|')) in c['url'] for c in grupos)
+    zonaprop = planificar_consultas('zonaprop', _contador('zonaprop', inventario))
+    assert not any('|' in c['barrio'] for c in zonaprop)
+    # Los barrios que entran en una consulta comparten URL: menos consultas que barrios
+    capacidad = MAX_PAGINAS * PAGE_SIZE['argenprop']
+    chicos = {b for b, n in TAMANOS.items() if 0 < n <= capacidad}
+    de_chicos = [c for c in argenprop if c['tipo'] == 'departamento' and set(c['barrio'].split('|')) <= chicos]
+    assert len(de_chicos) < len(chicos)
+
+def test_sin_conteo_queda_una_consulta_por_barrio():
+    consultas = planificar_consultas('argenprop', lambda url: None, barrios=['palermo', 'belgrano'])
+    assert sorted((c['barrio'], c['tipo']) for c in consultas) == sorted(
+        (b, t) for b in ['palermo', 'belgrano'] for t in PARAMS['tipos'])
+    assert all(c['total'] is None for c in consultas)
+
+@pytest.mark.parametrize('portal,url,esperada', [
+    ('zonaprop', 'https://www.zonaprop.com.ar/x-350000-800000-pesos.html',
+     'https://www.zonaprop.com.ar/x-350000-800000-pesos-pagina-3.html'),
+    ('argenprop', 'https://www.argenprop.com/d/alquiler/palermo?solo-ver-pesos',
+     'https://www.argenprop.com/d/alquiler/palermo?solo-ver-pesos&pagina-3'),
+    ('cabaprop', 'https://cabaprop.com.ar/propiedades/x?pagina=1', 'https://cabaprop.com.ar/propiedades/x?pagina=3'),
+])
+def test_url_de_pagina(portal, url, esperada):
+    assert url_pagina(portal, url, 1) == url
+    assert url_pagina(portal, url, 3) == esperada
@@ -0,0 +1,45 @@
+import json
+import time
+
+import watch
+from watch import prune_seen, page_hash
+
+def test_prune_olvida_los_viejos():
+    ahora = time.time()
+    vistos = {'viejo': ahora - 31 * 86400, 'reciente': ahora - 86400, 'hoy': ahora}
+    prune_seen(vistos, dias=30)
+    assert set(vistos) == {'reciente', 'hoy'}
+
+def test_prune_recorta_a_los_mas_recientes():
+    ahora = time.time()
+    vistos = {f'u{i}': ahora - i for i in range(100)}
+    prune_seen(vistos, dias=30, maximo=10)
+    assert set(vistos) == {f'u{i}' for i in range(10)}
+
+def test_estado_con_formato_anterior(tmp_path, monkeypatch):
+    path = tmp_path / 'watch_state.json'
+    path.write_text(json.dumps({'hashes': {'q': 'h'}, 'vistos': ['a', 'b']}), encoding='utf-8')
+    monkeypatch.setattr(watch, 'STATE_PATH', str(path))
+    state = watch.load_state()
+    assert state['hashes'] == {'q': 'h'}
+    assert set(state['vistos']) == {'a', 'b'} and all(t <= time.time() for t in state['vistos'].values())
+
+def _zonaprop(ids, banner='', token=''):
+    cards = ''.join(f'<div data-id="{i}">Depto {i}</div>' for i in ids)
+    return f'<html><script>var t="{token}"</script><div class="banner">{banner}</div>{cards}</html>'
+
+def test_huella_ignora_banners_y_orden():
+    a = page_hash('zonaprop', _zonaprop([1, 2, 3], banner='Promo', token='x1'))
+    b = page_hash('zonaprop', _zonaprop([3, 1, 2], banner='Otra promo', token='y2'))
+    assert a == b
+    assert page_hash('zonaprop', _zonaprop([1, 2, 4])) != a
+
+def test_huella_de_argenprop_por_links():
+    html = '<a href="/departamento-en-alquiler-en-palermo--1234?x=1">a</a><a href="/ph-en-alquiler--99">b</a>'
+    assert page_hash('argenprop', html) == page_hash('argenprop', '<p>nuevo banner</p>' + html)
+    assert page_hash('argenprop', html) != page_hash('argenprop', html.replace('--99', '--100'))
+
+def test_huella_sin_identificadores_usa_el_html_sin_scripts():
+    base = '<html><div>sin avisos</div></html>'
+    assert page_hash('cabaprop', base) == page_hash('cabaprop', base.replace('<html>', '<html><script>x=1</script>'))
+    assert page_hash('cabaprop', base) != page_hash('cabaprop', base.replace('sin', 'con'))